@@ -0,0 +1,104 @@
+"""
+DuckDB market_data ingest benchmark
+Compares the legacy correlated NOT EXISTS insert against the keyed bulk upsert
+
+Usage:
+    python benchmarks/bench_duckdb_ingest.py --symbols 500 --bars 1000 --batches 10
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analytics.duckdb_analytics import DuckDBAnalytics
+
+
+def make_bars(symbols: int, bars: int, start: str, seed: int) -> pd.DataFrame:
+    """Synthetic bars: one row per (symbol, bar)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=bars, freq='D')
+    close = 100 + np.cumsum(rng.normal(0, 1, (symbols, bars)), axis=1)
+    return pd.DataFrame({
+        'date': np.tile(dates, symbols),
+        'symbol': np.repeat([f"SYM{i:05d}" for i in range(symbols)], bars),
+        'open': close.ravel(),
+        'high': close.ravel() + 1,
+        'low': close.ravel() - 1,
+        'close': close.ravel(),
+        'volume': rng.integers(1_000, 1_000_000, symbols * bars),
+        'adj_close': close.ravel(),
+    })
+
+
+def legacy_insert(db: DuckDBAnalytics, df: pd.DataFrame):
+    """Pre-upsert ingest path: correlated NOT EXISTS against an unindexed table"""
+    db.conn.register('temp_market_data', df)
+    db.conn.execute("""
+        INSERT INTO market_data
+        SELECT * FROM temp_market_data
+        WHERE NOT EXISTS (
+            SELECT 1 FROM market_data md
+            WHERE md.date = temp_market_data.date
+            AND md.symbol = temp_market_data.symbol
+        )
+    """)
+    db.conn.unregister('temp_market_data')
+
+
+def run(label: str, db: DuckDBAnalytics, batches, ingest) -> float:
+    rows = 0
+    start = time.perf_counter()
+    for batch in batches:
+        ingest(db, batch)
+        rows += len(batch)
+    elapsed = time.perf_counter() - start
+    total = db.conn.execute("SELECT COUNT(*) FROM market_data").fetchone()[0]
+    print(f"{label:<28} {rows:>10,} rows  {elapsed:8.2f}s  {rows / elapsed:>12,.0f} rows/sec  "
+          f"(table: {total:,})")
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=1_000, help="bars per symbol per batch")
+    parser.add_argument('--batches', type=int, default=10)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    # Consecutive, non-overlapping batches: the table keeps growing like a nightly backfill
+    batches = []
+    for i in range(args.batches):
+        start = pd.Timestamp('1900-01-01') + pd.Timedelta(days=i * args.bars)
+        batches.append(make_bars(args.symbols, args.bars, str(start.date()), seed=i))
+
+    if not args.skip_legacy:
+        legacy = DuckDBAnalytics(':memory:')
+        legacy.conn.execute("DROP INDEX market_data_symbol_date_idx")
+        legacy_rate = run("legacy NOT EXISTS", legacy, batches, legacy_insert)
+        legacy.close()
+
+    rates = {}
+    for keyed in (True, False):
+        label = "keyed" if keyed else "unkeyed"
+        upsert = DuckDBAnalytics(':memory:', keyed_market_data=keyed)
+        rates[label] = run(f"{label} upsert (anti-join)", upsert, batches,
+                           lambda db, df: db.upsert_market_data(df, replace=False))
+        run(f"{label} upsert (replace)", upsert, batches,
+            lambda db, df: db.upsert_market_data(df, replace=True))
+        upsert.close()
+
+    if not args.skip_legacy:
+        print()
+        for label, rate in rates.items():
+            print(f"{label} anti-join vs legacy: {rate / legacy_rate:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
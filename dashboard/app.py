@@ -15,13 +15,13 @@ import plotly.express as px
 from datetime import datetime, timedelta
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from core.portfolio import Portfolio
-from data.multi_source_pipeline import MultiSourcePipeline
-from analytics.duckdb_analytics import DuckDBAnalytics
-from feature_store.features import FeatureEngineering
-from optimization.optuna_tuner import ParameterTuner
+from src.core.portfolio import Portfolio
+from src.data.multi_source_pipeline import MultiSourcePipeline
+from src.analytics.duckdb_analytics import DuckDBAnalytics
+from src.feature_store.features import FeatureEngineering
+from src.optimization.optuna_tuner import ParameterTuner
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,13 +42,37 @@ if 'portfolio' not in st.session_state:
 if 'pipeline' not in st.session_state:
     st.session_state.pipeline = MultiSourcePipeline()
 
-if 'analytics' not in st.session_state:
-    st.session_state.analytics = DuckDBAnalytics()
-
 if 'feature_eng' not in st.session_state:
     st.session_state.feature_eng = FeatureEngineering()
 
 
+def get_analytics():
+    """
+    Read-only analytics on the latest published snapshot (None before the first publish)
+    
+    The dashboard never holds the live database: ingest keeps writing there and
+    publishes snapshots, which this session follows on every call.
+    """
+    analytics = st.session_state.get('analytics')
+    if analytics is None:
+        try:
+            analytics = DuckDBAnalytics.from_snapshot(profile=True)
+        except FileNotFoundError:
+            return None
+        st.session_state.analytics = analytics
+    else:
+        analytics.refresh_snapshot()
+    return analytics
+
+
+def write_analytics(write):
+    """Run write(analytics) on a short-lived writer, publish, and move readers to the result"""
+    with DuckDBAnalytics.writer() as writer:
+        result = write(writer)
+    get_analytics()
+    return result
+
+
 def render_header():
     """Render dashboard header"""
     col1, col2, col3 = st.columns([2, 2, 2])
@@ -177,7 +201,7 @@ def render_data_sources():
                     market_data = st.session_state.pipeline.fetch_market_data(
                         symbols, start_date, end_date
                     )
-                    st.session_state.analytics.insert_market_data(market_data)
+                    write_analytics(lambda db: db.insert_market_data(market_data))
                     st.success(f"✅ Fetched {len(market_data)} data points")
                     
                     # Show data preview
@@ -202,7 +226,7 @@ def render_data_sources():
                 
                 try:
                     fundamentals = st.session_state.pipeline.fetch_fundamentals(symbols)
-                    st.session_state.analytics.insert_fundamentals(fundamentals)
+                    write_analytics(lambda db: db.insert_fundamentals(fundamentals))
                     st.success(f"✅ Fetched fundamentals for {len(fundamentals)} companies")
                     
                     st.dataframe(fundamentals, use_container_width=True)
@@ -215,15 +239,21 @@ def render_data_sources():
         
         query_type = st.selectbox(
             "Select query type",
-            ["Stock Performance", "Momentum Screen", "Value Screen", "Correlation Matrix"]
+            ["Stock Performance", "Momentum Screen", "Value Screen", "Correlation Matrix",
+             "Query Stats"]
         )
         
+        analytics = get_analytics()
+        if analytics is None:
+            st.info("No analytics snapshot published yet; fetch market data or run the ingest flow")
+            return
+        
         if query_type == "Stock Performance":
             symbol = st.text_input("Symbol", value="AAPL").upper()
             days = st.slider("Days", 30, 500, 252)
             
             if st.button("Calculate"):
-                perf = st.session_state.analytics.get_stock_performance(symbol, days)
+                perf = analytics.get_stock_performance(symbol, days)
                 if perf:
                     st.json(perf)
                 else:
@@ -234,7 +264,7 @@ def render_data_sources():
             days = st.slider("Days", 30, 500, 60)
             
             if st.button("Screen"):
-                momentum_stocks = st.session_state.analytics.get_momentum_screen(min_return, days)
+                momentum_stocks = analytics.get_momentum_screen(min_return, days)
                 if not momentum_stocks.empty:
                     st.dataframe(momentum_stocks, use_container_width=True)
                 else:
@@ -244,11 +274,26 @@ def render_data_sources():
             max_pe = st.slider("Max P/E Ratio", 5.0, 50.0, 15.0)
             
             if st.button("Screen"):
-                value_stocks = st.session_state.analytics.get_value_screen(max_pe)
+                value_stocks = analytics.get_value_screen(max_pe)
                 if not value_stocks.empty:
                     st.dataframe(value_stocks, use_container_width=True)
                 else:
                     st.warning("No stocks match criteria")
+        
+        elif query_type == "Query Stats":
+            stats = analytics.get_query_stats()
+            if not stats:
+                st.info("Query profiling is off (DuckDBAnalytics(profile=True) enables it)")
+            else:
+                methods = pd.DataFrame(stats['methods'])
+                if not methods.empty:
+                    st.dataframe(methods.drop(columns='histogram'), use_container_width=True)
+                    histogram = pd.DataFrame({m['method']: m['histogram'] for m in stats['methods']})
+                    st.bar_chart(histogram)
+                for slow in stats['slow_queries']:
+                    with st.expander(f"{slow['method']}: {slow['elapsed_ms']:.0f} ms"):
+                        st.code(slow['sql'], language='sql')
+                        st.text(slow['plan'])
 
 
 def render_features():
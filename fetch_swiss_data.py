@@ -10,11 +10,11 @@ from datetime import datetime, timedelta
 import logging
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
 
-from data.multi_source_pipeline import MultiSourcePipeline
-from analytics.duckdb_analytics import DuckDBAnalytics
-from feature_store.features import FeatureEngineering
+from src.data.multi_source_pipeline import MultiSourcePipeline
+from src.analytics.duckdb_analytics import DuckDBAnalytics
+from src.feature_store.features import FeatureEngineering
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
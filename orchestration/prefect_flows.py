@@ -19,12 +19,12 @@ from pathlib import Path
 import sys
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from data.multi_source_pipeline import MultiSourcePipeline
-from analytics.duckdb_analytics import DuckDBAnalytics
-from feature_store.features import FeatureEngineering
-from backtesting.backtest_engine import BacktestEngine
+from src.data.multi_source_pipeline import MultiSourcePipeline
+from src.analytics.duckdb_analytics import DuckDBAnalytics
+from src.feature_store.features import FeatureEngineering
+from src.backtesting.backtest_engine import BacktestEngine
 
 logger = logging.getLogger(__name__)
 
@@ -82,6 +82,17 @@ if PREFECT_AVAILABLE:
         return features
     
     
+    @task(name="Publish Analytics Snapshot")
+    def publish_snapshot_task():
+        """Publish the ingested database as the read snapshot for dashboards and agents"""
+        analytics = DuckDBAnalytics()
+        path = analytics.publish_snapshot()
+        analytics.close()
+        
+        logger.info(f"Published analytics snapshot {path}")
+        return str(path)
+    
+    
     @task(name="Backtest Signals")
     def backtest_signals_task():
         """Run backtests on existing signals"""
@@ -111,6 +122,9 @@ if PREFECT_AVAILABLE:
         # Generate features
         features = generate_features_task(market_data)
         
+        # Readers switch to the new data only once ingestion is complete
+        publish_snapshot_task()
+        
         logger.info("Nightly pipeline complete")
         return {"market_data": market_data, "features": features}
     
@@ -120,7 +134,7 @@ if PREFECT_AVAILABLE:
         """Optimize signal parameters"""
         logger.info("Starting signal optimization")
         
-        from optimization.optuna_tuner import ParameterTuner
+        from src.optimization.optuna_tuner import ParameterTuner
         
         # Load recent data
         symbols = ["AAPL", "MSFT", "GOOGL", "NVDA", "META"]
@@ -189,6 +203,10 @@ else:
         
         logger.info("Starting nightly data pipeline")
         market_data = fetch_market_data_task(symbols)
+        
+        analytics = DuckDBAnalytics()
+        analytics.publish_snapshot()
+        analytics.close()
         logger.info("Nightly pipeline complete")
         
         return market_data
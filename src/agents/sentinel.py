@@ -6,9 +6,14 @@ The ultimate risk gatekeeper with veto power over all trades
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 import numpy as np
+import pandas as pd
 
 from .base_agent import BaseAgent, AgentDecision
 
+from ..risk.correlation_tracker import EWMACorrelationTracker
+from ..risk.stress import StressTestEngine
+from ..risk.var_engine import VaREngine
+
 
 class SentinelAgent(BaseAgent):
     """
@@ -18,6 +23,8 @@ class SentinelAgent(BaseAgent):
     - Calculate Value at Risk (VaR)
     - Monitor drawdown levels
     - Detect correlation spikes
+    - Stress the post-trade book under historical and hypothetical scenarios
+    - Cap post-trade sector exposure (with a configured risk_manager)
     - Enforce hard risk limits
     - VETO trades that violate risk parameters
     """
@@ -32,11 +39,45 @@ class SentinelAgent(BaseAgent):
         self.max_leverage = config.get("max_leverage", 2.0)
         self.correlation_spike_threshold = config.get("correlation_threshold", 0.95)
         self.max_daily_loss_pct = config.get("max_daily_loss_pct", 3.0)
+        # Rise of average holding correlation over its slow baseline that counts as a spike
+        self.correlation_spike_delta = config.get("correlation_spike_delta", 0.25)
+        
+        # VaR state follows returns_history incrementally (whole history unless var_window is set)
+        self.var_engine = VaREngine(
+            window=config.get("var_window"),
+            confidence=0.95,
+            method=config.get("var_method", "historical")
+        )
+        
+        # Holdings' correlation state, updated from each input's asset_returns
+        self.correlation_tracker = EWMACorrelationTracker(
+            halflife=config.get("correlation_halflife", 20.0),
+            baseline_halflife=config.get("correlation_baseline_halflife", 120.0),
+            min_observations=config.get("correlation_min_observations", 20)
+        )
+        
+        # Scenario stress test of the post-trade book; runs when scenarios are configured
+        # (stress_scenarios) or passed with the input, limits in % of portfolio value
+        self.stress_scenarios = config.get("stress_scenarios")
+        self.max_stress_loss_pct = config.get("max_stress_loss_pct", 15.0)
+        self.stress_engine = StressTestEngine(
+            max_loss_pct=self.max_stress_loss_pct / 100,
+            max_drawdown_pct=config.get("max_stress_drawdown_pct", 20.0) / 100,
+            factor_loadings=config.get("stress_factor_loadings")
+        )
+        self.last_stress_results = None
+        
+        # Optional RiskManager with an ExposureAggregator: the book's changes are fed to it
+        # as fills each call and proposed trades are checked against its sector limit
+        self.risk_manager = config.get("risk_manager")
+        if self.risk_manager is not None and self.risk_manager.exposure is None:
+            raise ValueError("risk_manager needs an ExposureAggregator to track the book")
         
         # State tracking
         self.veto_count = 0
         self.approved_count = 0
         self.last_veto_reason: Optional[str] = None
+        self.last_correlation_stats: Dict[str, Any] = {}
         
         self.logger.info("Sentinel Agent initialized - Risk Veto Authority Active")
     
@@ -49,6 +90,14 @@ class SentinelAgent(BaseAgent):
         - portfolio_value: Current portfolio value
         - portfolio_positions: Current positions
         - returns_history: Historical returns for VaR calculation
+        
+        Optional keys include asset_returns: the latest period's return per holding
+        ({symbol: return}), folded into the correlation tracker once per call (returns
+        of symbols not in portfolio_positions are ignored, and sold names are dropped),
+        stress_scenarios (a ScenarioSet, shock frame or list of sets) overriding the
+        configured ones, and returns_count, the running number of returns ever
+        appended to returns_history. Positions may carry quantity and price, which the
+        risk_manager's exposure tracks (value alone counts as units priced at 1)
         """
         required_keys = [
             "proposed_trades", 
@@ -83,13 +132,20 @@ class SentinelAgent(BaseAgent):
         current_drawdown = input_data.get("current_drawdown", 0.0)
         daily_pnl_pct = input_data.get("daily_pnl_pct", 0.0)
         market_regime = input_data.get("market_regime", "unknown")
+        asset_returns = input_data.get("asset_returns")
+        # Only holdings are tracked, so the baseline averages the names spike() compares
+        self.correlation_tracker.retain(portfolio_positions)
+        if asset_returns:
+            self.correlation_tracker.update({symbol: value for symbol, value in asset_returns.items()
+                                             if symbol in portfolio_positions})
         
         # Run risk checks
         veto_reasons = []
         risk_metrics = {}
         
         # Check 1: Value at Risk (VaR)
-        var_check, var_value = self._check_var(returns_history, portfolio_value)
+        var_check, var_value = self._check_var(returns_history, portfolio_value,
+                                               input_data.get("returns_count"))
         risk_metrics["var_95"] = var_value
         if not var_check:
             veto_reasons.append(
@@ -138,11 +194,20 @@ class SentinelAgent(BaseAgent):
         # Check 6: Correlation Spike Detection
         correlation_check, max_correlation = self._check_correlations(portfolio_positions)
         risk_metrics["max_correlation"] = max_correlation
+        risk_metrics.update(self.last_correlation_stats)
         if not correlation_check:
-            veto_reasons.append(
-                f"Correlation spike: {max_correlation:.2f} exceeds threshold of "
-                f"{self.correlation_spike_threshold}"
-            )
+            if not max_correlation <= self.correlation_spike_threshold:
+                veto_reasons.append(
+                    f"Correlation spike: {max_correlation:.2f} exceeds threshold of "
+                    f"{self.correlation_spike_threshold}"
+                )
+            else:
+                stats = self.last_correlation_stats
+                veto_reasons.append(
+                    f"Correlation spike: average {stats['average_correlation']:.2f} is "
+                    f"{stats['correlation_spike']:.2f} above its baseline "
+                    f"(limit {self.correlation_spike_delta})"
+                )
         
         # Check 7: Regime-based restrictions
         regime_check, regime_reason = self._check_regime_restrictions(
@@ -151,6 +216,33 @@ class SentinelAgent(BaseAgent):
         if not regime_check:
             veto_reasons.append(regime_reason)
         
+        # Check 8: Scenario stress test
+        scenarios = input_data.get("stress_scenarios", self.stress_scenarios)
+        if scenarios is not None:
+            stress_check, stress = self._check_stress(
+                scenarios, portfolio_positions, proposed_trades, portfolio_value
+            )
+            risk_metrics.update({f"stress_{key}": value for key, value in stress.items()})
+            if not stress_check:
+                veto_reasons.append(
+                    f"Stress test violation: {stress['breaches']} of {stress['scenarios']} "
+                    f"scenarios breach limits, worst {stress['worst_scenario']} at "
+                    f"{stress['worst_return'] * 100:.2f}%"
+                )
+        
+        # Check 9: Sector exposure
+        if self.risk_manager is not None:
+            self._sync_exposure(portfolio_positions)
+            sector_check, breached, sector_exposure = self._check_sector_exposure(
+                proposed_trades, portfolio_value
+            )
+            risk_metrics["sector_exposure"] = sector_exposure
+            if not sector_check:
+                veto_reasons.append(
+                    f"Sector exposure violation: {breached} exceed "
+                    f"{self.risk_manager.limits.max_sector_exposure * 100}% limit"
+                )
+        
         # Final decision
         if veto_reasons:
             decision_type = "VETO"
@@ -192,10 +284,15 @@ class SentinelAgent(BaseAgent):
         return decision
     
     def _check_var(self, returns_history: List[float], 
-                   portfolio_value: float) -> tuple[bool, float]:
+                   portfolio_value: float,
+                   returns_count: Optional[int] = None) -> tuple[bool, float]:
         """
         Calculate 95% Value at Risk
         
+        Args:
+            returns_count: Returns ever appended to returns_history, which lets a
+                sliding-window history sync incrementally (see VaREngine.sync)
+        
         Returns:
             (passed, var_percentage)
         """
@@ -203,8 +300,9 @@ class SentinelAgent(BaseAgent):
             self.logger.warning("Insufficient data for VaR calculation")
             return True, 0.0
         
-        returns = np.array(returns_history)
-        var_95 = np.percentile(returns, 5)  # 5th percentile for 95% VaR
+        # Only returns appended since the last call are folded in
+        self.var_engine.sync(returns_history, returns_count)
+        var_95 = self.var_engine.var()  # 5th percentile for 95% VaR
         var_pct = abs(var_95) * 100
         
         return var_pct <= self.max_var_pct, var_pct
@@ -271,16 +369,98 @@ class SentinelAgent(BaseAgent):
         """
         Detect correlation spikes in portfolio
         
+        Reads the EWMA correlation state of the held symbols (no return history is
+        rescanned); holdings without enough observations are left out. Average
+        correlation and its rise over baseline are kept in last_correlation_stats.
+        
+        Returns:
+            (passed, max_correlation); max_correlation is NaN until two holdings are tracked
+        """
+        symbols = list(positions)
+        tracker = self.correlation_tracker
+        max_correlation, pair = tracker.max_correlation(symbols)
+        spike = tracker.spike(symbols)
+        self.last_correlation_stats = {
+            "average_correlation": tracker.average_correlation(symbols),
+            "correlation_baseline": tracker.baseline if tracker.baseline is not None else float("nan"),
+            "correlation_spike": spike,
+            "max_correlation_pair": pair,
+        }
+        
+        # NaN (not enough data yet) passes
+        passed = not (max_correlation > self.correlation_spike_threshold
+                      or spike > self.correlation_spike_delta)
+        return passed, max_correlation
+    
+    def _check_stress(
+        self,
+        scenarios: Any,
+        positions: Dict[str, Any],
+        proposed_trades: List[Dict],
+        portfolio_value: float
+    ) -> tuple[bool, Dict[str, Any]]:
+        """
+        Stress the book as it would stand after the proposed trades
+        
+        Buys (and longs) add their value to the symbol's position, sells and shorts
+        subtract it. Per-scenario results are kept in last_stress_results.
+        
         Returns:
-            (passed, max_correlation)
+            (passed, StressTestEngine.summary of the results)
+        """
+        book = {symbol: pos.get("value", 0) for symbol, pos in positions.items()}
+        for trade in proposed_trades:
+            sign = 1.0 if trade.get("side", "buy") in ("buy", "long") else -1.0
+            symbol = trade.get("symbol")
+            book[symbol] = book.get(symbol, 0.0) + sign * trade.get("value", 0)
+        
+        self.last_stress_results = self.stress_engine.run(scenarios, book, portfolio_value)
+        summary = self.stress_engine.summary(self.last_stress_results)
+        return summary["breaches"] == 0, summary
+    
+    def _sync_exposure(self, positions: Dict[str, Any]):
+        """Record the book's changes since the last call as fills in the risk manager"""
+        exposure = self.risk_manager.exposure
+        for symbol, pos in positions.items():
+            quantity, price = pos.get("quantity"), pos.get("price")
+            if quantity is None or not price:
+                quantity, price = pos.get("value", 0), 1.0
+            filled = quantity - exposure.quantities.get(symbol, 0.0)
+            if filled:
+                self.risk_manager.record_fill(symbol, filled, price)
+            elif exposure.prices.get(symbol) != price:
+                exposure.mark({symbol: price})
+        for symbol in [s for s in exposure.quantities if s not in positions]:
+            self.risk_manager.record_fill(symbol, -exposure.quantities[symbol], exposure.prices[symbol])
+    
+    def _check_sector_exposure(
+        self,
+        proposed_trades: List[Dict],
+        portfolio_value: float
+    ) -> tuple[bool, List[str], Dict[str, float]]:
         """
-        # Simplified correlation check
-        # In production, would calculate actual correlation matrix
+        Check the sector limit on the book as it would stand after the proposed trades
         
-        # For now, return safe values
-        max_correlation = 0.7  # Placeholder
+        Trades are signed like in _check_stress; only trades adding exposure to a sector
+        over the limit fail.
         
-        return max_correlation <= self.correlation_spike_threshold, max_correlation
+        Returns:
+            (passed, list_of_breached_sectors, post-trade gross exposure per traded
+            sector as a fraction of portfolio value)
+        """
+        if not proposed_trades:
+            return True, [], {}
+        orders = pd.Series(
+            [(1.0 if trade.get("side", "buy") in ("buy", "long") else -1.0) * trade.get("value", 0)
+             for trade in proposed_trades],
+            index=[trade.get("symbol") for trade in proposed_trades], dtype=np.float64
+        ).groupby(level=0, sort=False).sum()
+        batch = self.risk_manager.validate_trades_batch(portfolio_value, orders)
+        exposure = self.risk_manager.exposure
+        breached = sorted({exposure.sector_of(symbol) for symbol in orders.index[~batch.sector_ok]})
+        scale = 1.0 / portfolio_value if portfolio_value > 0 else 0.0
+        return not breached, breached, {sector: total * scale
+                                        for sector, total in batch.sector_exposure.items()}
     
     def _check_regime_restrictions(
         self, 
@@ -320,6 +500,7 @@ class SentinelAgent(BaseAgent):
                 "max_var_pct": self.max_var_pct,
                 "max_drawdown_pct": self.max_drawdown_pct,
                 "max_position_size": self.max_position_size,
-                "max_leverage": self.max_leverage
+                "max_leverage": self.max_leverage,
+                "max_stress_loss_pct": self.max_stress_loss_pct
             }
         }
@@ -1,4 +1,6 @@
 """Analytics module"""
 from .duckdb_analytics import DuckDBAnalytics
+from .pairs import PairsScanner
+from .screening import Factor, ScreeningEngine
 
-__all__ = ['DuckDBAnalytics']
+__all__ = ['DuckDBAnalytics', 'Factor', 'PairsScanner', 'ScreeningEngine']
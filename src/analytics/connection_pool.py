@@ -0,0 +1,110 @@
+"""
+Read connection pool for DuckDBAnalytics
+Hands out cursors of one DuckDB database to concurrent reader threads; each cursor is its
+own connection, so readers run in parallel instead of serializing on the writer
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+
+class ReadConnectionPool:
+    """Fixed-size pool of cursors created lazily from a parent connection"""
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, size: int = 4,
+                 setup: Optional[Callable[[duckdb.DuckDBPyConnection], None]] = None,
+                 timeout: Optional[float] = None):
+        """
+        Args:
+            conn: Parent connection (cursors share its database and committed data)
+            size: Most cursors open at once
+            setup: Run on every new cursor, e.g. to create connection-local temp views
+            timeout: Seconds to wait for a free cursor (None waits forever)
+        """
+        self.conn = conn
+        self.size = size
+        self.setup = setup
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[Tuple[duckdb.DuckDBPyConnection, int]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._created = 0
+        self._closed = False
+
+    def _open(self) -> duckdb.DuckDBPyConnection:
+        cursor = self.conn.cursor()
+        if self.setup is not None:
+            self.setup(cursor)
+        with self._lock:
+            self._created += 1
+        return cursor
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Borrow a cursor for the duration of the block"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No read connection free after {self.timeout}s")
+        cursor = None
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Read connection pool is closed")
+                generation = self._generation
+            # Cursors opened before the last reset may carry outdated setup; drop them
+            while cursor is None:
+                try:
+                    candidate, candidate_generation = self._idle.get_nowait()
+                except queue.Empty:
+                    cursor = self._open()
+                    break
+                if candidate_generation == generation:
+                    cursor = candidate
+                else:
+                    candidate.close()
+
+            yield cursor
+        finally:
+            if cursor is not None:
+                with self._lock:
+                    keep = not self._closed and generation == self._generation
+                if keep:
+                    self._idle.put((cursor, generation))
+                else:
+                    cursor.close()
+            self._slots.release()
+
+    def reset(self):
+        """Discard existing cursors (after schema or view changes); borrowed ones close on return"""
+        with self._lock:
+            self._generation += 1
+        self._drain()
+
+    def _drain(self):
+        idle: List[duckdb.DuckDBPyConnection] = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait()[0])
+            except queue.Empty:
+                break
+        for cursor in idle:
+            cursor.close()
+
+    def stats(self) -> dict:
+        """Pool size and how many cursors were opened so far"""
+        with self._lock:
+            return {'size': self.size, 'idle': self._idle.qsize(), 'created': self._created,
+                    'generation': self._generation}
+
+    def close(self):
+        """Close idle cursors; borrowed ones close when returned"""
+        with self._lock:
+            self._closed = True
+        self._drain()
@@ -0,0 +1,131 @@
+"""
+Blockwise correlation for large universes
+Standardizes returns once, then fills the correlation matrix tile by tile with
+float32 matrix products, optionally with EWMA observation weights; ragged histories
+use pairwise-complete observations instead
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def ewma_weights(n_obs: int, halflife: Optional[float] = None) -> np.ndarray:
+    """Observation weights summing to 1, newest last; uniform when halflife is None"""
+    if halflife is None:
+        return np.full(n_obs, 1.0 / n_obs) if n_obs else np.empty(0)
+    ages = np.arange(n_obs - 1, -1, -1, dtype=np.float64)
+    weights = 0.5 ** (ages / halflife)
+    return weights / weights.sum()
+
+
+def standardize(returns: np.ndarray, halflife: Optional[float] = None,
+                dtype=np.float32) -> np.ndarray:
+    """
+    Weighted z-scores scaled by sqrt(weight), so Z.T @ Z is the correlation matrix
+
+    Missing observations (NaN) contribute zero, i.e. they are treated as the
+    column's mean, which biases correlations toward zero; blockwise_correlation
+    therefore only uses this for complete data, where it is exact Pearson correlation.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = np.isfinite(returns)
+    weights = ewma_weights(returns.shape[0], halflife)[:, None] * valid
+
+    weight_sum = weights.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (np.where(valid, returns, 0.0) * weights).sum(axis=0) / weight_sum
+        centered = np.where(valid, returns - mean, 0.0)
+        std = np.sqrt((weights * centered ** 2).sum(axis=0) / weight_sum)
+        z = centered * np.sqrt(weights / weight_sum) / std
+
+    # Constant or empty columns have no defined correlation
+    z[:, ~(std > 0)] = 0.0
+    return z.astype(dtype, copy=False)
+
+
+def blockwise_correlation(returns: np.ndarray, block_size: int = 512,
+                          halflife: Optional[float] = None, dtype=np.float32) -> np.ndarray:
+    """
+    Correlation matrix of the columns of a dates x symbols return array
+
+    Args:
+        returns: (n_dates, n_symbols) returns, NaN where missing
+        block_size: Symbols per tile; bounds the temporary product size
+        halflife: EWMA half-life in observations (None for equal weights)
+        dtype: Result and matrix-product precision
+
+    Returns:
+        (n_symbols, n_symbols) correlation matrix; NaN rows/cols for constant series.
+        With missing values each pair uses the dates both symbols have (as
+        DataFrame.corr does), NaN where that leaves fewer than two dates or no variance.
+    """
+    if not np.isfinite(returns).all():
+        return pairwise_correlation(returns, block_size, halflife, dtype)
+    z = standardize(returns, halflife, dtype)
+    n_symbols = z.shape[1]
+    corr = np.empty((n_symbols, n_symbols), dtype=dtype)
+
+    for i in range(0, n_symbols, block_size):
+        zi = z[:, i:i + block_size]
+        for j in range(i, n_symbols, block_size):
+            tile = zi.T @ z[:, j:j + block_size]
+            corr[i:i + block_size, j:j + block_size] = tile
+            if j != i:
+                corr[j:j + block_size, i:i + block_size] = tile.T
+
+    np.clip(corr, -1.0, 1.0, out=corr)
+    defined = np.abs(z).sum(axis=0) > 0
+    corr[~defined, :] = np.nan
+    corr[:, ~defined] = np.nan
+    np.fill_diagonal(corr, np.where(defined, 1.0, np.nan))
+    return corr
+
+
+def pairwise_correlation(returns: np.ndarray, block_size: int = 512,
+                         halflife: Optional[float] = None, dtype=np.float32) -> np.ndarray:
+    """
+    Correlation matrix over pairwise-complete observations, tile by tile
+
+    Each tile comes from weighted sums over the dates both symbols have: counts,
+    first and second moments and cross products, each one float64 matrix product
+    (about five times the work of the complete-data path).
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    valid = np.isfinite(returns)
+    weights = ewma_weights(returns.shape[0], halflife)[:, None]
+    # Centering on each column's own mean keeps the moment differences well conditioned
+    with np.errstate(invalid='ignore', divide='ignore'):
+        own_mean = np.where(valid, returns, 0.0).sum(axis=0) / valid.sum(axis=0)
+    x = np.where(valid, returns - np.nan_to_num(own_mean), 0.0)
+    mask = valid.astype(np.float64)
+    weighted_mask, weighted_x, weighted_sq = weights * mask, weights * x, weights * x * x
+    observations = mask.T @ mask
+
+    n_symbols = returns.shape[1]
+    corr = np.empty((n_symbols, n_symbols), dtype=dtype)
+    for i in range(0, n_symbols, block_size):
+        rows = slice(i, i + block_size)
+        for j in range(i, n_symbols, block_size):
+            cols = slice(j, j + block_size)
+            total = weighted_mask[:, rows].T @ mask[:, cols]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_i = (weighted_x[:, rows].T @ mask[:, cols]) / total
+                mean_j = (weighted_mask[:, rows].T @ x[:, cols]) / total
+                var_i = (weighted_sq[:, rows].T @ mask[:, cols]) / total - mean_i ** 2
+                var_j = (weighted_mask[:, rows].T @ (x[:, cols] ** 2)) / total - mean_j ** 2
+                cov = (weighted_x[:, rows].T @ x[:, cols]) / total - mean_i * mean_j
+                tile = cov / np.sqrt(var_i * var_j)
+            # Variances that are rounding residue count as constant
+            scale = np.maximum(var_i + mean_i ** 2, var_j + mean_j ** 2)
+            undefined = ((observations[rows, cols] < 2) | (var_i <= 1e-12 * scale)
+                         | (var_j <= 1e-12 * scale))
+            tile[undefined] = np.nan
+            corr[rows, cols] = tile
+            if j != i:
+                corr[cols, rows] = tile.T
+
+    np.clip(corr, -1.0, 1.0, out=corr)
+    diagonal = np.diagonal(corr).copy()
+    np.fill_diagonal(corr, np.where(np.isfinite(diagonal), 1.0, np.nan))
+    return corr
@@ -3,28 +3,297 @@ DuckDB Analytics Layer
 High-performance analytical queries on financial data
 """
 
+import functools
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Sequence, Tuple
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute
 import duckdb
 
+from .parquet_lake import ParquetLake
+from .correlation import blockwise_correlation
+from .query_cache import QueryCache, result_size
+from .instrumentation import QueryProfiler, enable_profiling, result_rows, scan_metrics
+from .connection_pool import ReadConnectionPool
+from .snapshots import SnapshotPublisher
+from .screening import Factor, ScreeningEngine
+from .pairs import PairsScanner
+
+from ..feature_store.compact import compact_frame
+
 logger = logging.getLogger(__name__)
 
+MARKET_DATA_COLUMNS = ['date', 'symbol', 'open', 'high', 'low', 'close', 'volume', 'adj_close']
+MARKET_DATA_KEY = ['symbol', 'date']
+SIGNAL_COLUMNS = ['date', 'symbol', 'signal_type', 'strength', 'entry_price', 'stop_loss',
+                  'take_profit']
+SECTOR_COLUMNS = ['symbol', 'sector', 'industry']
+
+# Trading-day windows maintained in rolling_stats
+ROLLING_WINDOWS = (20, 60, 252)
+
+# Calendar days of history read back when refreshing derived rows; comfortably covers
+# the longest rolling window (plus its seed day) for daily data with normal holidays
+DERIVED_LOOKBACK_DAYS = 2 * max(ROLLING_WINDOWS) + 30
+
+# Tables rewritten whenever market_data changes
+DERIVED_TABLES = ('daily_returns', 'latest_prices', 'rolling_stats')
+
+# Numeric market_data columns load_price_panel can pivot
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'adj_close')
+
+
+def arrow_to_numpy(column: pa.ChunkedArray) -> np.ndarray:
+    """
+    NumPy view of an Arrow column
+    
+    Single-chunk primitive columns without nulls come back as read-only zero-copy views;
+    nulls become NaN (copying), strings become object arrays.
+    """
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    return array.to_numpy(zero_copy_only=False)
+
+
+def _serialized(method):
+    """Hold the instance's write lock for the duration of a write method"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.read_only:
+            raise PermissionError(f"{method.__name__} needs a writable database, "
+                                  f"{self.db_path} is open read-only")
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _profiled(method):
+    """Time a data method when the instance has a profiler"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.profiler is None:
+            return method(self, *args, **kwargs)
+        with self.profiler.track(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class DuckDBAnalytics:
     """DuckDB-based analytics engine for financial data"""
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, keyed_market_data: bool = True,
+                 lake_path: Optional[str] = None, n_buckets: int = 16,
+                 cache_size: int = 256, cache_ttl: Optional[float] = 3600.0,
+                 read_pool_size: int = 4, read_only: bool = False,
+                 profile: bool = False, slow_query_ms: float = 500.0):
+        """
+        Args:
+            db_path: DuckDB database file (':memory:' for a throwaway database)
+            keyed_market_data: Maintain the unique (symbol, date) index on market_data
+            lake_path: Keep market_data, fundamentals, signals and trades as hive-partitioned
+                Parquet under this directory instead of in the database file
+            n_buckets: Symbol hash buckets per lake table
+            cache_size: Query results kept in the result cache (0 disables it)
+            cache_ttl: Seconds a cached result stays valid without intervening writes
+            read_pool_size: Cursors available to concurrent reader threads
+            read_only: Open without taking the write lock (e.g. a published snapshot);
+                no tables are created and write methods raise PermissionError
+            profile: Record per-method timings and per-query metrics (get_query_stats)
+            slow_query_ms: Queries at least this slow get an EXPLAIN ANALYZE capture
+        """
         if db_path is None:
             db_path = Path(__file__).parent.parent.parent / "database" / "qsconnect.duckdb"
         
         self.db_path = str(db_path)
-        self.conn = duckdb.connect(self.db_path)
-        self._initialize_db()
-        logger.info(f"Connected to DuckDB: {self.db_path}")
+        # The unique (symbol, date) index enables INSERT OR REPLACE but roughly triples
+        # append cost; bulk-only loaders can opt out and upsert via delete + insert
+        self.keyed_market_data = keyed_market_data
+        self.has_market_data_key = False
+        self.read_only = read_only
+        self.read_pool_size = read_pool_size
+        # Set by from_snapshot(); lets refresh_snapshot() follow newer publishes
+        self.snapshot_root: Optional[Path] = None
+        self.lake = ParquetLake(lake_path, n_buckets) if lake_path else None
+        # Writes made through self.conn directly must call invalidate_cache()
+        self.query_cache = QueryCache(cache_size, ttl_seconds=cache_ttl) if cache_size > 0 else None
+        self.profiler = QueryProfiler(slow_query_ms) if profile else None
+        # Writes share self.conn and are serialized; reads borrow pooled cursors
+        self._write_lock = threading.RLock()
+        self._connect()
+        if not self.read_only:
+            self._initialize_db()
+        if self.lake is not None:
+            self.lake.attach_views(self.conn)
+            logger.info(f"Parquet lake attached: {self.lake.root}")
+        if not self.read_only:
+            if self._derived_tables_stale():
+                self.rebuild_derived_tables()
+            else:
+                # A deferred bulk load that never called refresh_derived_tables()
+                self.refresh_derived_tables()
+        logger.info(f"Connected to DuckDB: {self.db_path}" + (" (read-only)" if read_only else ""))
+    
+    def _connect(self):
+        """Open self.db_path and a read pool on top of it"""
+        self.conn = duckdb.connect(self.db_path, read_only=self.read_only)
+        self.read_pool = ReadConnectionPool(self.conn, self.read_pool_size, setup=self._setup_reader)
+    
+    @classmethod
+    def from_snapshot(cls, root: Optional[str] = None, **kwargs) -> "DuckDBAnalytics":
+        """
+        Open the latest published snapshot read-only
+        
+        Args:
+            root: Snapshot root passed to publish_snapshot() (database/snapshots if None)
+            **kwargs: Other DuckDBAnalytics arguments (lake_path, cache settings, ...)
+        """
+        publisher = SnapshotPublisher(root)
+        path = publisher.current()
+        if path is None:
+            raise FileNotFoundError(f"No snapshot published under {publisher.root}")
+        analytics = cls(path, read_only=True, **kwargs)
+        analytics.snapshot_root = publisher.root
+        return analytics
+    
+    @_serialized
+    def publish_snapshot(self, root: Optional[str] = None, keep: int = 3) -> Path:
+        """
+        Publish the committed state of this database as the latest read snapshot
+        
+        Args:
+            root: Snapshot root shared with readers (database/snapshots if None)
+            keep: Snapshots retained, so readers still on an older one are not cut off
+        """
+        return SnapshotPublisher(root, keep).publish(self.conn)
+    
+    @classmethod
+    @contextmanager
+    def writer(cls, db_path: Optional[str] = None, snapshot_root: Optional[str] = None,
+               keep: int = 3, **kwargs):
+        """
+        Short-lived writer that publishes a snapshot when the block finishes cleanly
+        
+        For processes that mostly read from_snapshot() and write occasionally: the live
+        database is locked only for the block, and readers see the writes after their
+        next refresh_snapshot().
+        
+        Args:
+            db_path: Live database (the default database file if None)
+            snapshot_root: Snapshot root readers open (database/snapshots if None)
+            keep: Snapshots retained, as for publish_snapshot()
+            **kwargs: Other DuckDBAnalytics arguments
+        """
+        analytics = cls(db_path, **kwargs)
+        try:
+            yield analytics
+            analytics.publish_snapshot(snapshot_root, keep=keep)
+        finally:
+            analytics.close()
+    
+    def refresh_snapshot(self) -> bool:
+        """
+        Switch a from_snapshot() instance to a newer snapshot if one was published
+        
+        Returns:
+            True if the connection moved to a new snapshot
+        """
+        if self.snapshot_root is None:
+            return False
+        latest = SnapshotPublisher(self.snapshot_root).current()
+        if latest is None or str(latest) == self.db_path:
+            return False
+        
+        with self._write_lock:
+            self.read_pool.close()
+            self.conn.close()
+            self.db_path = str(latest)
+            self._connect()
+            if self.lake is not None:
+                self.lake.attach_views(self.conn)
+            self.invalidate_cache()
+        logger.info(f"Switched to snapshot {latest}")
+        return True
+    
+    def _partition_filter(self, symbols: Optional[List[str]] = None,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> Tuple[str, List]:
+        """' AND ...' hive-partition predicates and their params in lake mode, empty otherwise"""
+        if self.lake is None:
+            return "", []
+        conditions, params = self.lake.partition_filter(symbols, start_date, end_date)
+        return "".join(f" AND {condition}" for condition in conditions), params
+    
+    def _query(self, sql: str, params: Optional[Sequence] = None, fetch: str = 'df') -> Any:
+        """
+        Run a read query through the result cache
+        
+        Args:
+            sql: Query text
+            params: Bound parameters
+            fetch: Result method of the DuckDB cursor ('df', 'fetchall', 'fetchnumpy'),
+                or 'arrow' for a pyarrow Table
+        """
+        def run():
+            with self.read_pool.connection() as cursor:
+                start = time.perf_counter()
+                result = cursor.execute(sql, params or [])
+                if fetch == 'arrow':
+                    # to_arrow_table() supersedes fetch_arrow_table() in newer DuckDB releases
+                    value = (getattr(result, 'to_arrow_table', None) or result.fetch_arrow_table)()
+                else:
+                    value = getattr(result, fetch)()
+                if self.profiler is not None:
+                    self._record_query(cursor, sql, params, value, (time.perf_counter() - start) * 1000)
+                return value
+        
+        if self.query_cache is None:
+            return run()
+        return self.query_cache.get_or_compute(sql, params, run, variant=fetch)
+    
+    def _record_query(self, cursor: duckdb.DuckDBPyConnection, sql: str,
+                      params: Optional[Sequence], value: Any, elapsed_ms: float):
+        """Report a finished query to the profiler, capturing its plan if it was slow"""
+        metrics = scan_metrics(cursor)
+        plan = None
+        if self.profiler.is_slow(elapsed_ms):
+            try:
+                rows = cursor.execute(f"EXPLAIN ANALYZE {sql}", params or []).fetchall()
+                plan = '\n'.join(str(row[-1]) for row in rows)
+            except duckdb.Error as e:
+                plan = f"EXPLAIN ANALYZE failed: {e}"
+        self.profiler.record_query(sql, params, elapsed_ms, result_rows(value), result_size(value),
+                                   plan=plan, **metrics)
+    
+    def get_query_stats(self) -> Dict:
+        """Snapshot of method timings, query metrics and slow-query plans ({} if not profiling)"""
+        return self.profiler.snapshot() if self.profiler is not None else {}
+    
+    def _setup_reader(self, cursor: duckdb.DuckDBPyConnection):
+        """Temp views are connection-local, so every pooled cursor attaches the lake itself"""
+        if self.lake is not None:
+            self.lake.attach_views(cursor)
+        if self.profiler is not None:
+            enable_profiling(cursor)
+    
+    def invalidate_cache(self, *tables: str):
+        """Mark tables as written (all cached results if none are given)"""
+        if self.query_cache is None:
+            return
+        if tables:
+            self.query_cache.bump(*tables)
+        else:
+            self.query_cache.clear()
+    
+    def cache_stats(self) -> Dict[str, float]:
+        """Hit-rate statistics of the query result cache"""
+        return self.query_cache.stats() if self.query_cache is not None else {}
     
     def _initialize_db(self):
         """Create necessary tables if they don't exist"""
@@ -42,6 +311,7 @@ class DuckDBAnalytics:
                 adj_close FLOAT
             )
         """)
+        self._create_market_data_key()
         
         # Fundamentals table
         self.conn.execute("""
@@ -102,25 +372,352 @@ class DuckDBAnalytics:
             )
         """)
         
+        # Sector classification and factor loadings (exposure aggregation, sector reports)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS symbol_sectors (
+                symbol VARCHAR PRIMARY KEY,
+                sector VARCHAR,
+                industry VARCHAR
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS factor_loadings (
+                symbol VARCHAR,
+                factor VARCHAR,
+                loading DOUBLE,
+                PRIMARY KEY (symbol, factor)
+            )
+        """)
+        
+        self._create_derived_tables()
+        
         logger.info("DuckDB tables initialized")
     
-    def insert_market_data(self, df: pd.DataFrame):
-        """Insert market data into DuckDB"""
-        self.conn.register('temp_market_data', df)
+    def _create_derived_tables(self):
+        """Tables maintained incrementally from market_data on every insert"""
+        
+        # Daily close-to-close returns (ret is NULL on a symbol's first day)
         self.conn.execute("""
-            INSERT INTO market_data 
-            SELECT * FROM temp_market_data
-            WHERE NOT EXISTS (
-                SELECT 1 FROM market_data md
-                WHERE md.date = temp_market_data.date 
-                AND md.symbol = temp_market_data.symbol
+            CREATE TABLE IF NOT EXISTS daily_returns (
+                symbol VARCHAR,
+                date DATE,
+                close FLOAT,
+                ret DOUBLE
             )
         """)
-        self.conn.unregister('temp_market_data')
-        logger.info(f"Inserted {len(df)} rows of market data")
+        
+        # Latest close per symbol
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS latest_prices (
+                symbol VARCHAR PRIMARY KEY,
+                date DATE,
+                close FLOAT
+            )
+        """)
+        
+        # Trailing returns and daily-return volatility over the last N trading days, plus
+        # the start, range and length of that window (shorter histories use what exists)
+        stats = ',\n'.join(
+            f"""return_{n} DOUBLE, volatility_{n} DOUBLE, start_date_{n} DATE,
+                start_price_{n} FLOAT, high_{n} FLOAT, low_{n} FLOAT, days_{n} INTEGER"""
+            for n in ROLLING_WINDOWS
+        )
+        columns = {row[0] for row in self.conn.execute("""
+            SELECT column_name FROM information_schema.columns WHERE table_name = 'rolling_stats'
+        """).fetchall()}
+        if columns and f'days_{max(ROLLING_WINDOWS)}' not in columns:
+            # Older layout; the empty table makes _derived_tables_stale() trigger a rebuild
+            self.conn.execute("DROP TABLE rolling_stats")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS rolling_stats (
+                symbol VARCHAR PRIMARY KEY,
+                date DATE,
+                close FLOAT,
+                {stats}
+            )
+        """)
+        
+        # Symbols written with refresh_derived=False, awaiting refresh_derived_tables()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_refresh (
+                symbol VARCHAR PRIMARY KEY,
+                from_date TIMESTAMP
+            )
+        """)
+    
+    def _refresh_derived_tables(self, keys: pd.DataFrame):
+        """
+        Recompute derived rows for the given symbols from their earliest changed date
+        
+        Args:
+            keys: DataFrame with symbol and from_date (earliest written date per symbol)
+        """
+        if keys.empty:
+            return
+        self.conn.register('refresh_keys', keys)
+        try:
+            self.conn.execute("""
+                DELETE FROM daily_returns
+                USING refresh_keys k
+                WHERE daily_returns.symbol = k.symbol AND daily_returns.date >= k.from_date
+            """)
+            # The last kept row per symbol seeds LAG for the first recomputed day
+            self.conn.execute("""
+                INSERT INTO daily_returns
+                WITH seed AS (
+                    SELECT d.symbol, MAX(d.date) AS date, arg_max(d.close, d.date) AS close
+                    FROM daily_returns d
+                    JOIN refresh_keys k ON d.symbol = k.symbol AND d.date < k.from_date
+                    WHERE d.date >= k.from_date - INTERVAL (?) DAY
+                    GROUP BY d.symbol
+                ),
+                fresh AS (
+                    SELECT m.symbol, m.date, m.close
+                    FROM market_data m
+                    JOIN refresh_keys k ON m.symbol = k.symbol AND m.date >= k.from_date
+                ),
+                combined AS (
+                    SELECT symbol, date, close,
+                           close / LAG(close) OVER (PARTITION BY symbol ORDER BY date) - 1 AS ret
+                    FROM (SELECT * FROM seed UNION ALL SELECT * FROM fresh)
+                )
+                SELECT c.symbol, c.date, c.close, c.ret
+                FROM combined c
+                JOIN refresh_keys k ON c.symbol = k.symbol AND c.date >= k.from_date
+            """, [DERIVED_LOOKBACK_DAYS])
+            
+            # Every refreshed symbol has a row at from_date, so its latest row is at or after it
+            self.conn.execute("""
+                INSERT OR REPLACE INTO latest_prices
+                SELECT d.symbol, MAX(d.date), arg_max(d.close, d.date)
+                FROM daily_returns d
+                JOIN refresh_keys k ON d.symbol = k.symbol AND d.date >= k.from_date
+                GROUP BY d.symbol
+            """)
+            
+            longest = max(ROLLING_WINDOWS)
+            stats = ',\n'.join(
+                f"""MAX(close) FILTER (WHERE rn = 1) / MAX(close) FILTER (WHERE rn = {n + 1}) - 1,
+                    STDDEV_SAMP(ret) FILTER (WHERE rn <= {n}),
+                    MIN(date) FILTER (WHERE rn <= {n + 1}),
+                    arg_min(close, date) FILTER (WHERE rn <= {n + 1}),
+                    MAX(close) FILTER (WHERE rn <= {n + 1}),
+                    MIN(close) FILTER (WHERE rn <= {n + 1}),
+                    COUNT(*) FILTER (WHERE rn <= {n + 1})"""
+                for n in ROLLING_WINDOWS
+            )
+            self.conn.execute(f"""
+                INSERT OR REPLACE INTO rolling_stats
+                WITH recent AS (
+                    SELECT d.symbol, d.date, d.close, d.ret,
+                           ROW_NUMBER() OVER (PARTITION BY d.symbol ORDER BY d.date DESC) AS rn
+                    FROM daily_returns d
+                    JOIN refresh_keys k ON d.symbol = k.symbol
+                    WHERE d.date >= k.from_date - INTERVAL (?) DAY
+                    QUALIFY rn <= {longest + 1}
+                )
+                SELECT symbol, MAX(date), arg_max(close, date),
+                       {stats}
+                FROM recent
+                GROUP BY symbol
+            """, [DERIVED_LOOKBACK_DAYS])
+        finally:
+            self.conn.unregister('refresh_keys')
+    
+    def _derived_tables_stale(self) -> bool:
+        """Derived tables are empty while market_data is not (new database, lake or layout)"""
+        return self.conn.execute("""
+            SELECT NOT EXISTS (SELECT 1 FROM rolling_stats)
+               AND EXISTS (SELECT 1 FROM market_data)
+        """).fetchone()[0]
+    
+    def _queue_refresh(self, keys: pd.DataFrame):
+        """Record symbols whose derived rows are out of date, keeping the earliest date"""
+        self.conn.register('refresh_keys', keys)
+        try:
+            self.conn.execute("""
+                INSERT INTO pending_refresh
+                SELECT symbol, from_date FROM refresh_keys
+                ON CONFLICT (symbol) DO UPDATE
+                SET from_date = LEAST(pending_refresh.from_date, excluded.from_date)
+            """)
+        finally:
+            self.conn.unregister('refresh_keys')
+    
+    @_profiled
+    @_serialized
+    def refresh_derived_tables(self) -> int:
+        """
+        Bring derived tables up to date after writes made with refresh_derived=False
+        
+        Every queued symbol is recomputed in one pass from its earliest written date.
+        
+        Returns:
+            Number of symbols refreshed
+        """
+        keys = self.conn.execute("SELECT symbol, from_date FROM pending_refresh").df()
+        if keys.empty:
+            return 0
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            self._refresh_derived_tables(keys)
+            self.conn.execute("DELETE FROM pending_refresh")
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.invalidate_cache(*DERIVED_TABLES)
+        logger.info(f"Refreshed derived tables for {len(keys)} symbols")
+        return len(keys)
+    
+    @staticmethod
+    def _refresh_keys(df: pd.DataFrame) -> pd.DataFrame:
+        """Earliest date per symbol in a market data batch"""
+        dates = pd.to_datetime(df['date']).dt.normalize()
+        keys = dates.groupby(df['symbol'].to_numpy()).min()
+        return pd.DataFrame({'symbol': keys.index.astype(str), 'from_date': keys.to_numpy()})
+    
+    @_profiled
+    @_serialized
+    def rebuild_derived_tables(self):
+        """Recompute daily_returns, latest_prices and rolling_stats from scratch"""
+        for table in DERIVED_TABLES + ('pending_refresh',):
+            self.conn.execute(f"DELETE FROM {table}")
+        keys = self.conn.execute("""
+            SELECT symbol, MIN(date)::TIMESTAMP AS from_date FROM market_data GROUP BY symbol
+        """).df()
+        self._refresh_derived_tables(keys)
+        self.invalidate_cache(*DERIVED_TABLES)
+        logger.info(f"Rebuilt derived tables for {len(keys)} symbols")
+    
+    def _create_market_data_key(self):
+        """Unique (symbol, date) index backing upserts; tables from older versions may lack it"""
+        if not self.keyed_market_data:
+            return
+        try:
+            self.conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS market_data_symbol_date_idx
+                ON market_data (symbol, date)
+            """)
+            self.has_market_data_key = True
+        except duckdb.Error as e:
+            # Pre-existing duplicate rows; upserts fall back to delete + insert
+            logger.warning(f"Could not create (symbol, date) index on market_data: {e}")
+            self.has_market_data_key = False
+    
+    @staticmethod
+    def _prepare_market_data(df: pd.DataFrame) -> pa.Table:
+        """Schema-ordered, key-deduplicated (last wins), (symbol, date)-sorted Arrow batch"""
+        batch = df.reindex(columns=MARKET_DATA_COLUMNS)
+        batch['date'] = pd.to_datetime(batch['date']).dt.normalize()
+        batch = batch.drop_duplicates(subset=MARKET_DATA_KEY, keep='last')
+        batch = batch.sort_values(MARKET_DATA_KEY, kind='stable')
+        return pa.Table.from_pandas(batch, preserve_index=False)
     
+    @_profiled
+    @_serialized
+    def upsert_market_data(self, df: pd.DataFrame, replace: bool = True,
+                           batch_size: int = 1_000_000, refresh_derived: bool = True) -> int:
+        """
+        Bulk load market data keyed on (symbol, date)
+        
+        Args:
+            df: Rows with MARKET_DATA_COLUMNS (missing columns load as NULL)
+            replace: Overwrite existing (symbol, date) rows; otherwise keep them (anti-join)
+            batch_size: Rows per Arrow batch appended in one statement
+            refresh_derived: Recompute derived tables for the written symbols now; if False
+                they are queued and stay stale until refresh_derived_tables() (or the next
+                open), which keeps multi-batch bulk loads at raw append speed
+            
+        Returns:
+            Number of rows written
+        """
+        if self.lake is not None:
+            write = self.lake.replace if replace else self.lake.append
+            written = write(self.conn, 'market_data', df)
+            # Pooled cursors hold their own copies of the lake views
+            self.read_pool.reset()
+            if written:
+                self._update_derived(self._refresh_keys(df), refresh_derived)
+                self.invalidate_cache('market_data', *DERIVED_TABLES)
+            logger.info(f"Wrote {written} rows of market data to the lake (replace={replace})")
+            return written
+        
+        table = self._prepare_market_data(df)
+        columns = ', '.join(MARKET_DATA_COLUMNS)
+        written = 0
+        
+        self.conn.execute("BEGIN TRANSACTION")
+        try:
+            for offset in range(0, table.num_rows, batch_size):
+                chunk = table.slice(offset, batch_size)
+                self.conn.register('market_data_batch', chunk)
+                try:
+                    # Only rows inside the batch's date span can collide; zonemaps prune the rest
+                    dates = pa.compute.min_max(chunk.column('date'))
+                    span = [dates['min'].as_py(), dates['max'].as_py()]
+                    if not replace:
+                        result = self.conn.execute(f"""
+                            INSERT INTO market_data ({columns})
+                            SELECT {columns} FROM market_data_batch
+                            ANTI JOIN (
+                                SELECT symbol, date FROM market_data
+                                WHERE date BETWEEN ?::DATE AND ?::DATE
+                            ) existing USING (symbol, date)
+                        """, span)
+                    elif self.has_market_data_key:
+                        result = self.conn.execute(f"""
+                            INSERT OR REPLACE INTO market_data ({columns})
+                            SELECT {columns} FROM market_data_batch
+                        """)
+                    else:
+                        self.conn.execute("""
+                            DELETE FROM market_data
+                            WHERE date BETWEEN ?::DATE AND ?::DATE
+                            AND (symbol, date) IN (SELECT (symbol, date) FROM market_data_batch)
+                        """, span)
+                        result = self.conn.execute(f"""
+                            INSERT INTO market_data ({columns})
+                            SELECT {columns} FROM market_data_batch
+                        """)
+                    written += result.fetchone()[0]
+                finally:
+                    self.conn.unregister('market_data_batch')
+            if written:
+                self._update_derived(self._refresh_keys(df), refresh_derived)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        
+        if written:
+            self.invalidate_cache('market_data', *DERIVED_TABLES)
+        logger.info(f"Upserted {written} rows of market data (replace={replace})")
+        return written
+    
+    def _update_derived(self, keys: pd.DataFrame, refresh: bool):
+        """Refresh derived rows for keys now, or queue them for refresh_derived_tables()"""
+        if refresh:
+            self._refresh_derived_tables(keys)
+        else:
+            self._queue_refresh(keys)
+    
+    @_profiled
+    def insert_market_data(self, df: pd.DataFrame, refresh_derived: bool = True) -> int:
+        """Insert market data into DuckDB, keeping rows that already exist"""
+        return self.upsert_market_data(df, replace=False, refresh_derived=refresh_derived)
+    
+    @_profiled
+    @_serialized
     def insert_fundamentals(self, df: pd.DataFrame):
         """Insert fundamentals into DuckDB"""
+        if self.lake is not None:
+            self.lake.replace(self.conn, 'fundamentals', df)
+            self.read_pool.reset()
+            self.invalidate_cache('fundamentals')
+            logger.info(f"Inserted {len(df)} fundamentals records")
+            return
+        
         self.conn.register('temp_fundamentals', df)
         self.conn.execute("""
             DELETE FROM fundamentals WHERE symbol IN (SELECT DISTINCT symbol FROM temp_fundamentals)
@@ -129,116 +726,537 @@ class DuckDBAnalytics:
             INSERT INTO fundamentals SELECT * FROM temp_fundamentals
         """)
         self.conn.unregister('temp_fundamentals')
+        self.invalidate_cache('fundamentals')
         logger.info(f"Inserted {len(df)} fundamentals records")
+
+    @_profiled
+    @_serialized
+    def insert_signals(self, df: pd.DataFrame) -> int:
+        """
+        Append signal history (e.g. rows flushed by a SignalStore)
+
+        Args:
+            df: Rows with SIGNAL_COLUMNS; missing columns load as NULL, extra ones are ignored
+
+        Returns:
+            Number of rows written
+        """
+        if df.empty:
+            return 0
+        batch = df.reindex(columns=SIGNAL_COLUMNS)
+        batch['date'] = pd.to_datetime(batch['date']).dt.date
+        if self.lake is not None:
+            written = self.lake.append(self.conn, 'signals', batch)
+            self.read_pool.reset()
+        else:
+            self.conn.register('signals_batch', batch)
+            try:
+                columns = ', '.join(SIGNAL_COLUMNS)
+                written = self.conn.execute(f"""
+                    INSERT INTO signals ({columns}) SELECT {columns} FROM signals_batch
+                """).fetchone()[0]
+            finally:
+                self.conn.unregister('signals_batch')
+        self.invalidate_cache('signals')
+        logger.info(f"Inserted {written} signals")
+        return written
+
+    @_profiled
+    @_serialized
+    def upsert_symbol_sectors(self, df: pd.DataFrame) -> int:
+        """
+        Insert or replace sector classifications
+        
+        Args:
+            df: Columns symbol, sector and optionally industry
+            
+        Returns:
+            Number of symbols written
+        """
+        if df.empty:
+            return 0
+        batch = df.reindex(columns=SECTOR_COLUMNS)
+        self.conn.register('sectors_batch', batch)
+        try:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO symbol_sectors
+                SELECT symbol, sector, industry FROM sectors_batch
+            """)
+        finally:
+            self.conn.unregister('sectors_batch')
+        self.invalidate_cache('symbol_sectors')
+        logger.info(f"Upserted sectors of {len(batch)} symbols")
+        return len(batch)
+    
+    @_profiled
+    @_serialized
+    def upsert_factor_loadings(self, df: pd.DataFrame) -> int:
+        """
+        Insert or replace factor loadings
+        
+        Args:
+            df: Long rows of symbol, factor, loading, or a wide (symbol x factor) frame
+                indexed by symbol
+            
+        Returns:
+            Number of (symbol, factor) loadings written
+        """
+        if not {'symbol', 'factor', 'loading'} <= set(df.columns):
+            df = df.rename_axis(index='symbol', columns='factor').stack().rename('loading').reset_index()
+        batch = df[['symbol', 'factor', 'loading']]
+        if batch.empty:
+            return 0
+        self.conn.register('loadings_batch', batch)
+        try:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO factor_loadings
+                SELECT symbol, factor, loading FROM loadings_batch
+            """)
+        finally:
+            self.conn.unregister('loadings_batch')
+        self.invalidate_cache('factor_loadings')
+        logger.info(f"Upserted {len(batch)} factor loadings")
+        return len(batch)
+    
+    @_profiled
+    def get_symbol_sectors(self, symbols: Optional[List[str]] = None) -> Dict[str, str]:
+        """Sector of each classified symbol (all if symbols is None)"""
+        where, params = "", []
+        if symbols is not None:
+            where, params = "WHERE symbol IN (SELECT UNNEST(?::VARCHAR[]))", [list(symbols)]
+        rows = self._query(f"SELECT symbol, sector FROM symbol_sectors {where}", params,
+                           fetch='fetchall')
+        return dict(rows)
+    
+    @_profiled
+    def get_factor_loadings(self, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """(symbol x factor) loadings, 0 where a symbol has no loading on a factor"""
+        where, params = "", []
+        if symbols is not None:
+            where, params = "WHERE symbol IN (SELECT UNNEST(?::VARCHAR[]))", [list(symbols)]
+        rows = self._query(f"SELECT symbol, factor, loading FROM factor_loadings {where}", params)
+        return (rows.pivot(index='symbol', columns='factor', values='loading')
+                .fillna(0.0).rename_axis(index=None, columns=None).sort_index())
+    
+    @_profiled
+    def load_market_data(
+        self,
+        symbols: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        compact: bool = False
+    ) -> pd.DataFrame:
+        """
+        Load OHLCV rows ordered by symbol and date
+        
+        Args:
+            symbols: Symbols to load (all if None)
+            start_date: Inclusive start date
+            end_date: Inclusive end date
+            compact: float32 prices, categorical symbols and int32 day offsets for dates
+        """
+        where, params = self._market_data_filter(symbols, start_date, end_date)
+        df = self._query(f"""
+            SELECT date, symbol, open, high, low, close, volume, adj_close
+            FROM market_data
+            {where}
+            ORDER BY symbol, date
+        """, params)
+        
+        if compact:
+            df = compact_frame(df)
+        return df
     
-    def get_stock_performance(self, symbol: str, days: int = 252) -> Dict:
-        """Calculate stock performance metrics"""
+    def _market_data_filter(self, symbols: Optional[List[str]] = None,
+                            start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> Tuple[str, List]:
+        """WHERE clause (possibly empty) and params selecting market_data rows"""
+        conditions = []
+        params = []
+        if symbols is not None:
+            conditions.append("symbol IN (SELECT UNNEST(?::VARCHAR[]))")
+            params.append(list(symbols))
+        if start_date is not None:
+            conditions.append("date >= ?::DATE")
+            params.append(str(start_date))
+        if end_date is not None:
+            conditions.append("date <= ?::DATE")
+            params.append(str(end_date))
+        
+        if self.lake is not None:
+            lake_conditions, lake_params = self.lake.partition_filter(symbols, start_date, end_date)
+            conditions += lake_conditions
+            params += lake_params
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+    
+    @_profiled
+    def query(self, sql: str, params: Optional[Sequence] = None) -> pd.DataFrame:
+        """Run a read query through the result cache and read pool"""
+        return self._query(sql, params)
+    
+    @_profiled
+    def query_arrow(self, sql: str, params: Optional[Sequence] = None) -> pa.Table:
+        """Run a read query and return the result as an Arrow table (no pandas conversion)"""
+        return self._query(sql, params, fetch='arrow')
+    
+    @_profiled
+    def query_numpy(self, sql: str, params: Optional[Sequence] = None) -> Dict[str, np.ndarray]:
+        """
+        Run a read query and return its columns as NumPy arrays
+        
+        Primitive columns without nulls are zero-copy, read-only views of the Arrow result;
+        copy them before writing in place.
+        """
+        table = self.query_arrow(sql, params)
+        return {name: arrow_to_numpy(table.column(name)) for name in table.column_names}
+    
+    @_profiled
+    def load_price_panel(
+        self,
+        symbols: Optional[List[str]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        field: str = 'close',
+        dtype=np.float32
+    ) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """
+        Pivot one market_data column into a dates x symbols array
+        
+        Args:
+            symbols: Symbols to load (all if None)
+            start_date: Inclusive start date
+            end_date: Inclusive end date
+            field: Column from PRICE_FIELDS
+            dtype: Panel dtype
+            
+        Returns:
+            (datetime64[D] dates, sorted symbols, panel) with NaN where a symbol has no bar
+        """
+        if field not in PRICE_FIELDS:
+            raise ValueError(f"field must be one of {PRICE_FIELDS}, got {field!r}")
+        
+        where, params = self._market_data_filter(symbols, start_date, end_date)
+        table = self.query_arrow(f"""
+            SELECT date, symbol, {field} AS value
+            FROM market_data
+            {where}
+        """, params)
+        if table.num_rows == 0:
+            return np.empty(0, dtype='datetime64[D]'), [], np.empty((0, 0), dtype=dtype)
+        
+        day_values, date_idx, names, symbol_idx = self._panel_positions(table)
+        panel = np.full((len(day_values), len(names)), np.nan, dtype=dtype)
+        panel[date_idx, symbol_idx] = arrow_to_numpy(table.column('value'))
+        return day_values.astype('datetime64[D]'), names, panel
+    
+    @staticmethod
+    def _panel_positions(table: pa.Table) -> Tuple[np.ndarray, np.ndarray, List[str], np.ndarray]:
+        """
+        Panel coordinates of (date, symbol) rows: (day numbers, date index, sorted symbols,
+        symbol index)
+        
+        Positions come from Arrow directly: day numbers for dates, dictionary codes for
+        symbols; this is several times faster than DENSE_RANK windows in SQL.
+        """
+        days = table.column('date').combine_chunks().cast(pa.int32()).to_numpy()
+        day_values, date_idx = np.unique(days, return_inverse=True)
+        encoded = pa.compute.dictionary_encode(table.column('symbol')).combine_chunks()
+        names = np.array(encoded.dictionary.to_pylist(), dtype=object)
+        order = np.argsort(names)
+        rank = np.empty(len(names), dtype=np.int64)
+        rank[order] = np.arange(len(names))
+        return day_values, date_idx, names[order].tolist(), rank[encoded.indices.to_numpy()]
+    
+    @staticmethod
+    def _days_ago(days: int) -> str:
+        """ISO date `days` calendar days before today"""
+        return str((pd.Timestamp.today().normalize() - pd.Timedelta(days=days)).date())
+    
+    # Columns of get_stock_performance / get_performance_batch
+    PERFORMANCE_COLUMNS = ['symbol', 'start_date', 'end_date', 'start_price', 'end_price',
+                           'return_pct', 'high', 'low', 'trading_days']
+    
+    def _performance_sql(self, symbols: Optional[List[str]], days: int) -> Tuple[str, List]:
+        """One grouped scan computing performance metrics for every requested symbol"""
+        start_date = self._days_ago(days)
+        conditions = ["date >= ?::DATE"]
+        params: List = [start_date]
+        if symbols is not None:
+            conditions.append("symbol IN (SELECT UNNEST(?::VARCHAR[]))")
+            params.append(list(symbols))
+        partitions, partition_params = self._partition_filter(symbols, start_date)
+        # arg_min/arg_max pin the first/last close to the first/last date in each group
         query = f"""
-            SELECT 
+            SELECT
                 symbol,
                 MIN(date) as start_date,
                 MAX(date) as end_date,
-                FIRST(close) as start_price,
-                LAST(close) as end_price,
-                (LAST(close) - FIRST(close)) / FIRST(close) * 100 as return_pct,
+                arg_min(close, date) as start_price,
+                arg_max(close, date) as end_price,
+                (arg_max(close, date) - arg_min(close, date)) / arg_min(close, date) * 100 as return_pct,
                 MAX(close) as high,
                 MIN(close) as low,
                 COUNT(*) as trading_days
             FROM market_data
-            WHERE symbol = '{symbol}'
-            AND date >= CURRENT_DATE - INTERVAL '{days} days'
+            WHERE {' AND '.join(conditions)}{partitions}
             GROUP BY symbol
+            ORDER BY symbol
         """
-        result = self.conn.execute(query).fetchall()
+        return query, params + partition_params
+    
+    @staticmethod
+    def _check_window(window: int):
+        if window not in ROLLING_WINDOWS:
+            raise ValueError(f"window must be one of {ROLLING_WINDOWS}, got {window}")
+    
+    def _rolling_performance_sql(self, symbols: Optional[List[str]],
+                                 window: int) -> Tuple[str, List]:
+        """Performance metrics over the last window trading days, read from rolling_stats"""
+        self._check_window(window)
+        where, params = "", []
+        if symbols is not None:
+            where = "WHERE symbol IN (SELECT UNNEST(?::VARCHAR[]))"
+            params.append(list(symbols))
+        query = f"""
+            SELECT
+                symbol,
+                start_date_{window} as start_date,
+                date as end_date,
+                start_price_{window} as start_price,
+                close as end_price,
+                (close - start_price_{window}) / start_price_{window} * 100 as return_pct,
+                high_{window} as high,
+                low_{window} as low,
+                days_{window} as trading_days
+            FROM rolling_stats
+            {where}
+            ORDER BY symbol
+        """
+        return query, params
+    
+    @_profiled
+    def get_stock_performance(self, symbol: str, days: Optional[int] = None,
+                              window: int = 252) -> Dict:
+        """
+        Calculate stock performance metrics
+        
+        Args:
+            symbol: Ticker
+            days: Calendar-day lookback scanned from market_data
+            window: Trading-day window from ROLLING_WINDOWS, read from rolling_stats when
+                days is None
+        """
+        if days is None:
+            query, params = self._rolling_performance_sql([symbol], window)
+        else:
+            query, params = self._performance_sql([symbol], days)
+        result = self._query(query, params, fetch='fetchall')
         
         if result:
-            cols = ['symbol', 'start_date', 'end_date', 'start_price', 'end_price', 'return_pct', 'high', 'low', 'trading_days']
-            return dict(zip(cols, result[0]))
+            return dict(zip(self.PERFORMANCE_COLUMNS, result[0]))
         return {}
     
-    def get_correlation_matrix(self, symbols: List[str], days: int = 252) -> pd.DataFrame:
-        """Calculate correlation matrix for symbols"""
-        placeholders = ','.join([f"'{s}'" for s in symbols])
+    @_profiled
+    def get_performance_batch(self, symbols: Optional[List[str]] = None,
+                              days: Optional[int] = None, window: int = 252) -> pd.DataFrame:
+        """
+        Performance metrics for many symbols from a single query
         
-        query = f"""
-            SELECT 
-                date,
-                symbol,
-                close
-            FROM market_data
-            WHERE symbol IN ({placeholders})
-            AND date >= CURRENT_DATE - INTERVAL '{days} days'
-            ORDER BY date, symbol
+        Args:
+            symbols: Symbols to include (every symbol in market_data if None)
+            days: Calendar-day lookback scanned from market_data
+            window: Trading-day window from ROLLING_WINDOWS, read from rolling_stats when
+                days is None
+            
+        Returns:
+            One row per symbol with data, columns as get_stock_performance's keys
+        """
+        if days is None:
+            query, params = self._rolling_performance_sql(symbols, window)
+        else:
+            query, params = self._performance_sql(symbols, days)
+        return self._query(query, params)
+    
+    def _returns_panel(self, symbols: Optional[List[str]], days: int) -> Tuple[List[str], np.ndarray]:
+        """
+        Daily close-to-close returns computed in DuckDB, as (symbols, dates x symbols array)
+        
+        Rows are placed like load_price_panel's, so no string pivot happens in Python.
         """
+        conditions = ["date >= ?::DATE"]
+        params: List = [self._days_ago(days)]
+        if symbols is not None:
+            conditions.append("symbol IN (SELECT UNNEST(?::VARCHAR[]))")
+            params.append(list(symbols))
+        partitions, partition_params = self._partition_filter(symbols, self._days_ago(days))
+        where = ' AND '.join(conditions) + partitions
+        params += partition_params
         
-        df = self.conn.execute(query).df()
-        pivot_df = df.pivot(index='date', columns='symbol', values='close')
+        table = self.query_arrow(f"""
+            SELECT date, symbol, ret
+            FROM (
+                SELECT
+                    date,
+                    symbol,
+                    close / LAG(close) OVER (PARTITION BY symbol ORDER BY date) - 1 AS ret
+                FROM market_data
+                WHERE {where}
+            )
+            WHERE ret IS NOT NULL
+        """, params)
+        
+        if table.num_rows == 0:
+            return [], np.empty((0, 0), dtype=np.float32)
         
-        # Calculate returns
-        returns = pivot_df.pct_change().dropna()
+        day_values, date_idx, names, symbol_idx = self._panel_positions(table)
+        panel = np.full((len(day_values), len(names)), np.nan, dtype=np.float32)
+        panel[date_idx, symbol_idx] = arrow_to_numpy(table.column('ret'))
+        return names, panel
+    
+    @_profiled
+    def get_correlation_matrix(
+        self,
+        symbols: Optional[List[str]] = None,
+        days: int = 252,
+        halflife: Optional[float] = None,
+        block_size: int = 512
+    ) -> pd.DataFrame:
+        """
+        Calculate correlation matrix of daily returns
         
-        # Calculate correlation
-        correlation = returns.corr()
-        return correlation
+        Args:
+            symbols: Symbols to include (whole table if None)
+            days: Calendar-day lookback
+            halflife: EWMA half-life in trading days (equal weights if None)
+            block_size: Symbols per tile of the blockwise matrix product
+            
+        Returns:
+            float32 symbol x symbol correlation matrix; pairs of symbols with ragged
+            histories are correlated over the days both have returns
+        """
+        labels, returns = self._returns_panel(symbols, days)
+        correlation = blockwise_correlation(returns, block_size=block_size, halflife=halflife)
+        return pd.DataFrame(correlation, index=labels, columns=labels)
     
-    def get_momentum_screen(self, min_return: float = 0.05, days: int = 60) -> pd.DataFrame:
-        """Find stocks with positive momentum"""
+    @_profiled
+    def get_momentum_screen(self, min_return: float = 0.05, days: Optional[int] = None,
+                            window: int = 60) -> pd.DataFrame:
+        """
+        Find stocks with positive momentum
+        
+        Args:
+            min_return: Minimum return in percent
+            days: Calendar-day lookback scanned from market_data
+            window: Trading-day window from ROLLING_WINDOWS, read from rolling_stats when
+                days is None (symbols with a shorter history are left out)
+        """
+        if days is None:
+            self._check_window(window)
+            return self._query(f"""
+                SELECT
+                    symbol,
+                    start_price_{window} as start_price,
+                    close as end_price,
+                    return_{window} * 100 as return_pct,
+                    days_{window} as trading_days,
+                    volatility_{window} as volatility
+                FROM rolling_stats
+                WHERE return_{window} > ?
+                ORDER BY return_pct DESC
+            """, [min_return / 100])
+        
+        performance, params = self._performance_sql(None, days)
         query = f"""
-            SELECT 
-                symbol,
-                FIRST(close) as start_price,
-                LAST(close) as end_price,
-                (LAST(close) - FIRST(close)) / FIRST(close) * 100 as return_pct,
-                COUNT(*) as trading_days
-            FROM market_data
-            WHERE date >= CURRENT_DATE - INTERVAL '{days} days'
-            GROUP BY symbol
-            HAVING (LAST(close) - FIRST(close)) / FIRST(close) > {min_return / 100}
+            SELECT symbol, start_price, end_price, return_pct, trading_days
+            FROM ({performance})
+            WHERE return_pct > ?
             ORDER BY return_pct DESC
         """
         
-        return self.conn.execute(query).df()
+        return self._query(query, params + [min_return])
     
+    @_profiled
     def get_value_screen(self, max_pe: float = 15.0) -> pd.DataFrame:
         """Find value stocks based on P/E ratio"""
-        query = f"""
+        query = """
             SELECT 
                 f.symbol,
                 f.pe_ratio,
-                f.pb_ratio,
-                f.roe,
+                r.pb_ratio,
+                r.roe,
                 f.market_cap,
-                m.close as current_price
+                p.close as current_price
             FROM fundamentals f
-            LEFT JOIN market_data m 
-                ON f.symbol = m.symbol 
-                AND m.date = (SELECT MAX(date) FROM market_data WHERE symbol = f.symbol)
-            WHERE f.pe_ratio < {max_pe}
+            LEFT JOIN latest_prices p ON f.symbol = p.symbol
+            LEFT JOIN (
+                SELECT symbol, arg_max(pb_ratio, date) AS pb_ratio, arg_max(roe, date) AS roe
+                FROM financial_ratios
+                GROUP BY symbol
+            ) r ON f.symbol = r.symbol
+            WHERE f.pe_ratio < ?
             AND f.pe_ratio > 0
             ORDER BY f.pe_ratio ASC
         """
         
-        return self.conn.execute(query).df()
+        return self._query(query, [max_pe])
+    
+    @_profiled
+    def get_multifactor_screen(self, factors: List[Factor], top_n: Optional[int] = 50,
+                               **kwargs) -> pd.DataFrame:
+        """
+        Composite cross-sectional screen computed in one query
+        
+        Args:
+            factors: Factor definitions (see analytics.screening for presets)
+            top_n: Best symbols returned (all if None)
+            **kwargs: filters, symbols and method, as for ScreeningEngine.screen
+        """
+        return ScreeningEngine(self).screen(factors, top_n=top_n, **kwargs)
+    
+    @_profiled
+    def get_pairs_scan(self, symbols: Optional[List[str]] = None, **kwargs) -> pd.DataFrame:
+        """
+        Engle-Granger cointegration scan of correlation-pruned symbol pairs
+        
+        Args:
+            symbols: Universe to pair up (all symbols if None)
+            **kwargs: PairsScanner settings (days, min_correlation, max_pairs, n_workers, ...)
+        """
+        return PairsScanner(self, **kwargs).scan(symbols)
+    
+    @_profiled
+    def get_rolling_stats(self, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Latest trailing returns and volatilities per symbol from rolling_stats"""
+        if symbols is None:
+            return self._query("SELECT * FROM rolling_stats ORDER BY symbol")
+        return self._query("""
+            SELECT * FROM rolling_stats
+            WHERE symbol IN (SELECT UNNEST(?::VARCHAR[]))
+            ORDER BY symbol
+        """, [list(symbols)])
     
+    @_profiled
     def get_portfolio_stats(self, trades_df: pd.DataFrame) -> Dict:
         """Calculate portfolio statistics"""
-        self.conn.register('temp_trades', trades_df)
-        
-        stats = self.conn.execute("""
-            SELECT
-                COUNT(*) as total_trades,
-                SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) as winning_trades,
-                SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END) as losing_trades,
-                SUM(pnl) as total_pnl,
-                AVG(pnl) as avg_pnl,
-                SUM(pnl) / COUNT(*) * STDDEV(pnl) as sharpe_ratio,
-                MAX(pnl) as max_win,
-                MIN(pnl) as max_loss,
-                AVG(return_pct) as avg_return_pct
-            FROM temp_trades
-        """).fetchall()
-        
-        self.conn.unregister('temp_trades')
+        # Registrations are connection-local, so parallel callers do not collide
+        with self.read_pool.connection() as cursor:
+            cursor.register('temp_trades', trades_df)
+            stats = cursor.execute("""
+                SELECT
+                    COUNT(*) as total_trades,
+                    SUM(CASE WHEN pnl > 0 THEN 1 ELSE 0 END) as winning_trades,
+                    SUM(CASE WHEN pnl < 0 THEN 1 ELSE 0 END) as losing_trades,
+                    SUM(pnl) as total_pnl,
+                    AVG(pnl) as avg_pnl,
+                    SUM(pnl) / COUNT(*) * STDDEV(pnl) as sharpe_ratio,
+                    MAX(pnl) as max_win,
+                    MIN(pnl) as max_loss,
+                    AVG(return_pct) as avg_return_pct
+                FROM temp_trades
+            """).fetchall()
+            cursor.unregister('temp_trades')
         
         if stats and stats[0]:
             cols = ['total_trades', 'winning_trades', 'losing_trades', 'total_pnl', 
@@ -246,13 +1264,40 @@ class DuckDBAnalytics:
             return dict(zip(cols, stats[0]))
         return {}
     
-    def get_sector_performance(self) -> pd.DataFrame:
-        """Analyze performance by sector (requires sector mapping)"""
-        # This is a placeholder - would need sector classification data
-        pass
+    @_profiled
+    def get_sector_performance(self, days: int = 252) -> pd.DataFrame:
+        """
+        Performance by sector from the symbol_sectors mapping
+        
+        Args:
+            days: Calendar-day lookback of each symbol's return
+            
+        Returns:
+            One row per sector (unclassified symbols under 'Unknown'): symbols,
+            avg/median/best/worst return_pct and the best and worst symbol, best
+            average first
+        """
+        performance, params = self._performance_sql(None, days)
+        return self._query(f"""
+            WITH performance AS ({performance})
+            SELECT
+                COALESCE(s.sector, 'Unknown') AS sector,
+                COUNT(*) AS symbols,
+                AVG(p.return_pct) AS avg_return_pct,
+                MEDIAN(p.return_pct) AS median_return_pct,
+                MAX(p.return_pct) AS best_return_pct,
+                MIN(p.return_pct) AS worst_return_pct,
+                arg_max(p.symbol, p.return_pct) AS best_symbol,
+                arg_min(p.symbol, p.return_pct) AS worst_symbol
+            FROM performance p
+            LEFT JOIN symbol_sectors s ON s.symbol = p.symbol
+            GROUP BY 1
+            ORDER BY avg_return_pct DESC, sector
+        """, params)
     
     def close(self):
-        """Close database connection"""
+        """Close the read pool and the database connection"""
+        self.read_pool.close()
         self.conn.close()
         logger.info("DuckDB connection closed")
     
@@ -0,0 +1,202 @@
+"""
+Query instrumentation for DuckDBAnalytics
+Per-method wall-time histograms plus per-query rows, result size and scan metrics; queries
+slower than a threshold get their EXPLAIN ANALYZE plan captured for later inspection
+"""
+
+import bisect
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import duckdb
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass
+class MethodStats:
+    """Accumulated timings and query metrics of one DuckDBAnalytics method"""
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    queries: int = 0
+    rows_returned: int = 0
+    result_bytes: int = 0
+    rows_scanned: int = 0
+    bytes_read: int = 0
+
+    def percentile(self, q: float) -> float:
+        """Latency percentile (ms) estimated as the upper bound of the bucket holding it"""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (self.max_ms,), self.histogram):
+            seen += count
+            if seen >= target:
+                return float(min(bound, self.max_ms))
+        return self.max_ms
+
+
+def result_rows(value) -> int:
+    """Row count of a DataFrame, Arrow table, fetchall() list or column dict"""
+    if isinstance(value, dict):
+        return len(next(iter(value.values()))) if value else 0
+    if hasattr(value, 'num_rows'):
+        return value.num_rows
+    return len(value)
+
+
+def scan_metrics(cursor: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    """
+    Rows scanned and bytes read by the cursor's last query
+
+    Needs profiling enabled on the cursor (see enable_profiling); DuckDB releases without
+    the JSON profiling metrics report zeros.
+    """
+    try:
+        info = json.loads(cursor.get_profiling_information(format='json'))
+    except (duckdb.Error, AttributeError, TypeError, ValueError):
+        return {'rows_scanned': 0, 'bytes_read': 0}
+    return {'rows_scanned': int(info.get('cumulative_rows_scanned') or 0),
+            'bytes_read': int(info.get('total_bytes_read') or 0)}
+
+
+def enable_profiling(cursor: duckdb.DuckDBPyConnection):
+    """Collect per-query metrics on a connection without printing them"""
+    try:
+        cursor.execute("PRAGMA enable_profiling='no_output'")
+    except duckdb.Error as e:
+        logger.warning(f"Query profiling unavailable: {e}")
+
+
+class QueryProfiler:
+    """Thread-safe collector of method timings, query metrics and slow-query plans"""
+
+    def __init__(self, slow_query_ms: float = 500.0, max_slow_queries: int = 50):
+        """
+        Args:
+            slow_query_ms: Queries at least this slow get an EXPLAIN ANALYZE capture
+                (the query runs a second time for it)
+            max_slow_queries: Most recent slow-query captures kept
+        """
+        self.slow_query_ms = slow_query_ms
+        self._methods: Dict[str, MethodStats] = {}
+        self._slow: "deque[Dict]" = deque(maxlen=max_slow_queries)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _current(self) -> str:
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else '<query>'
+
+    def _stats(self, name: str) -> MethodStats:
+        if name not in self._methods:
+            self._methods[name] = MethodStats()
+        return self._methods[name]
+
+    @contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        """Time a method call; queries run inside it are attributed to it"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # Nested calls (e.g. a screen calling query) are attributed to the outermost method
+        outer = bool(stack)
+        stack.append(stack[-1] if outer else name)
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            stack.pop()
+            if not outer:
+                elapsed = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    stats = self._stats(name)
+                    stats.calls += 1
+                    stats.errors += failed
+                    stats.total_ms += elapsed
+                    stats.max_ms = max(stats.max_ms, elapsed)
+                    stats.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed)] += 1
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return elapsed_ms >= self.slow_query_ms
+
+    def record_query(self, sql: str, params: Optional[Sequence], elapsed_ms: float,
+                     rows: int, result_bytes: int, rows_scanned: int = 0, bytes_read: int = 0,
+                     plan: Optional[str] = None):
+        """Attribute one executed query to the method currently being tracked"""
+        method = self._current()
+        with self._lock:
+            stats = self._stats(method)
+            stats.queries += 1
+            stats.rows_returned += rows
+            stats.result_bytes += result_bytes
+            stats.rows_scanned += rows_scanned
+            stats.bytes_read += bytes_read
+            if plan is not None:
+                self._slow.append({
+                    'method': method,
+                    'sql': ' '.join(sql.split()),
+                    'params': repr(list(params or [])),
+                    'elapsed_ms': elapsed_ms,
+                    'rows': rows,
+                    'rows_scanned': rows_scanned,
+                    'plan': plan,
+                    'captured_at': pd.Timestamp.now().isoformat(),
+                })
+        if plan is not None:
+            logger.warning(f"Slow query in {method}: {elapsed_ms:.0f} ms, {rows} rows")
+
+    def snapshot(self) -> Dict:
+        """
+        Point-in-time copy of all statistics
+
+        Returns:
+            Dict with 'methods' (one record per method, ready for a DataFrame),
+            'slow_queries' (most recent first) and the thresholds in use
+        """
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            methods = []
+            for name, s in sorted(self._methods.items()):
+                methods.append({
+                    'method': name,
+                    'calls': s.calls,
+                    'errors': s.errors,
+                    'mean_ms': s.total_ms / s.calls if s.calls else 0.0,
+                    'p50_ms': s.percentile(0.5),
+                    'p95_ms': s.percentile(0.95),
+                    'max_ms': s.max_ms,
+                    'queries': s.queries,
+                    'rows_returned': s.rows_returned,
+                    'result_bytes': s.result_bytes,
+                    'rows_scanned': s.rows_scanned,
+                    'bytes_read': s.bytes_read,
+                    'histogram': dict(zip(labels, s.histogram)),
+                })
+            slow = list(reversed(self._slow))
+        return {'methods': methods, 'slow_queries': slow,
+                'slow_query_ms': self.slow_query_ms, 'buckets_ms': list(LATENCY_BUCKETS_MS)}
+
+    def reset(self):
+        """Drop all collected statistics"""
+        with self._lock:
+            self._methods.clear()
+            self._slow.clear()
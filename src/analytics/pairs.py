@@ -0,0 +1,201 @@
+"""
+Cross-sectional pairs scanning
+Candidate pairs are pruned with a blockwise return-correlation pass; the survivors get
+Engle-Granger tests in batches: OLS hedge ratios on log prices, then an augmented
+Dickey-Fuller t-statistic and mean-reversion half-life of every spread at once
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .correlation import blockwise_correlation
+
+if TYPE_CHECKING:
+    from .duckdb_analytics import DuckDBAnalytics
+
+logger = logging.getLogger(__name__)
+
+# MacKinnon (2010) asymptotic 5% critical value of the two-variable Engle-Granger test
+# (constant, no trend); the residual ADF statistic must be below it
+EG_CRITICAL_5PCT = -3.34
+
+# Column-centered log prices shared with worker processes (set once per worker)
+_pairs_shared: Optional[Tuple[np.ndarray, int]] = None
+
+
+def engle_granger_batch(prices: np.ndarray, left: np.ndarray, right: np.ndarray,
+                        lags: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Engle-Granger statistics of many pairs
+
+    Args:
+        prices: (n_dates, n_symbols) column-centered log prices without gaps
+        left: Column of each pair's dependent series
+        right: Column of each pair's regressor
+        lags: Lagged differences in the ADF regression
+
+    Returns:
+        Arrays (one value per pair) of hedge_ratio, adf_stat, half_life and zscore
+        (latest spread in spread standard deviations)
+    """
+    y, x = prices[:, left], prices[:, right]
+    # Centered columns: the intercept drops out of the hedge regression
+    hedge = np.einsum('tm,tm->m', x, y) / np.einsum('tm,tm->m', x, x)
+    spread = y - x * hedge
+    delta = np.diff(spread, axis=0)
+    level = spread[:-1]
+
+    # Half-life from the AR(1) fit of spread changes on the lagged level
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = np.einsum('tm,tm->m', level, delta) / np.einsum('tm,tm->m', level, level)
+        half_life = np.where(speed < 0, -np.log(2) / speed, np.inf)
+        zscore = spread[-1] / spread.std(axis=0, ddof=1)
+
+    # ADF regression per pair: delta_t on level_{t-1} and delta_{t-1..t-lags}, no constant
+    target = delta[lags:].T  # (pairs, obs)
+    design = np.stack([level[lags:].T] + [delta[lags - k:len(delta) - k].T
+                                          for k in range(1, lags + 1)], axis=-1)
+    gram = np.einsum('mnk,mnl->mkl', design, design)
+    # Identical (or exactly proportional) series leave a zero spread and a singular system
+    degenerate = np.einsum('mn,mn->m', target, target) <= 1e-20 * len(spread)
+    gram[degenerate] = np.eye(lags + 1)
+    inverse = np.linalg.inv(gram)
+    beta = np.einsum('mkl,ml->mk', inverse, np.einsum('mnl,mn->ml', design, target))
+    residuals = target - np.einsum('mnk,mk->mn', design, beta)
+    dof = max(target.shape[1] - (lags + 1), 1)
+    se = np.sqrt(np.einsum('mn,mn->m', residuals, residuals) / dof * inverse[:, 0, 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        adf = beta[:, 0] / se
+    adf[degenerate] = np.nan
+
+    return {'hedge_ratio': hedge, 'adf_stat': adf, 'half_life': half_life, 'zscore': zscore}
+
+
+def _init_pairs_worker(shared: Optional[Tuple[np.ndarray, int]]):
+    global _pairs_shared
+    _pairs_shared = shared
+
+
+def _pairs_chunk(left: np.ndarray, right: np.ndarray) -> Dict[str, np.ndarray]:
+    """Worker task: Engle-Granger statistics of one chunk of candidate pairs"""
+    prices, lags = _pairs_shared
+    return engle_granger_batch(prices, left, right, lags)
+
+
+class PairsScanner:
+    """Finds cointegrated pairs among the symbols of a DuckDBAnalytics database"""
+
+    def __init__(self, analytics: "DuckDBAnalytics", days: int = 504,
+                 min_correlation: float = 0.7, max_pairs: Optional[int] = None,
+                 lags: int = 1, critical_value: float = EG_CRITICAL_5PCT,
+                 min_coverage: float = 0.95, chunk_size: int = 5000,
+                 n_workers: Optional[int] = None, block_size: int = 512):
+        """
+        Args:
+            analytics: Database whose market_data is scanned
+            days: Calendar-day lookback of the price history
+            min_correlation: Daily-return correlation a pair needs to be tested
+            max_pairs: Test only the most correlated pairs (all survivors if None)
+            lags: Lagged differences in the ADF regression
+            critical_value: ADF statistic below which a pair counts as cointegrated
+            min_coverage: Share of dates a symbol must have bars on (gaps are forward-filled)
+            chunk_size: Pairs tested per batch (bounds memory to ~chunk_size x dates x (lags + 4))
+            n_workers: Spread batches over this many processes (in-process if None or 1)
+            block_size: Symbols per tile of the correlation pass
+        """
+        if max_pairs is not None and max_pairs < 0:
+            raise ValueError(f"max_pairs must be non-negative, got {max_pairs}")
+        self.analytics = analytics
+        self.days = days
+        self.min_correlation = min_correlation
+        self.max_pairs = max_pairs
+        self.lags = lags
+        self.critical_value = critical_value
+        self.min_coverage = min_coverage
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers
+        self.block_size = block_size
+
+    def _log_prices(self, symbols: Optional[List[str]]) -> Tuple[List[str], np.ndarray]:
+        """Gap-filled log closes of the symbols with enough coverage"""
+        _, names, panel = self.analytics.load_price_panel(
+            symbols, start_date=self.analytics._days_ago(self.days), dtype=np.float64)
+        if not names:
+            return [], np.empty((0, 0))
+        covered = np.isfinite(panel).mean(axis=0) >= self.min_coverage
+        frame = pd.DataFrame(np.log(panel[:, covered])).ffill().bfill()
+        return [n for n, keep in zip(names, covered) if keep], frame.to_numpy()
+
+    def candidates(self, log_prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(left, right, correlation) of pairs passing the correlation pre-prune"""
+        correlation = blockwise_correlation(np.diff(log_prices, axis=0), self.block_size)
+        left, right, values = [], [], []
+        # Scan one block of rows at a time so no n x n boolean mask is allocated
+        for start in range(0, len(correlation), self.block_size):
+            rows = correlation[start:start + self.block_size]
+            i, j = np.nonzero(rows >= self.min_correlation)
+            i += start
+            upper = j > i
+            left.append(i[upper])
+            right.append(j[upper])
+            values.append(rows[i[upper] - start, j[upper]])
+        left, right, values = (np.concatenate(a) if a else np.empty(0, dtype=np.int64)
+                               for a in (left, right, values))
+
+        if self.max_pairs is not None and len(values) > self.max_pairs:
+            # argpartition needs 0 <= kth < len(values)
+            keep = (np.argpartition(-values, self.max_pairs - 1)[:self.max_pairs]
+                    if self.max_pairs > 0 else np.empty(0, dtype=np.intp))
+            left, right, values = left[keep], right[keep], values[keep]
+        return left, right, values
+
+    def scan(self, symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Test candidate pairs for cointegration
+
+        Args:
+            symbols: Universe to pair up (all symbols in market_data if None)
+
+        Returns:
+            One row per tested pair (symbol_a regressed on symbol_b, symbol_a < symbol_b)
+            with correlation, hedge_ratio, adf_stat, half_life (days), zscore and
+            cointegrated, most negative adf_stat first
+        """
+        names, log_prices = self._log_prices(symbols)
+        columns = ['symbol_a', 'symbol_b', 'correlation', 'hedge_ratio', 'adf_stat',
+                   'half_life', 'zscore', 'cointegrated']
+        if len(names) < 2 or len(log_prices) < self.lags + 10:
+            return pd.DataFrame(columns=columns)
+
+        left, right, correlation = self.candidates(log_prices)
+        logger.info(f"{len(left)} of {len(names) * (len(names) - 1) // 2} pairs passed "
+                    f"the correlation pre-prune (>= {self.min_correlation})")
+        if len(left) == 0:
+            return pd.DataFrame(columns=columns)
+
+        centered = log_prices - log_prices.mean(axis=0)
+        bounds = range(0, len(left), self.chunk_size)
+        lefts = [left[i:i + self.chunk_size] for i in bounds]
+        rights = [right[i:i + self.chunk_size] for i in bounds]
+        if self.n_workers is not None and self.n_workers > 1:
+            with ProcessPoolExecutor(self.n_workers, initializer=_init_pairs_worker,
+                                     initargs=((centered, self.lags),)) as pool:
+                chunks = list(pool.map(_pairs_chunk, lefts, rights))
+        else:
+            _init_pairs_worker((centered, self.lags))
+            try:
+                chunks = [_pairs_chunk(l, r) for l, r in zip(lefts, rights)]
+            finally:
+                _init_pairs_worker(None)
+
+        labels = np.array(names, dtype=object)
+        result = pd.DataFrame({'symbol_a': labels[left], 'symbol_b': labels[right],
+                               'correlation': correlation})
+        for key in ('hedge_ratio', 'adf_stat', 'half_life', 'zscore'):
+            result[key] = np.concatenate([chunk[key] for chunk in chunks])
+        result['cointegrated'] = result['adf_stat'] < self.critical_value
+        return result.sort_values('adf_stat', na_position='last', ignore_index=True)
@@ -0,0 +1,225 @@
+"""
+Hive-partitioned Parquet storage for DuckDBAnalytics
+Tables are laid out as <root>/<table>/symbol_bucket=<b>/year=<y>/part_<ns>_<uuid>.parquet
+and exposed to DuckDB as views; appends only ever add files to the partitions they touch
+"""
+
+import logging
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+PARTITION_COLUMNS = ['symbol_bucket', 'year']
+
+# Column layout, partition date column and primary key of every lake-backed table
+LAKE_TABLES: Dict[str, Dict] = {
+    'market_data': {
+        'columns': [('date', 'DATE'), ('symbol', 'VARCHAR'), ('open', 'FLOAT'),
+                    ('high', 'FLOAT'), ('low', 'FLOAT'), ('close', 'FLOAT'),
+                    ('volume', 'INTEGER'), ('adj_close', 'FLOAT')],
+        'date_column': 'date',
+        'key': ['symbol', 'date'],
+    },
+    'fundamentals': {
+        'columns': [('symbol', 'VARCHAR'), ('market_cap', 'BIGINT'), ('pe_ratio', 'FLOAT'),
+                    ('dividend_yield', 'FLOAT'), ('fifty_two_week_high', 'FLOAT'),
+                    ('fifty_two_week_low', 'FLOAT'), ('beta', 'FLOAT'),
+                    ('book_value', 'FLOAT'), ('updated_date', 'DATE')],
+        'date_column': 'updated_date',
+        'key': ['symbol'],
+    },
+    'signals': {
+        'columns': [('date', 'DATE'), ('symbol', 'VARCHAR'), ('signal_type', 'VARCHAR'),
+                    ('strength', 'FLOAT'), ('entry_price', 'FLOAT'), ('stop_loss', 'FLOAT'),
+                    ('take_profit', 'FLOAT')],
+        'date_column': 'date',
+        'key': None,
+    },
+    'trades': {
+        'columns': [('trade_id', 'INTEGER'), ('symbol', 'VARCHAR'), ('entry_date', 'DATE'),
+                    ('exit_date', 'DATE'), ('entry_price', 'FLOAT'), ('exit_price', 'FLOAT'),
+                    ('quantity', 'INTEGER'), ('pnl', 'FLOAT'), ('return_pct', 'FLOAT'),
+                    ('signal_type', 'VARCHAR')],
+        'date_column': 'entry_date',
+        'key': ['trade_id'],
+    },
+}
+
+
+def symbol_bucket(symbol: str, n_buckets: int) -> int:
+    """Stable bucket for a symbol (crc32, independent of DuckDB's hash function)"""
+    return zlib.crc32(symbol.encode('utf-8')) % n_buckets
+
+
+class ParquetLake:
+    """Hive-partitioned Parquet tables partitioned by symbol bucket and year"""
+
+    def __init__(self, root: str, n_buckets: int = 16):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.n_buckets = n_buckets
+
+    def table_path(self, table: str) -> Path:
+        return self.root / table
+
+    def files(self, table: str) -> List[Path]:
+        """All Parquet files of a table"""
+        return sorted(self.table_path(table).glob('*/*/*.parquet'))
+
+    def partitions(self, table: str) -> Set[Tuple[int, int]]:
+        """(symbol_bucket, year) pairs that hold data"""
+        found = set()
+        for path in self.files(table):
+            bucket = int(path.parent.parent.name.split('=', 1)[1])
+            year = int(path.parent.name.split('=', 1)[1])
+            found.add((bucket, year))
+        return found
+
+    def view_sql(self, table: str) -> str:
+        """SELECT backing the table's view (typed and empty until the first write)"""
+        columns = LAKE_TABLES[table]['columns']
+        if not self.files(table):
+            typed = ', '.join(f"NULL::{dtype} AS {name}" for name, dtype in columns)
+            partition_cols = ', '.join(f"NULL::BIGINT AS {name}" for name in PARTITION_COLUMNS)
+            return f"SELECT {typed}, {partition_cols} WHERE false"
+
+        glob = (self.table_path(table) / '*' / '*' / '*.parquet').as_posix()
+        return f"SELECT * FROM read_parquet('{glob}', hive_partitioning = true, union_by_name = true)"
+
+    def attach_views(self, conn: duckdb.DuckDBPyConnection, tables: Optional[Iterable[str]] = None):
+        """(Re)create temp views over the lake; they shadow same-named tables in the database file"""
+        for table in tables or LAKE_TABLES:
+            conn.execute(f"CREATE OR REPLACE TEMP VIEW {table} AS {self.view_sql(table)}")
+
+    def partition_filter(self, symbols: Optional[Iterable[str]] = None,
+                         start_date: Optional[str] = None,
+                         end_date: Optional[str] = None) -> Tuple[List[str], List]:
+        """Predicates on the hive columns that let DuckDB skip whole files"""
+        conditions, params = [], []
+        if symbols is not None:
+            # Inlined (ints only): DuckDB prunes hive files on constant IN lists, not subqueries
+            buckets = sorted({symbol_bucket(s, self.n_buckets) for s in symbols}) or [-1]
+            conditions.append(f"symbol_bucket IN ({', '.join(map(str, buckets))})")
+        if start_date is not None:
+            conditions.append("year >= ?")
+            params.append(pd.Timestamp(start_date).year)
+        if end_date is not None:
+            conditions.append("year <= ?")
+            params.append(pd.Timestamp(end_date).year)
+        return conditions, params
+
+    def _with_partition_columns(self, table: str, df: pd.DataFrame) -> pd.DataFrame:
+        spec = LAKE_TABLES[table]
+        batch = df.reindex(columns=[name for name, _ in spec['columns']])
+        batch['symbol_bucket'] = [symbol_bucket(s, self.n_buckets) for s in batch['symbol']]
+        batch['year'] = pd.to_datetime(batch[spec['date_column']]).dt.year.astype('int64')
+        return batch
+
+    def _copy(self, conn: duckdb.DuckDBPyConnection, table: str, relation: str,
+              params: Optional[List] = None):
+        """Write a relation into new files under its partitions"""
+        spec = LAKE_TABLES[table]
+        casts = ', '.join(f"CAST({name} AS {dtype}) AS {name}" for name, dtype in spec['columns'])
+        target = self.table_path(table).as_posix()
+        # The nanosecond prefix orders files by write time; uuid keeps parallel writers apart
+        pattern = f"part_{time.time_ns()}_{{uuid}}"
+        conn.execute(f"""
+            COPY (SELECT {casts}, symbol_bucket, year FROM ({relation}))
+            TO '{target}' (FORMAT PARQUET, PARTITION_BY (symbol_bucket, year),
+                           FILENAME_PATTERN '{pattern}', OVERWRITE_OR_IGNORE true)
+        """, params or [])
+
+    def append(self, conn: duckdb.DuckDBPyConnection, table: str, df: pd.DataFrame) -> int:
+        """
+        Append rows whose key is not in the lake yet; existing files are never rewritten
+
+        Returns:
+            Number of rows written
+        """
+        if df.empty:
+            return 0
+        self.table_path(table).mkdir(parents=True, exist_ok=True)
+        key = LAKE_TABLES[table]['key']
+        batch = self._with_partition_columns(table, df)
+        if key:
+            batch = batch.drop_duplicates(subset=key, keep='last')
+        conn.register('lake_batch', batch)
+        try:
+            relation = "SELECT * FROM lake_batch"
+            if key and self.files(table):
+                # Existing keys are looked up only inside the partitions the batch touches
+                buckets = ', '.join(map(str, sorted(batch['symbol_bucket'].unique())))
+                years = ', '.join(map(str, sorted(batch['year'].unique())))
+                relation = f"""
+                    SELECT b.* FROM lake_batch b
+                    ANTI JOIN (
+                        SELECT {', '.join(key)} FROM {table}
+                        WHERE symbol_bucket IN ({buckets}) AND year IN ({years})
+                    ) existing USING ({', '.join(key)})
+                """
+            written = conn.execute(f"SELECT COUNT(*) FROM ({relation})").fetchone()[0]
+            if written:
+                self._copy(conn, table, relation)
+        finally:
+            conn.unregister('lake_batch')
+
+        self.attach_views(conn, [table])
+        return written
+
+    def replace(self, conn: duckdb.DuckDBPyConnection, table: str, df: pd.DataFrame) -> int:
+        """
+        Upsert rows by key, rewriting only the partitions the batch touches
+
+        Returns:
+            Number of rows written
+        """
+        key = LAKE_TABLES[table]['key']
+        if df.empty:
+            return 0
+        if not key:
+            return self.append(conn, table, df)
+
+        batch = self._with_partition_columns(table, df).drop_duplicates(subset=key, keep='last')
+        self.table_path(table).mkdir(parents=True, exist_ok=True)
+        # A key can only live in one partition for market_data, but fundamentals move
+        # between years as updated_date changes, so stale rows are dropped by symbol bucket
+        buckets = sorted(batch['symbol_bucket'].unique().tolist())
+        stale = [path for path in self.files(table)
+                 if int(path.parent.parent.name.split('=', 1)[1]) in buckets]
+        if LAKE_TABLES[table]['date_column'] == 'date':
+            touched = set(zip(batch['symbol_bucket'], batch['year']))
+            stale = [path for path in stale
+                     if (int(path.parent.parent.name.split('=', 1)[1]),
+                         int(path.parent.name.split('=', 1)[1])) in touched]
+
+        conn.register('lake_batch', batch)
+        try:
+            relation = "SELECT * FROM lake_batch"
+            if stale:
+                files = [path.as_posix() for path in stale]
+                relation = f"""
+                    SELECT * FROM lake_batch
+                    UNION ALL BY NAME
+                    SELECT * FROM (
+                        SELECT * FROM read_parquet(?, hive_partitioning = true, union_by_name = true)
+                        ANTI JOIN lake_batch USING ({', '.join(key)})
+                    )
+                """
+                self._copy(conn, table, relation, [files])
+            else:
+                self._copy(conn, table, relation)
+        finally:
+            conn.unregister('lake_batch')
+
+        # New files are in place before the old ones go, so readers never miss rows
+        for path in stale:
+            path.unlink()
+        self.attach_views(conn, [table])
+        logger.info(f"Rewrote {len(stale)} {table} files with {len(batch)} upserted rows")
+        return len(batch)
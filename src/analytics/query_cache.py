@@ -0,0 +1,242 @@
+"""
+Query result cache for DuckDBAnalytics
+Results are keyed on normalized SQL plus bound parameters and tagged with the write
+versions of the tables the query reads; a write to any of them makes the entry stale
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# In-memory connection that only parses queries, opened per process (forked children
+# must not share their parent's)
+_parser: Optional[Tuple[int, duckdb.DuckDBPyConnection]] = None
+_parser_lock = threading.Lock()
+
+
+def normalize_sql(sql: str) -> str:
+    """Whitespace-collapsed SQL without a trailing semicolon"""
+    return ' '.join(sql.split()).rstrip(';').rstrip()
+
+
+def _base_tables(node: Any, names: set):
+    if isinstance(node, dict):
+        if node.get('type') == 'BASE_TABLE':
+            names.add(node['table_name'].lower())
+        for value in node.values():
+            _base_tables(value, names)
+    elif isinstance(node, list):
+        for value in node:
+            _base_tables(value, names)
+
+
+@functools.lru_cache(maxsize=1024)
+def referenced_tables(sql: str) -> Optional[Tuple[str, ...]]:
+    """
+    Lower-cased table names read by a query, from DuckDB's own parse tree
+
+    Comma joins, subqueries and CTE bodies are all covered (CTE names are listed too and
+    simply never get bumped). None if DuckDB cannot serialize the statement (not a
+    SELECT, or a syntax error).
+    """
+    global _parser
+    with _parser_lock:
+        if _parser is None or _parser[0] != os.getpid():
+            _parser = (os.getpid(), duckdb.connect())
+        tree = json.loads(_parser[1].execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0])
+    if tree.get('error'):
+        return None
+    names: set = set()
+    _base_tables(tree, names)
+    return tuple(sorted(names))
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable stand-in for a bound parameter"""
+    if isinstance(value, (list, tuple, set, frozenset, np.ndarray, pd.Index, pd.Series)):
+        items = sorted(value) if isinstance(value, (set, frozenset)) else list(value)
+        return tuple(_freeze(v) for v in items)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(value))
+    return value
+
+
+def result_size(value: Any) -> int:
+    """
+    Approximate bytes held by a cached result
+
+    Shallow: object columns count their pointers, not the Python objects behind them,
+    which keeps sizing O(columns) rather than a walk over every string.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, (np.ndarray, pa.Table)):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(result_size(v) for v in value.values()) + sys.getsizeof(value)
+    if isinstance(value, list):
+        # fetchall rows: size one row and scale
+        return sys.getsizeof(value) + (len(value) * sys.getsizeof(value[0]) if value else 0)
+    return sys.getsizeof(value)
+
+
+def _copy_on_write() -> bool:
+    """Whether pandas copies shared data before mutating it (always from pandas 3)"""
+    return int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+def _share(value: Any) -> Any:
+    """
+    Caller's handle on a cached result; the cached object itself is never handed out
+
+    DataFrames are shallow copies under copy-on-write (a caller's edits copy first) and
+    deep copies otherwise; arrays come back as read-only views.
+    """
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=not _copy_on_write())
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, dict):
+        return {k: _share(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return list(value)  # rows are tuples
+    return value  # Arrow tables, tuples and scalars are immutable
+
+
+class QueryCache:
+    """Thread-safe LRU of query results with TTL, entry/byte limits and table versions"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 ** 2,
+                 ttl_seconds: Optional[float] = 3600.0):
+        """
+        Args:
+            max_entries: Most results kept
+            max_bytes: Total approximate result size kept; larger single results are not cached
+            ttl_seconds: Age after which a result is recomputed (None to only expire on writes)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Dict[str, int], float, int]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+        self.evictions = 0
+        self.uncached = 0  # queries whose tables could not be determined
+
+    def version(self, table: str) -> int:
+        """Write counter of a table (0 until it is first bumped)"""
+        with self._lock:
+            return self._versions.get(table.lower(), 0)
+
+    def bump(self, *tables: str):
+        """Record a write to tables; cached results that read them become stale"""
+        with self._lock:
+            for table in tables:
+                table = table.lower()
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _drop(self, key: Hashable):
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_or_compute(self, sql: str, params: Optional[Sequence], compute: Callable[[], Any],
+                       tables: Optional[Iterable[str]] = None, variant: str = '') -> Any:
+        """
+        Return the cached result for (sql, params), computing it on a miss
+
+        Callers get their own handle on the result (see _share) and may modify it freely,
+        except for NumPy arrays, which are read-only.
+
+        Args:
+            sql: Query text; whitespace differences do not matter
+            params: Bound parameters
+            compute: Runs the query on a miss
+            tables: Tables the result depends on (parsed from the SQL if None; a query
+                DuckDB cannot parse into tables is run uncached)
+            variant: Distinguishes results of the same query fetched in different forms
+        """
+        normalized = normalize_sql(sql)
+        key = (variant, normalized, _freeze(list(params or [])))
+        depends = tuple(t.lower() for t in tables) if tables is not None else referenced_tables(normalized)
+        if depends is None:
+            with self._lock:
+                self.uncached += 1
+            return compute()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, versions, created, _ = entry
+                if any(self._versions.get(t, 0) != v for t, v in versions.items()):
+                    self.stale += 1
+                    self._drop(key)
+                elif self.ttl_seconds is not None and time.monotonic() - created > self.ttl_seconds:
+                    self.expired += 1
+                    self._drop(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _share(result)
+            self.misses += 1
+            # Versions are read before computing, so a write racing the query leaves it stale
+            versions = {t: self._versions.get(t, 0) for t in depends}
+
+        # Compute outside the lock; a racing thread at worst runs the same query twice
+        result = compute()
+        size = result_size(result)
+        if size > self.max_bytes:
+            return result
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (result, versions, time.monotonic(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return _share(result)
+
+    def clear(self):
+        """Drop all cached results and reset counters (table versions are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.stale = self.expired = self.evictions = self.uncached = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Cache size, hit rate and why misses happened"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'uncached': self.uncached,
+                'hit_rate': self.hits / total if total else 0.0
+            }
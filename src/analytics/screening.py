@@ -0,0 +1,270 @@
+"""
+Multi-factor cross-sectional screening
+Factors are declared as SQL expressions over a per-symbol universe (rolling stats, latest
+fundamentals and ratios, recent liquidity); winsorizing, z-scores, ranks and the composite
+score are computed in one DuckDB query and only the top N rows reach Python
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from .duckdb_analytics import DuckDBAnalytics
+
+logger = logging.getLogger(__name__)
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Columns of the universe relation factor expressions can use
+UNIVERSE_COLUMNS = (
+    'symbol', 'date', 'close',
+    'return_20', 'return_60', 'return_252', 'volatility_20', 'volatility_60', 'volatility_252',
+    'market_cap', 'pe_ratio', 'dividend_yield', 'fifty_two_week_high', 'fifty_two_week_low',
+    'beta', 'book_value',
+    'pb_ratio', 'roe', 'roa', 'debt_equity', 'current_ratio', 'quick_ratio',
+    'avg_dollar_volume',
+)
+
+METHODS = ('zscore', 'rank')
+
+
+@dataclass
+class Factor:
+    """
+    One screening factor
+
+    Attributes:
+        name: Output column name (identifier)
+        expression: SQL expression over UNIVERSE_COLUMNS
+        weight: Weight in the composite score
+        higher_is_better: False for factors such as volatility
+        winsorize: Tail quantile clipped on each side before scoring (None to skip)
+        min_value: Symbols with a lower raw value are excluded
+        max_value: Symbols with a higher raw value are excluded
+    """
+    name: str
+    expression: str
+    weight: float = 1.0
+    higher_is_better: bool = True
+    winsorize: Optional[float] = 0.01
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+
+    def __post_init__(self):
+        if not _IDENTIFIER.match(self.name):
+            raise ValueError(f"Factor name must be an SQL identifier, got {self.name!r}")
+        if self.winsorize is not None and not 0 <= self.winsorize < 0.5:
+            raise ValueError(f"winsorize must be in [0, 0.5), got {self.winsorize}")
+
+
+def momentum(window: int = 252, weight: float = 1.0) -> Factor:
+    """Trailing return over a ROLLING_WINDOWS window"""
+    return Factor(f"momentum_{window}", f"return_{window}", weight)
+
+
+def low_volatility(window: int = 60, weight: float = 1.0) -> Factor:
+    """Daily-return volatility; lower scores better"""
+    return Factor(f"volatility_{window}", f"volatility_{window}", weight, higher_is_better=False)
+
+
+def earnings_yield(weight: float = 1.0) -> Factor:
+    """Inverse P/E from fundamentals; loss-makers are excluded"""
+    return Factor("earnings_yield", "1.0 / NULLIF(pe_ratio, 0)", weight, min_value=0.0)
+
+
+def book_to_price(weight: float = 1.0) -> Factor:
+    """Inverse P/B from the latest financial ratios"""
+    return Factor("book_to_price", "1.0 / NULLIF(pb_ratio, 0)", weight, min_value=0.0)
+
+
+def quality(weight: float = 1.0) -> Factor:
+    """Return on equity from the latest financial ratios"""
+    return Factor("roe", "roe", weight)
+
+
+def liquidity(weight: float = 1.0) -> Factor:
+    """Log average daily dollar volume over the engine's liquidity window"""
+    return Factor("liquidity", "LN(NULLIF(avg_dollar_volume, 0))", weight)
+
+
+class ScreeningEngine:
+    """Builds and runs composite factor screens against a DuckDBAnalytics database"""
+
+    def __init__(self, analytics: "DuckDBAnalytics", liquidity_days: int = 30):
+        """
+        Args:
+            analytics: Database to screen (derived tables must be populated)
+            liquidity_days: Calendar days averaged for avg_dollar_volume
+        """
+        self.analytics = analytics
+        self.liquidity_days = liquidity_days
+
+    def _universe_sql(self, factors: Sequence[Factor], filters: Sequence[str],
+                      symbols: Optional[Sequence[str]]) -> Tuple[str, List]:
+        """Per-symbol relation the factor expressions are evaluated against"""
+        params: List = []
+        text = ' '.join([f.expression for f in factors] + list(filters))
+
+        liquidity_column, liquidity_join = "NULL::DOUBLE AS avg_dollar_volume", ""
+        if 'avg_dollar_volume' in text:
+            latest = self.analytics.query_arrow("SELECT MAX(date) FROM latest_prices").column(0)[0].as_py()
+            start = str((pd.Timestamp(latest) - pd.Timedelta(days=self.liquidity_days)).date()) \
+                if latest is not None else '1970-01-01'
+            partitions, partition_params = self.analytics._partition_filter(start_date=start)
+            # A constant lower bound lets zonemaps (or hive years) skip old market_data
+            liquidity_join = f"""
+                LEFT JOIN (
+                    SELECT symbol, AVG(close * volume) AS avg_dollar_volume
+                    FROM market_data
+                    WHERE date > ?::DATE{partitions}
+                    GROUP BY symbol
+                ) lq ON lq.symbol = r.symbol"""
+            liquidity_column = "lq.avg_dollar_volume"
+            params += [start] + partition_params
+
+        where = ""
+        if symbols is not None:
+            where = "WHERE r.symbol IN (SELECT UNNEST(?::VARCHAR[]))"
+            params.append(list(symbols))
+
+        sql = f"""
+            SELECT
+                r.*,
+                f.market_cap, f.pe_ratio, f.dividend_yield, f.fifty_two_week_high,
+                f.fifty_two_week_low, f.beta, f.book_value,
+                fr.pb_ratio, fr.roe, fr.roa, fr.debt_equity, fr.current_ratio, fr.quick_ratio,
+                {liquidity_column}
+            FROM rolling_stats r
+            LEFT JOIN fundamentals f ON f.symbol = r.symbol
+            LEFT JOIN (
+                SELECT symbol,
+                       arg_max(pb_ratio, date) AS pb_ratio, arg_max(roe, date) AS roe,
+                       arg_max(roa, date) AS roa, arg_max(debt_equity, date) AS debt_equity,
+                       arg_max(current_ratio, date) AS current_ratio,
+                       arg_max(quick_ratio, date) AS quick_ratio
+                FROM financial_ratios
+                GROUP BY symbol
+            ) fr ON fr.symbol = r.symbol{liquidity_join}
+            {where}
+        """
+        return sql, params
+
+    def build_sql(self, factors: Sequence[Factor], top_n: Optional[int] = 50,
+                  filters: Optional[Sequence[str]] = None,
+                  symbols: Optional[Sequence[str]] = None,
+                  method: str = 'zscore') -> Tuple[str, List]:
+        """
+        Single query computing the screen
+
+        Args:
+            factors: Factors to combine
+            top_n: Rows returned, best composite first (all if None)
+            filters: Extra SQL predicates over UNIVERSE_COLUMNS applied before scoring
+            symbols: Restrict the universe (all symbols in rolling_stats if None)
+            method: 'zscore' (weighted mean of z-scores) or 'rank' (weighted mean of
+                percentile ranks)
+
+        Returns:
+            (sql, params)
+        """
+        if not factors:
+            raise ValueError("At least one factor is required")
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        names = [f.name for f in factors]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate factor names: {names}")
+        filters = list(filters or [])
+
+        universe, params = self._universe_sql(factors, filters, symbols)
+
+        # Symbols need every factor; bounds are bound parameters
+        conditions = [f"({f.expression}) IS NOT NULL" for f in factors]
+        conditions += [f"({condition})" for condition in filters]
+        for f in factors:
+            if f.min_value is not None:
+                conditions.append(f"({f.expression}) >= ?")
+                params.append(f.min_value)
+            if f.max_value is not None:
+                conditions.append(f"({f.expression}) <= ?")
+                params.append(f.max_value)
+
+        raw = ', '.join(f"({f.expression})::DOUBLE AS {f.name}" for f in factors)
+
+        quantiles, clipped = [], []
+        for f in factors:
+            if f.winsorize:
+                quantiles.append(f"quantile_cont({f.name}, [?, ?]) AS q_{f.name}")
+                params += [f.winsorize, 1 - f.winsorize]
+                clipped.append(f"LEAST(GREATEST({f.name}, q_{f.name}[1]), q_{f.name}[2]) AS {f.name}")
+            else:
+                clipped.append(f.name)
+        bounds = f"SELECT {', '.join(quantiles)} FROM raw" if quantiles else "SELECT 1 AS no_bounds"
+
+        scores = []
+        for f in factors:
+            sign = '' if f.higher_is_better else '-'
+            order = 'ASC' if f.higher_is_better else 'DESC'
+            scores.append(
+                f"{sign}({f.name} - AVG({f.name}) OVER ()) / NULLIF(STDDEV_SAMP({f.name}) OVER (), 0) "
+                f"AS z_{f.name}"
+            )
+            scores.append(f"PERCENT_RANK() OVER (ORDER BY {f.name} {order}) AS rank_{f.name}")
+
+        prefix = 'z' if method == 'zscore' else 'rank'
+        total_weight = sum(abs(f.weight) for f in factors) or 1.0
+        composite = ' + '.join(f"{f.weight!r} * COALESCE({prefix}_{f.name}, 0)" for f in factors)
+        columns = ', '.join(
+            f"{f.name}, z_{f.name}, rank_{f.name}" for f in factors
+        )
+
+        limit = "LIMIT ?" if top_n is not None else ""
+
+        sql = f"""
+            WITH universe AS ({universe}),
+            raw AS (
+                SELECT symbol, date, close, {raw}
+                FROM universe
+                WHERE {' AND '.join(conditions)}
+            ),
+            bounds AS ({bounds}),
+            clipped AS (
+                SELECT raw.symbol, raw.date, raw.close, {', '.join(clipped)}
+                FROM raw CROSS JOIN bounds
+            ),
+            scored AS (
+                SELECT symbol, date, close, {', '.join(f.name for f in factors)},
+                       {', '.join(scores)}
+                FROM clipped
+            )
+            SELECT
+                symbol, date, close, {columns},
+                ({composite}) / {total_weight!r} AS composite,
+                ROW_NUMBER() OVER (ORDER BY ({composite}) DESC, symbol) AS composite_rank
+            FROM scored
+            ORDER BY composite_rank
+            {limit}
+        """
+        if top_n is not None:
+            params.append(int(top_n))
+        return sql, params
+
+    def screen(self, factors: Sequence[Factor], top_n: Optional[int] = 50,
+               filters: Optional[Sequence[str]] = None,
+               symbols: Optional[Sequence[str]] = None,
+               method: str = 'zscore') -> pd.DataFrame:
+        """
+        Run a composite screen (see build_sql for the arguments)
+
+        Returns:
+            One row per selected symbol with each factor's winsorized value, z-score and
+            percentile rank (1 = best), the composite score and its rank
+        """
+        sql, params = self.build_sql(factors, top_n, filters, symbols, method)
+        result = self.analytics.query(sql, params)
+        logger.info(f"Screened {len(factors)} factors, returned {len(result)} symbols")
+        return result
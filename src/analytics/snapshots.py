@@ -0,0 +1,94 @@
+"""
+Read snapshots of the analytics database
+The writer ingests into its own (staging) database and publishes a full copy under
+<root>/snapshots/; a CURRENT file names the latest one and is swapped atomically, so
+readers open a complete, immutable snapshot read-only and never contend for the write lock
+"""
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_ROOT = Path(__file__).parent.parent.parent / "database" / "snapshots"
+
+
+class SnapshotPublisher:
+    """Publishes and resolves DuckDB snapshots under a root directory"""
+
+    def __init__(self, root: Optional[str] = None, keep: int = 3):
+        """
+        Args:
+            root: Directory holding snapshots/ and the CURRENT pointer
+            keep: Published snapshots retained; older ones are deleted after a publish
+        """
+        self.root = Path(root) if root is not None else DEFAULT_SNAPSHOT_ROOT
+        self.keep = max(keep, 1)
+        self.snapshot_dir = self.root / "snapshots"
+        self.pointer = self.root / "CURRENT"
+
+    def current(self) -> Optional[Path]:
+        """Path of the latest published snapshot (None before the first publish)"""
+        try:
+            name = self.pointer.read_text().strip()
+        except FileNotFoundError:
+            return None
+        path = self.snapshot_dir / name
+        return path if name and path.exists() else None
+
+    def snapshots(self) -> List[Path]:
+        """Published snapshots, oldest first"""
+        return sorted(self.snapshot_dir.glob("snapshot_*.duckdb"))
+
+    def publish(self, conn: duckdb.DuckDBPyConnection) -> Path:
+        """
+        Copy the connection's database into a new snapshot and make it current
+
+        Args:
+            conn: Writer connection; uncommitted changes are not included
+
+        Returns:
+            Path of the published snapshot
+        """
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        name = f"snapshot_{time.time_ns()}.duckdb"
+        staging = self.snapshot_dir / f".{name}.staging"
+        source = conn.execute("SELECT current_database()").fetchone()[0]
+
+        # ATTACH takes no bound parameters
+        target = staging.as_posix().replace("'", "''")
+        conn.execute(f"ATTACH '{target}' AS snapshot_staging")
+        try:
+            conn.execute(f'COPY FROM DATABASE "{source}" TO snapshot_staging')
+        finally:
+            conn.execute("DETACH snapshot_staging")
+
+        # Both renames are atomic: readers see either the old snapshot or the complete new one
+        path = self.snapshot_dir / name
+        os.replace(staging, path)
+        pointer_tmp = self.root / ".CURRENT.tmp"
+        with open(pointer_tmp, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer_tmp, self.pointer)
+        logger.info(f"Published snapshot {path}")
+
+        self._prune(path)
+        return path
+
+    def _prune(self, current: Path):
+        """Delete snapshots beyond the retention count; ones still open elsewhere are kept"""
+        older = [p for p in self.snapshots() if p != current]
+        for path in older[:max(len(older) - (self.keep - 1), 0)]:
+            try:
+                path.unlink()
+                Path(f"{path}.wal").unlink(missing_ok=True)
+            except OSError as e:
+                # Windows refuses to delete files a reader still has open; retry next publish
+                logger.warning(f"Could not remove snapshot {path}: {e}")
@@ -1,4 +1,6 @@
 """Feature Store module"""
 from .features import FeatureStore, FeatureEngineering, TechnicalFeatures, FundamentalFeatures
+from .compact import compact_frame, check_precision, encode_dates, decode_dates
 
-__all__ = ['FeatureStore', 'FeatureEngineering', 'TechnicalFeatures', 'FundamentalFeatures']
+__all__ = ['FeatureStore', 'FeatureEngineering', 'TechnicalFeatures', 'FundamentalFeatures',
+           'compact_frame', 'check_precision', 'encode_dates', 'decode_dates']
@@ -0,0 +1,149 @@
+"""
+Compact dtype helpers for the feature and data layers
+Downcasts float64 -> float32 where precision allows, symbols -> categorical,
+dates -> int32 day offsets
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Day offsets are counted from the Unix epoch so they line up with DuckDB DATE math
+DATE_EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Day offset stored for missing dates (NaT)
+NAT_DAY = np.iinfo(np.int32).min
+
+# Rounding a float64 that lies in float32's normal range costs at most half an ulp,
+# 2**-24 relative; a column exceeding that has values that over- or underflowed float32
+DEFAULT_RTOL = 2.0 ** -24
+# Denominator guard of check_precision, which compares independently computed values
+DEFAULT_ATOL = 1e-9
+
+
+def float32_error(values: np.ndarray, atol: float = 0.0) -> float:
+    """
+    Max relative error introduced by rounding float64 values to float32
+    
+    Zeros round exactly and are skipped; atol (added to the denominator) is 0 by
+    default so values that underflow to subnormals or zero are not hidden by it.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    reference = values[np.isfinite(values) & (values != 0)]
+    if reference.size == 0:
+        return 0.0
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        rounded = reference.astype(np.float32).astype(np.float64)
+    if not np.isfinite(rounded).all():
+        return float('inf')  # overflowed the float32 range
+
+    error = np.abs(rounded - reference) / (np.abs(reference) + atol)
+    return float(error.max())
+
+
+def downcast_floats(df: pd.DataFrame, rtol: float = DEFAULT_RTOL,
+                    atol: float = 0.0) -> pd.DataFrame:
+    """Downcast float64 columns to float32 where the rounding error stays within rtol"""
+    result = df.copy()
+    for col in df.columns:
+        if df[col].dtype != np.float64:
+            continue
+        error = float32_error(df[col].to_numpy(), atol)
+        if error <= rtol:
+            result[col] = df[col].astype(np.float32)
+        else:
+            logger.debug(f"Keeping {col} as float64 (float32 error {error:.2e} > {rtol:.2e})")
+    return result
+
+
+def downcast_integers(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast int64 columns to the smallest signed type that holds their range"""
+    result = df.copy()
+    for col in df.columns:
+        if df[col].dtype == np.int64:
+            result[col] = pd.to_numeric(df[col], downcast='integer')
+    return result
+
+
+def encode_dates(dates: Iterable) -> np.ndarray:
+    """Convert dates to int32 day offsets from DATE_EPOCH (NAT_DAY for missing dates)"""
+    days = pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]')
+    missing = np.isnat(days)
+    offsets = (days - DATE_EPOCH).astype(np.int64)
+    offsets[missing] = NAT_DAY
+    return offsets.astype(np.int32)
+
+
+def decode_dates(day_offsets: Iterable) -> pd.DatetimeIndex:
+    """Convert int32 day offsets back to timestamps (NAT_DAY becomes NaT)"""
+    offsets = np.asarray(day_offsets, dtype=np.int64)
+    dates = DATE_EPOCH + offsets.astype('timedelta64[D]')
+    dates[offsets == NAT_DAY] = np.datetime64('NaT')
+    return pd.DatetimeIndex(dates)
+
+
+def encode_symbols(symbols: pd.Series, as_ids: bool = False) -> pd.Series:
+    """Store symbols as a categorical, or as the categorical's int32 codes"""
+    categorical = symbols.astype('category')
+    if as_ids:
+        return pd.Series(categorical.cat.codes.astype(np.int32), index=symbols.index,
+                         name=symbols.name)
+    return categorical
+
+
+def compact_frame(
+    df: pd.DataFrame,
+    symbol_col: Optional[str] = 'symbol',
+    date_col: Optional[str] = 'date',
+    rtol: float = DEFAULT_RTOL,
+    symbol_ids: bool = False
+) -> pd.DataFrame:
+    """
+    Compact a feature or OHLCV frame
+
+    Args:
+        df: Frame to compact (left untouched)
+        symbol_col: Symbol column to encode, skipped if absent
+        date_col: Date column to convert to int32 day offsets, skipped if absent
+        rtol: Max relative float32 rounding error allowed per column
+        symbol_ids: Store symbols as int32 codes instead of a categorical
+
+    Returns:
+        Compacted copy of df
+    """
+    result = downcast_integers(downcast_floats(df, rtol=rtol))
+
+    if symbol_col and symbol_col in result.columns:
+        result[symbol_col] = encode_symbols(result[symbol_col], as_ids=symbol_ids)
+
+    if date_col and date_col in result.columns:
+        result[date_col] = encode_dates(result[date_col])
+
+    return result
+
+
+def check_precision(reference: pd.DataFrame, compact: pd.DataFrame) -> Dict[str, float]:
+    """Max relative error per numeric column of a compacted frame against its float64 source"""
+    errors = {}
+    for col in reference.columns:
+        if col not in compact.columns or not pd.api.types.is_float_dtype(reference[col]):
+            continue
+        expected = reference[col].to_numpy(dtype=np.float64)
+        actual = compact[col].to_numpy(dtype=np.float64)
+        finite = np.isfinite(expected)
+        if not finite.any():
+            errors[col] = 0.0
+            continue
+        diff = np.abs(actual[finite] - expected[finite]) / (np.abs(expected[finite]) + DEFAULT_ATOL)
+        errors[col] = float(diff.max())
+    return errors
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """Deep memory footprint of a frame in bytes"""
+    return int(df.memory_usage(deep=True).sum())
@@ -13,21 +13,28 @@ import pandas as pd
 import numpy as np
 from functools import wraps
 
+from .compact import compact_frame, check_precision, memory_usage, DEFAULT_RTOL
+
+from .. import indicators
+
 logger = logging.getLogger(__name__)
 
 
 class FeatureStore:
     """Centralized feature management system"""
     
-    def __init__(self, cache_dir: Optional[str] = None):
+    def __init__(self, cache_dir: Optional[str] = None, compact: bool = False,
+                 rtol: float = DEFAULT_RTOL):
         if cache_dir is None:
             cache_dir = Path(__file__).parent.parent.parent / "database" / "cache"
         
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.compact = compact
+        self.rtol = rtol
         self.features: Dict[str, pd.DataFrame] = {}
         self.feature_metadata: Dict[str, Dict] = {}
-        logger.info(f"FeatureStore initialized with cache: {cache_dir}")
+        logger.info(f"FeatureStore initialized with cache: {cache_dir} (compact={compact})")
     
     def register_feature(
         self,
@@ -37,13 +44,23 @@ class FeatureStore:
         description: str = ""
     ):
         """Register a feature with metadata"""
-        self.features[name] = feature_df
-        self.feature_metadata[name] = {
+        metadata = {
             'version': version,
             'created_date': datetime.now(),
             'description': description,
-            'shape': feature_df.shape
+            'shape': feature_df.shape,
+            'compact': self.compact
         }
+        
+        if self.compact:
+            compacted = compact_frame(feature_df, rtol=self.rtol)
+            metadata['max_rel_error'] = max(check_precision(feature_df, compacted).values(), default=0.0)
+            metadata['memory_bytes_float64'] = memory_usage(feature_df)
+            feature_df = compacted
+        
+        metadata['memory_bytes'] = memory_usage(feature_df)
+        self.features[name] = feature_df
+        self.feature_metadata[name] = metadata
         logger.info(f"Registered feature: {name} (shape: {feature_df.shape})")
     
     def get_feature(self, name: str) -> Optional[pd.DataFrame]:
@@ -95,7 +112,7 @@ class TechnicalFeatures:
     @staticmethod
     def moving_average(data: pd.Series, period: int, name: str = None) -> pd.Series:
         """Simple moving average"""
-        ma = data.rolling(window=period).mean()
+        ma = indicators.sma(data, period)
         if name:
             ma.name = f"{name}_MA{period}"
         return ma
@@ -103,7 +120,7 @@ class TechnicalFeatures:
     @staticmethod
     def exponential_moving_average(data: pd.Series, period: int, name: str = None) -> pd.Series:
         """Exponential moving average"""
-        ema = data.ewm(span=period, adjust=False).mean()
+        ema = indicators.ema(data, period)
         if name:
             ema.name = f"{name}_EMA{period}"
         return ema
@@ -111,22 +128,14 @@ class TechnicalFeatures:
     @staticmethod
     def relative_strength_index(data: pd.Series, period: int = 14) -> pd.Series:
         """Relative Strength Index (RSI)"""
-        delta = data.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / (loss + 1e-10)
-        rsi = 100 - (100 / (1 + rs))
+        rsi = indicators.rsi(data, period)
         rsi.name = f"RSI{period}"
         return rsi
     
     @staticmethod
     def bollinger_bands(data: pd.Series, period: int = 20, std_dev: int = 2) -> Dict[str, pd.Series]:
         """Bollinger Bands"""
-        sma = data.rolling(window=period).mean()
-        std = data.rolling(window=period).std()
-        
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
+        lower_band, sma, upper_band = indicators.bollinger_bands(data, period, std_dev)
         
         return {
             f"BB_UPPER_{period}": upper_band,
@@ -138,8 +147,8 @@ class TechnicalFeatures:
     @staticmethod
     def macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, pd.Series]:
         """MACD (Moving Average Convergence Divergence)"""
-        ema_fast = data.ewm(span=fast, adjust=False).mean()
-        ema_slow = data.ewm(span=slow, adjust=False).mean()
+        ema_fast = indicators.ema(data, fast)
+        ema_slow = indicators.ema(data, slow)
         
         macd_line = ema_fast - ema_slow
         signal_line = macd_line.ewm(span=signal, adjust=False).mean()
@@ -154,12 +163,7 @@ class TechnicalFeatures:
     @staticmethod
     def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
         """Average True Range"""
-        tr1 = high - low
-        tr2 = np.abs(high - close.shift())
-        tr3 = np.abs(low - close.shift())
-        
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
+        atr = indicators.atr(high, low, close, period)
         atr.name = f"ATR{period}"
         return atr
     
@@ -180,13 +184,13 @@ class TechnicalFeatures:
     @staticmethod
     def volume_features(volume: pd.Series, period: int = 20) -> Dict[str, pd.Series]:
         """Volume-based features"""
-        vol_ma = volume.rolling(window=period).mean()
+        vol_ma = indicators.sma(volume, period)
         vol_ratio = volume / vol_ma
         
         return {
             f'VOLUME_MA{period}': vol_ma,
             f'VOLUME_RATIO{period}': vol_ratio,
-            'VOLUME_ZSCORE': (volume - vol_ma) / volume.rolling(window=period).std()
+            'VOLUME_ZSCORE': (volume - vol_ma) / indicators.rolling_std(volume, period)
         }
 
 
@@ -249,13 +253,19 @@ class FundamentalFeatures:
 class FeatureEngineering:
     """Main feature engineering pipeline"""
     
-    def __init__(self):
-        self.feature_store = FeatureStore()
+    def __init__(self, compact: bool = False, cache_dir: Optional[str] = None):
+        self.compact = compact
+        self.feature_store = FeatureStore(cache_dir=cache_dir, compact=compact)
         self.tech_features = TechnicalFeatures()
         self.fund_features = FundamentalFeatures()
     
     def create_price_features(self, ohlcv: pd.DataFrame) -> pd.DataFrame:
-        """Create technical features from OHLCV data"""
+        """
+        Create technical features from OHLCV data
+        
+        Indicators are always computed in float64; in compact mode the result is
+        downcast afterwards, column by column, where float32 stays within tolerance.
+        """
         features = pd.DataFrame(index=ohlcv.index)
         
         # Moving averages
@@ -294,7 +304,7 @@ class FeatureEngineering:
         # Register features
         self.feature_store.register_feature('price_features', features, description='Technical analysis features')
         
-        return features
+        return self.feature_store.features['price_features']
     
     def create_fundamental_features(self, fundamentals: Dict) -> Dict[str, float]:
         """Create fundamental features"""
@@ -0,0 +1,19 @@
+"""Shared indicator kernels"""
+from .kernels import (
+    IndicatorCache,
+    sma,
+    rolling_std,
+    ema,
+    rsi,
+    true_range,
+    atr,
+    bollinger_bands,
+    fingerprint,
+    identity,
+    get_cache,
+    clear_cache,
+    cache_stats,
+)
+
+__all__ = ['IndicatorCache', 'sma', 'rolling_std', 'ema', 'rsi', 'true_range', 'atr',
+           'bollinger_bands', 'fingerprint', 'identity', 'get_cache', 'clear_cache', 'cache_stats']
@@ -0,0 +1,202 @@
+"""
+Shared indicator kernels
+Single implementation of the rolling/EWM indicators used across the feature store,
+regime detector, optimizer and signal generator, memoized per process on the identity
+of the input buffers (O(1) per lookup)
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Guards against division by zero in RSI when a window has no losses
+RSI_EPSILON = 1e-10
+
+
+class IndicatorCache:
+    """Thread-safe LRU cache of indicator results keyed by (input identities, indicator, params)"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[pd.Series, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], pd.Series],
+                       anchors: Any = None) -> pd.Series:
+        """
+        Return the cached result for key, computing and storing it on a miss
+        
+        anchors are kept alive with the entry; for identity keys they are the keyed
+        buffers, so an address in a live key can never be reused by another array.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # Compute outside the lock; a racing thread at worst computes the same value twice
+        result = compute()
+
+        with self._lock:
+            self._entries[key] = (result, anchors)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        """Drop all cached results and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Cache size and hit rate"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+_cache = IndicatorCache()
+
+
+def get_cache() -> IndicatorCache:
+    """Process-level indicator cache"""
+    return _cache
+
+
+def clear_cache():
+    """Clear the process-level indicator cache"""
+    _cache.clear()
+
+
+def cache_stats() -> Dict[str, float]:
+    """Hit-rate statistics of the process-level indicator cache"""
+    return _cache.stats()
+
+
+def fingerprint(series: pd.Series) -> str:
+    """Content hash of a series' values and index (the name is ignored; O(n), not used for cache keys)"""
+    digest = hashlib.blake2b(digest_size=16)
+    values = series.to_numpy()
+    if values.dtype == object:
+        values = pd.util.hash_array(values)
+    digest.update(str(values.dtype).encode())
+    digest.update(np.ascontiguousarray(values).tobytes())
+
+    index = series.index
+    if isinstance(index, pd.RangeIndex):
+        digest.update(f"range:{index.start}:{index.stop}:{index.step}".encode())
+    else:
+        digest.update(pd.util.hash_pandas_object(index, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _buffer_key(values: np.ndarray) -> Tuple:
+    """Address, layout and end values of an array: O(1), unlike a content hash"""
+    if len(values) == 0:
+        return (values.dtype.str, 0)
+    ends = values[[0, -1]]
+    # Raw bytes compare NaN end values equal, which float comparison would not
+    ends = tuple(ends) if values.dtype == object else ends.tobytes()
+    return (values.__array_interface__['data'][0], values.strides, values.dtype.str,
+            len(values), ends)
+
+
+def identity(series: pd.Series) -> Tuple[Hashable, Tuple[np.ndarray, ...]]:
+    """
+    (key, anchors) of a series' value and index buffers
+    
+    Series sharing buffers (e.g. the same DataFrame column read twice) share a key;
+    copies do not. Rewriting the first or last value changes the key, but other
+    in-place edits of the input go unnoticed: pass a new series instead of mutating one.
+    """
+    values = series.to_numpy()
+    index = series.index
+    if isinstance(index, pd.RangeIndex):
+        return (_buffer_key(values), ('range', index.start, index.stop, index.step)), (values,)
+    index_values = index.to_numpy()
+    return (_buffer_key(values), _buffer_key(index_values)), (values, index_values)
+
+
+def _memoized(indicator: str, params: Tuple, inputs: Tuple[pd.Series, ...],
+              compute: Callable[[], pd.Series]) -> pd.Series:
+    """Look up or compute an indicator; callers get their own copy of the result"""
+    identities = [identity(s) for s in inputs]
+    key = (tuple(k for k, _ in identities), indicator, params)
+    result = _cache.get_or_compute(key, compute, anchors=tuple(a for _, a in identities))
+    # Deep copy so in-place edits (renames, fillna(inplace=True), .iloc[...] = ...) by one
+    # caller never reach the cached object other callers read
+    return result.copy(deep=True)
+
+
+def sma(data: pd.Series, period: int) -> pd.Series:
+    """Simple moving average"""
+    return _memoized('sma', (period,), (data,),
+                     lambda: data.rolling(window=period).mean().rename(None))
+
+
+def rolling_std(data: pd.Series, period: int) -> pd.Series:
+    """Rolling sample standard deviation"""
+    return _memoized('rolling_std', (period,), (data,),
+                     lambda: data.rolling(window=period).std().rename(None))
+
+
+def ema(data: pd.Series, span: int) -> pd.Series:
+    """Exponential moving average (adjust=False)"""
+    return _memoized('ema', (span,), (data,),
+                     lambda: data.ewm(span=span, adjust=False).mean().rename(None))
+
+
+def rsi(data: pd.Series, period: int = 14) -> pd.Series:
+    """Relative Strength Index on simple rolling averages of gains and losses"""
+    def compute():
+        delta = data.diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        rs = gain / (loss + RSI_EPSILON)
+        return (100 - (100 / (1 + rs))).rename(None)
+
+    return _memoized('rsi', (period,), (data,), compute)
+
+
+def true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    """True range: max of high-low and the gaps to the previous close"""
+    def compute():
+        prev_close = close.shift()
+        tr = pd.concat([high - low, np.abs(high - prev_close), np.abs(low - prev_close)], axis=1)
+        return tr.max(axis=1).rename(None)
+
+    return _memoized('true_range', (), (high, low, close), compute)
+
+
+def atr(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
+    """Average True Range"""
+    return _memoized('atr', (period,), (high, low, close),
+                     lambda: true_range(high, low, close).rolling(window=period).mean())
+
+
+def bollinger_bands(data: pd.Series, period: int = 20,
+                    std_dev: float = 2.0) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """(lower, middle, upper) Bollinger Bands built from the cached sma/std kernels"""
+    middle = sma(data, period)
+    std = rolling_std(data, period)
+    return middle - std_dev * std, middle, middle + std_dev * std
@@ -13,6 +13,8 @@ import logging
 import pickle
 from pathlib import Path
 
+from .. import indicators
+
 
 class RegimeDetector:
     """
@@ -68,13 +70,13 @@ class RegimeDetector:
         # Price-based features
         df['returns'] = df['close'].pct_change()
         df['log_returns'] = np.log(df['close'] / df['close'].shift(1))
-        df['volatility_20'] = df['returns'].rolling(20).std()
-        df['volatility_60'] = df['returns'].rolling(60).std()
+        df['volatility_20'] = indicators.rolling_std(df['returns'], 20)
+        df['volatility_60'] = indicators.rolling_std(df['returns'], 60)
         
         # Moving averages
-        df['ma_20'] = df['close'].rolling(20).mean()
-        df['ma_50'] = df['close'].rolling(50).mean()
-        df['ma_200'] = df['close'].rolling(200).mean()
+        df['ma_20'] = indicators.sma(df['close'], 20)
+        df['ma_50'] = indicators.sma(df['close'], 50)
+        df['ma_200'] = indicators.sma(df['close'], 200)
         
         # MA trends
         df['price_above_ma50'] = (df['close'] > df['ma_50']).astype(int)
@@ -87,12 +89,12 @@ class RegimeDetector:
         df['momentum_20'] = df['close'] / df['close'].shift(20) - 1
         
         # Volume features
-        df['volume_ma_20'] = df['volume'].rolling(20).mean()
+        df['volume_ma_20'] = indicators.sma(df['volume'], 20)
         df['volume_ratio'] = df['volume'] / df['volume_ma_20']
         
         # VIX features (if available)
         if 'vix' in df.columns:
-            df['vix_ma_20'] = df['vix'].rolling(20).mean()
+            df['vix_ma_20'] = indicators.sma(df['vix'], 20)
             df['vix_spike'] = (df['vix'] > df['vix_ma_20'] * 1.5).astype(int)
         else:
             df['vix'] = 15.0  # Default VIX
@@ -126,14 +128,7 @@ class RegimeDetector:
     
     def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
         """Calculate Relative Strength Index"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return indicators.rsi(prices, period)
     
     def create_labels(self, data: pd.DataFrame) -> pd.Series:
         """
@@ -13,6 +13,9 @@ import json
 from tabulate import tabulate
 import numpy as np
 
+from ..risk.risk_manager import RiskManager
+from ..risk.var_engine import VaREngine
+
 # Configure detailed logging
 logging.basicConfig(
     level=logging.INFO,
@@ -127,19 +130,30 @@ class Portfolio:
 class RiskEngine:
     """Advanced Risk Management"""
     
-    def __init__(self, max_position_size_pct: float = 0.1, max_leverage: float = 2.0, var_confidence: float = 0.95):
+    def __init__(self, max_position_size_pct: float = 0.1, max_leverage: float = 2.0, var_confidence: float = 0.95,
+                 risk_manager: Optional[RiskManager] = None):
+        if risk_manager is not None and risk_manager.exposure is None:
+            raise ValueError("risk_manager needs an ExposureAggregator to record fills in")
         self.max_position_size_pct = max_position_size_pct
         self.max_leverage = max_leverage
         self.var_confidence = var_confidence
         self.risk_metrics = {}
+        # Follows the returns passed to calculate_var, folding in only appended ones
+        self.var_engine = VaREngine(window=None, confidence=var_confidence)
+        # Sector exposure kept fill by fill from executed orders
+        self.risk_manager = risk_manager
+    
+    def record_fill(self, symbol: str, quantity: float, price: float) -> None:
+        """Feed an execution (signed quantity) to the sector exposure, if tracked"""
+        if self.risk_manager is not None and quantity:
+            self.risk_manager.record_fill(symbol, quantity, price)
     
     def calculate_var(self, portfolio: Portfolio, returns: List[float]) -> float:
         """Calculate Value at Risk"""
         if not returns:
             return 0.0
-        sorted_returns = sorted(returns)
-        var_index = int(len(sorted_returns) * (1 - self.var_confidence))
-        return sorted_returns[var_index] * portfolio.total_value
+        self.var_engine.sync(returns)
+        return self.var_engine.var() * portfolio.total_value
     
     def calculate_max_drawdown(self, portfolio_values: List[float]) -> float:
         """Calculate maximum drawdown"""
@@ -173,6 +187,20 @@ class RiskEngine:
             return False, f"❌ Position exceeds limit. Max: ${max_position_value:,.2f}, Requested: ${order_value:,.2f}"
         return True, "✅ Position size check passed"
     
+    def check_sector_exposure(self, portfolio: Portfolio, order: Order) -> Tuple[bool, str]:
+        if self.risk_manager is None or order.price is None:
+            return True, "✅ Sector exposure check skipped"
+        
+        exposure = self.risk_manager.exposure
+        held = exposure.quantities.get(order.symbol, 0.0)
+        quantity = held + order.quantity if order.side == "BUY" else held - order.quantity
+        if not self.risk_manager.check_sector_exposure(order.symbol, quantity * order.price,
+                                                       portfolio.total_value):
+            sector = exposure.sector_of(order.symbol)
+            limit = self.risk_manager.limits.max_sector_exposure * 100
+            return False, f"❌ Sector exposure exceeds limit. {sector} max: {limit:.0f}%"
+        return True, "✅ Sector exposure check passed"
+    
     def generate_risk_alerts(self, portfolio: Portfolio) -> List[str]:
         alerts = []
         
@@ -195,9 +223,9 @@ class RiskEngine:
 class OMEGATradingEngine:
     """OMEGA Trading System - Main Engine"""
     
-    def __init__(self, initial_capital: float = 100000.0):
+    def __init__(self, initial_capital: float = 100000.0, risk_manager: Optional[RiskManager] = None):
         self.portfolio = Portfolio(cash=initial_capital)
-        self.risk_engine = RiskEngine()
+        self.risk_engine = RiskEngine(risk_manager=risk_manager)
         self.market_data: Dict[str, Dict] = {}
         self.portfolio_history: List[float] = [initial_capital]
         self.order_counter = 0
@@ -225,6 +253,7 @@ class OMEGATradingEngine:
         checks = [
             self.risk_engine.check_margin_requirement(self.portfolio, order),
             self.risk_engine.check_position_size(self.portfolio, order),
+            self.risk_engine.check_sector_exposure(self.portfolio, order),
         ]
         
         for passed, message in checks:
@@ -270,11 +299,14 @@ class OMEGATradingEngine:
                 )
             
             self.portfolio.cash -= execution_price * order.quantity
+            self.risk_engine.record_fill(order.symbol, order.quantity, execution_price)
             logger.info(f"✅ BUY EXECUTED: {order.quantity:.2f} {order.symbol} @ ${execution_price:.2f}")
         
         elif order.side == "SELL":
             if order.symbol in self.portfolio.positions:
                 pos = self.portfolio.positions[order.symbol]
+                # Positions are long only: a sell beyond the holding just closes it
+                self.risk_engine.record_fill(order.symbol, -min(order.quantity, pos.quantity), execution_price)
                 pos.quantity -= order.quantity
                 if pos.quantity <= 0:
                     del self.portfolio.positions[order.symbol]
@@ -13,6 +13,8 @@ import optuna
 from optuna.pruners import MedianPruner
 from optuna.samplers import TPESampler
 
+from .. import indicators
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,15 +90,11 @@ class SignalOptimizer:
                 return -1.0  # Invalid params
             
             # Calculate momentum signal
-            price_data['fast_ma'] = price_data['close'].rolling(fast_ma).mean()
-            price_data['slow_ma'] = price_data['close'].rolling(slow_ma).mean()
+            price_data['fast_ma'] = indicators.sma(price_data['close'], fast_ma)
+            price_data['slow_ma'] = indicators.sma(price_data['close'], slow_ma)
             
             # Calculate RSI
-            delta = price_data['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
-            rs = gain / (loss + 1e-10)
-            price_data['rsi'] = 100 - (100 / (1 + rs))
+            price_data['rsi'] = indicators.rsi(price_data['close'], rsi_period)
             
             # Generate signals
             price_data['signal'] = (
@@ -151,17 +149,12 @@ class SignalOptimizer:
             atr_period = trial.suggest_int('atr_period', 10, 20)
             
             # Calculate z-score
-            rolling_mean = price_data['close'].rolling(lookback).mean()
-            rolling_std = price_data['close'].rolling(lookback).std()
+            rolling_mean = indicators.sma(price_data['close'], lookback)
+            rolling_std = indicators.rolling_std(price_data['close'], lookback)
             z_score = (price_data['close'] - rolling_mean) / (rolling_std + 1e-10)
             
             # Calculate ATR for stops
-            high_low = price_data['high'] - price_data['low']
-            high_close = np.abs(price_data['high'] - price_data['close'].shift())
-            low_close = np.abs(price_data['low'] - price_data['close'].shift())
-            
-            tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            atr = tr.rolling(atr_period).mean()
+            atr = indicators.atr(price_data['high'], price_data['low'], price_data['close'], atr_period)
             
             # Generate signals (extreme deviations)
             price_data['signal'] = (
@@ -10,6 +10,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from ..risk.risk_manager import RiskManager
+from ..risk.var_engine import VaREngine
+
 logger = logging.getLogger(__name__)
 
 
@@ -177,22 +180,36 @@ class PortfolioOptimizer:
 class RiskMonitor:
     """Monitors portfolio risk"""
     
-    @staticmethod
+    def __init__(self):
+        # One VaREngine per (method, confidence), following the returns passed in
+        self._var_engines: Dict[tuple, VaREngine] = {}
+    
     def calculate_var(
+        self,
         returns: pd.Series,
-        confidence_level: float = 0.95
+        confidence_level: float = 0.95,
+        method: str = 'historical'
     ) -> float:
         """
         Calculate Value at Risk
         
+        Returns appended since the previous call (see VaREngine.sync) are folded into a
+        persistent engine instead of rescanning the series.
+        
         Args:
             returns: Series of returns
             confidence_level: Confidence level (0.95 = 95%)
+            method: 'historical', 'parametric' or 'cornish_fisher' (see VaREngine)
             
         Returns:
             VaR (negative value)
         """
-        return np.percentile(returns, (1 - confidence_level) * 100)
+        engine = self._var_engines.get((method, confidence_level))
+        if engine is None:
+            engine = self._var_engines[method, confidence_level] = VaREngine(
+                window=None, confidence=confidence_level, method=method)
+        engine.sync(returns)
+        return engine.var()
     
     @staticmethod
     def calculate_max_drawdown(equity_curve: pd.Series) -> float:
@@ -253,8 +270,8 @@ class RiskMonitor:
         largest_position = max(abs(v) for v in positions.values())
         return largest_position / total_value
     
-    @staticmethod
     def calculate_risk_metrics(
+        self,
         positions: Dict[str, Position],
         returns: pd.DataFrame,
         equity_curve: pd.Series,
@@ -274,7 +291,7 @@ class RiskMonitor:
         """
         # VaR
         daily_returns = equity_curve.pct_change().dropna()
-        var_95 = RiskMonitor.calculate_var(daily_returns, 0.95)
+        var_95 = self.calculate_var(daily_returns, 0.95)
         
         # Max Drawdown
         max_dd = RiskMonitor.calculate_max_drawdown(equity_curve)
@@ -384,12 +401,22 @@ class PositionSizer:
 class PortfolioManager:
     """Main portfolio management interface"""
     
-    def __init__(self, initial_capital: float = 100000):
+    def __init__(self, initial_capital: float = 100000,
+                 risk_manager: Optional[RiskManager] = None):
+        """
+        Args:
+            initial_capital: Starting capital
+            risk_manager: RiskManager with an ExposureAggregator; every position change
+                is recorded in it as a fill, keeping its sector exposure on this book
+        """
+        if risk_manager is not None and risk_manager.exposure is None:
+            raise ValueError("risk_manager needs an ExposureAggregator to track positions")
         self.initial_capital = initial_capital
         self.positions: Dict[str, Position] = {}
         self.optimizer = PortfolioOptimizer()
         self.risk_monitor = RiskMonitor()
         self.position_sizer = PositionSizer()
+        self.risk_manager = risk_manager
     
     def add_position(
         self,
@@ -398,7 +425,8 @@ class PortfolioManager:
         entry_price: float,
         current_price: float
     ) -> None:
-        """Add or update a position"""
+        """Add or update a position (the change is recorded as a fill at current_price)"""
+        previous = self.positions.get(symbol)
         self.positions[symbol] = Position(
             symbol=symbol,
             quantity=quantity,
@@ -406,11 +434,16 @@ class PortfolioManager:
             current_price=current_price,
             entry_date=str(datetime.utcnow().date())
         )
+        if self.risk_manager is not None:
+            filled = quantity - (previous.quantity if previous is not None else 0.0)
+            self.risk_manager.record_fill(symbol, filled, current_price)
     
     def remove_position(self, symbol: str) -> None:
-        """Remove a position"""
+        """Remove a position (recorded as a closing fill at its current price)"""
         if symbol in self.positions:
-            del self.positions[symbol]
+            position = self.positions.pop(symbol)
+            if self.risk_manager is not None:
+                self.risk_manager.record_fill(symbol, -position.quantity, position.current_price)
     
     def get_portfolio_value(self) -> float:
         """Get total portfolio value"""
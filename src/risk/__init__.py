@@ -2,5 +2,10 @@
 
 from .risk_manager import RiskManager
 from .position_sizer import PositionSizer
+from .correlation_tracker import EWMACorrelationTracker
+from .exposure import ExposureAggregator
+from .stress import ScenarioSet, StressTestEngine
+from .var_engine import VaREngine
 
-__all__ = ["RiskManager", "PositionSizer"]
+__all__ = ["RiskManager", "PositionSizer", "EWMACorrelationTracker", "ExposureAggregator",
+           "ScenarioSet", "StressTestEngine", "VaREngine"]
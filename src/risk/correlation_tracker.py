@@ -0,0 +1,154 @@
+"""
+Incremental EWMA correlation tracking
+Each new return vector updates the exponentially weighted mean and covariance with one
+rank-1 step (O(n^2)), so correlation checks read the current state instead of
+recomputing from return history
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class EWMACorrelationTracker:
+    """EWMA covariance/correlation of a set of symbols, plus an average-correlation baseline"""
+
+    def __init__(self, halflife: float = 20.0, baseline_halflife: float = 120.0,
+                 min_observations: int = 20):
+        """
+        Args:
+            halflife: Half-life (in updates) of the covariance estimate
+            baseline_halflife: Half-life of the slow EWMA of average correlation that
+                spikes are measured against
+            min_observations: Updates a symbol needs before its correlations are reported
+        """
+        self.decay = 0.5 ** (1.0 / halflife)
+        self.baseline_decay = 0.5 ** (1.0 / baseline_halflife)
+        self.min_observations = min_observations
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._mean = np.zeros(0)
+        self._cov = np.zeros((0, 0))
+        self._observations = np.zeros(0, dtype=np.int64)
+        self.updates = 0
+        self.baseline: Optional[float] = None
+
+    def _add_symbols(self, symbols: Sequence[str]):
+        new = [s for s in symbols if s not in self._index]
+        if not new:
+            return
+        n, m = len(self.symbols), len(new)
+        for offset, symbol in enumerate(new):
+            self._index[symbol] = n + offset
+        self.symbols.extend(new)
+        self._mean = np.concatenate([self._mean, np.zeros(m)])
+        self._observations = np.concatenate([self._observations, np.zeros(m, dtype=np.int64)])
+        cov = np.zeros((n + m, n + m))
+        cov[:n, :n] = self._cov
+        self._cov = cov
+
+    def retain(self, symbols: Iterable[str]):
+        """
+        Forget every tracked symbol not in symbols (e.g. names no longer held)
+
+        The baseline averages all tracked symbols, so retaining exactly the holdings
+        keeps it comparable with spike(holdings).
+        """
+        wanted = set(symbols)
+        keep = [s for s in self.symbols if s in wanted]
+        if len(keep) == len(self.symbols):
+            return
+        positions = np.fromiter((self._index[s] for s in keep), dtype=np.int64, count=len(keep))
+        self.symbols = keep
+        self._index = {symbol: i for i, symbol in enumerate(keep)}
+        self._mean = self._mean[positions]
+        self._observations = self._observations[positions]
+        self._cov = self._cov[np.ix_(positions, positions)]
+
+    def update(self, returns: Mapping[str, float]):
+        """
+        Fold in one period's returns
+
+        Symbols missing from returns (or NaN) count as having their mean return this period.
+        """
+        returns = {s: r for s, r in returns.items() if r is not None and np.isfinite(r)}
+        self._add_symbols(list(returns))
+        if not returns:
+            return
+        positions = np.fromiter((self._index[s] for s in returns), dtype=np.int64, count=len(returns))
+        values = np.fromiter(returns.values(), dtype=np.float64, count=len(returns))
+
+        # A symbol's first return seeds its mean instead of producing a huge deviation
+        first = self._observations[positions] == 0
+        self._mean[positions[first]] = values[first]
+        deviation = np.zeros(len(self.symbols))
+        deviation[positions] = values - self._mean[positions]
+
+        alpha = 1.0 - self.decay
+        self._mean += alpha * deviation
+        # cov <- decay * (cov + alpha * d d'), in place
+        self._cov *= self.decay
+        self._cov += (self.decay * alpha) * np.outer(deviation, deviation)
+        self._observations[positions] += 1
+        self.updates += 1
+
+        average = self.average_correlation()
+        if np.isfinite(average):
+            self.baseline = average if self.baseline is None else (
+                self.baseline_decay * self.baseline + (1 - self.baseline_decay) * average)
+
+    def _positions(self, symbols: Optional[Sequence[str]]) -> np.ndarray:
+        """Tracked, sufficiently observed positions of symbols (all if None)"""
+        if symbols is None:
+            positions = np.arange(len(self.symbols))
+        else:
+            positions = np.array([self._index[s] for s in symbols if s in self._index], dtype=np.int64)
+        return positions[self._observations[positions] >= self.min_observations]
+
+    def _correlation(self, positions: np.ndarray) -> np.ndarray:
+        cov = self._cov[np.ix_(positions, positions)]
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        return np.clip(corr, -1.0, 1.0)
+
+    def correlation(self, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Current correlation matrix of the (sufficiently observed) symbols"""
+        positions = self._positions(symbols)
+        labels = [self.symbols[i] for i in positions]
+        return pd.DataFrame(self._correlation(positions), index=labels, columns=labels)
+
+    def max_correlation(self, symbols: Optional[Sequence[str]] = None) -> Tuple[float, Optional[Tuple[str, str]]]:
+        """Highest pairwise correlation and its pair (NaN, None with fewer than two symbols)"""
+        positions = self._positions(symbols)
+        if len(positions) < 2:
+            return float('nan'), None
+        corr = self._correlation(positions)
+        upper = np.triu_indices(len(positions), 1)
+        values = corr[upper]
+        if not np.isfinite(values).any():
+            return float('nan'), None
+        best = int(np.nanargmax(values))
+        pair = (self.symbols[positions[upper[0][best]]], self.symbols[positions[upper[1][best]]])
+        return float(values[best]), pair
+
+    def average_correlation(self, symbols: Optional[Sequence[str]] = None) -> float:
+        """Mean pairwise correlation (NaN with fewer than two symbols)"""
+        positions = self._positions(symbols)
+        if len(positions) < 2:
+            return float('nan')
+        corr = self._correlation(positions)
+        values = corr[np.triu_indices(len(positions), 1)]
+        return float(np.nanmean(values)) if np.isfinite(values).any() else float('nan')
+
+    def spike(self, symbols: Optional[Sequence[str]] = None) -> float:
+        """
+        Average correlation now minus its baseline (NaN until both exist)
+
+        The baseline is taken over every tracked symbol; pass symbols only when they are
+        the tracked set (see retain()), or the two averages cover different names.
+        """
+        if self.baseline is None:
+            return float('nan')
+        return self.average_correlation(symbols) - self.baseline
@@ -0,0 +1,163 @@
+"""
+Incremental sector and factor exposure
+Every fill or mark changes one position's value, and that change is applied to its
+sector's and factors' running totals, so limit checks read totals instead of summing
+the book
+"""
+
+import math
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from ..analytics.duckdb_analytics import DuckDBAnalytics
+
+UNKNOWN_SECTOR = 'Unknown'
+
+
+class ExposureAggregator:
+    """
+    Running position values with per-sector and per-factor totals
+
+    sector_exposure holds gross (absolute) position value per sector, the unit of
+    RiskLimits.max_sector_exposure checks; sector_net and factor_exposures are signed,
+    factor exposures being loading-weighted position values.
+    """
+
+    def __init__(self, sectors: Optional[Mapping[str, str]] = None,
+                 factor_loadings: Optional[pd.DataFrame] = None,
+                 resync_every: int = 10_000):
+        """
+        Args:
+            sectors: Sector of each symbol (unmapped symbols count as UNKNOWN_SECTOR)
+            factor_loadings: (symbol x factor) loadings; symbols missing from it load zero
+            resync_every: Fills between exact recomputations of the totals, which stops
+                rounding drift at amortized O(1) cost
+        """
+        self.sectors: Dict[str, str] = dict(sectors or {})
+        self.factors: List[str] = [] if factor_loadings is None else [str(f) for f in factor_loadings.columns]
+        self._loadings: Dict[str, np.ndarray] = {} if factor_loadings is None else {
+            symbol: row for symbol, row in zip(factor_loadings.index,
+                                               factor_loadings.fillna(0.0).to_numpy(dtype=np.float64))
+        }
+        self._no_loadings = np.zeros(len(self.factors))
+        self.resync_every = resync_every
+
+        self.quantities: Dict[str, float] = {}
+        self.prices: Dict[str, float] = {}
+        self.values: Dict[str, float] = {}
+        self.sector_exposure: Dict[str, float] = {}
+        self.sector_net: Dict[str, float] = {}
+        self._factor_totals = np.zeros(len(self.factors))
+        self.gross = 0.0
+        self.net = 0.0
+        self._since_resync = 0
+
+    @classmethod
+    def from_analytics(cls, analytics: "DuckDBAnalytics", symbols: Optional[List[str]] = None,
+                       **kwargs) -> "ExposureAggregator":
+        """Aggregator using the symbol_sectors and factor_loadings tables of a database"""
+        return cls(analytics.get_symbol_sectors(symbols),
+                   analytics.get_factor_loadings(symbols), **kwargs)
+
+    def sector_of(self, symbol: str) -> str:
+        return self.sectors.get(symbol) or UNKNOWN_SECTOR
+
+    def loadings_of(self, symbol: str) -> np.ndarray:
+        return self._loadings.get(symbol, self._no_loadings)
+
+    def value(self, symbol: str) -> float:
+        """Signed market value of a position (0 if flat)"""
+        return self.values.get(symbol, 0.0)
+
+    def _apply(self, symbol: str, quantity: float, price: float):
+        """Move one position to quantity @ price, updating every total by the change"""
+        old = self.values.get(symbol, 0.0)
+        new = quantity * price
+        sector = self.sector_of(symbol)
+        self.sector_exposure[sector] = self.sector_exposure.get(sector, 0.0) + abs(new) - abs(old)
+        self.sector_net[sector] = self.sector_net.get(sector, 0.0) + new - old
+        if self.factors:
+            self._factor_totals += self.loadings_of(symbol) * (new - old)
+        self.gross += abs(new) - abs(old)
+        self.net += new - old
+
+        if quantity == 0:
+            self.quantities.pop(symbol, None)
+            self.values.pop(symbol, None)
+        else:
+            self.quantities[symbol] = quantity
+            self.values[symbol] = new
+        self.prices[symbol] = price
+
+    def on_fill(self, symbol: str, quantity: float, price: float):
+        """
+        Apply an execution: signed quantity (negative sells) at price
+
+        The whole position is marked at the fill price.
+        """
+        self._apply(symbol, self.quantities.get(symbol, 0.0) + quantity, price)
+        self._since_resync += 1
+        if self._since_resync >= self.resync_every:
+            self.resync()
+
+    def set_position(self, symbol: str, quantity: float, price: float):
+        """Replace a position outright (e.g. loading the book at start of day)"""
+        self._apply(symbol, quantity, price)
+
+    def mark(self, prices: Mapping[str, float]):
+        """Revalue held positions at new prices (symbols not held are ignored)"""
+        for symbol, price in prices.items():
+            quantity = self.quantities.get(symbol)
+            if quantity is not None:
+                self._apply(symbol, quantity, price)
+
+    def set_sector(self, symbol: str, sector: str):
+        """Reclassify a symbol, moving its exposure between sectors"""
+        quantity = self.quantities.get(symbol, 0.0)
+        price = self.prices.get(symbol, 0.0)
+        self._apply(symbol, 0.0, price)
+        self.sectors[symbol] = sector
+        if quantity:
+            self._apply(symbol, quantity, price)
+
+    def resync(self):
+        """Recompute every total exactly from the positions"""
+        sector_gross: Dict[str, List[float]] = {}
+        sector_net: Dict[str, List[float]] = {}
+        for symbol, value in self.values.items():
+            sector = self.sector_of(symbol)
+            sector_gross.setdefault(sector, []).append(abs(value))
+            sector_net.setdefault(sector, []).append(value)
+        # Update in place: RiskManager may hold a reference to sector_exposure
+        for sector in self.sector_exposure:
+            self.sector_exposure[sector] = math.fsum(sector_gross.get(sector, ()))
+            self.sector_net[sector] = math.fsum(sector_net.get(sector, ()))
+        self.gross = math.fsum(abs(v) for v in self.values.values())
+        self.net = math.fsum(self.values.values())
+        if self.factors:
+            self._factor_totals = np.zeros(len(self.factors))
+            for symbol, value in self.values.items():
+                self._factor_totals += self.loadings_of(symbol) * value
+        self._since_resync = 0
+
+    def sector_after(self, symbol: str, position_value: float) -> float:
+        """Gross exposure of symbol's sector if its position were worth position_value (O(1))"""
+        return (self.sector_exposure.get(self.sector_of(symbol), 0.0)
+                + abs(position_value) - abs(self.value(symbol)))
+
+    def factor_exposures(self) -> pd.Series:
+        """Loading-weighted net value per factor"""
+        return pd.Series(self._factor_totals.copy(), index=self.factors, dtype=np.float64)
+
+    def positions(self) -> pd.DataFrame:
+        """Current book: quantity, price, value and sector per symbol"""
+        symbols = list(self.values)
+        return pd.DataFrame({
+            'quantity': [self.quantities[s] for s in symbols],
+            'price': [self.prices[s] for s in symbols],
+            'value': [self.values[s] for s in symbols],
+            'sector': [self.sector_of(s) for s in symbols],
+        }, index=pd.Index(symbols, name='symbol'))
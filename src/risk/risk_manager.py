@@ -1,8 +1,15 @@
 """Risk management and controls"""
 
-from typing import Dict, Optional
+from typing import Dict, List, Mapping, Optional, Sequence, Union
 from dataclasses import dataclass
 
+import numpy as np
+import pandas as pd
+
+from .exposure import ExposureAggregator
+
+ArrayLike = Union[Sequence[float], np.ndarray, pd.Series]
+
 
 @dataclass
 class RiskLimits:
@@ -15,13 +22,73 @@ class RiskLimits:
     take_profit_pct: float = 0.10  # 10% take profit
 
 
+@dataclass
+class BatchValidation:
+    """
+    Per-order outcome of RiskManager.validate_trades_batch
+    
+    Each mask is True where the order passes that check; reasons holds the message
+    validate_trade would return for the order (first failed check wins).
+    """
+    approved: np.ndarray
+    position_ok: np.ndarray
+    leverage_ok: np.ndarray
+    daily_loss_ok: np.ndarray
+    sector_ok: np.ndarray
+    reasons: np.ndarray
+    leverage: float  # gross leverage after all orders
+    sector_exposure: Dict[str, float]  # sector exposure after all orders
+    symbols: Optional[List[str]] = None
+    
+    def to_frame(self) -> pd.DataFrame:
+        """One row per order"""
+        return pd.DataFrame({
+            'approved': self.approved,
+            'position_ok': self.position_ok,
+            'leverage_ok': self.leverage_ok,
+            'daily_loss_ok': self.daily_loss_ok,
+            'sector_ok': self.sector_ok,
+            'reason': self.reasons,
+        }, index=self.symbols)
+
+
 class RiskManager:
     """Automated risk controls"""
     
-    def __init__(self, limits: Optional[RiskLimits] = None):
+    def __init__(self, limits: Optional[RiskLimits] = None,
+                 exposure: Optional[ExposureAggregator] = None):
+        """
+        Args:
+            limits: Risk limits (defaults if None)
+            exposure: Book tracked fill by fill; its gross sector totals become
+                sector_exposure and feed the sector checks
+        """
         self.limits = limits or RiskLimits()
         self.daily_loss = 0.0
-        self.sector_exposure: Dict[str, float] = {}
+        self.exposure = exposure
+        # Gross position value per sector; the aggregator's live totals when one is given
+        self.sector_exposure: Dict[str, float] = exposure.sector_exposure if exposure is not None else {}
+    
+    def record_fill(self, symbol: str, quantity: float, price: float):
+        """Apply an execution (signed quantity) to the tracked exposure"""
+        if self.exposure is None:
+            raise ValueError("RiskManager has no ExposureAggregator to record fills in")
+        self.exposure.on_fill(symbol, quantity, price)
+    
+    def check_sector_exposure(self, symbol: str, position_value: float,
+                              portfolio_value: float) -> bool:
+        """
+        Check the sector limit if symbol's position were worth position_value
+        
+        Reads the running sector total (O(1)); positions that shrink always pass.
+        Without an ExposureAggregator there is nothing to check.
+        """
+        if self.exposure is None or portfolio_value <= 0:
+            return True
+        if abs(position_value) <= abs(self.exposure.value(symbol)):
+            return True
+        sector_total = self.exposure.sector_after(symbol, position_value)
+        return sector_total / portfolio_value <= self.limits.max_sector_exposure
     
     def check_position_size(self, portfolio_value: float, 
                            position_value: float) -> bool:
@@ -49,8 +116,9 @@ class RiskManager:
         return entry_price * (1 + self.limits.take_profit_pct)
     
     def validate_trade(self, portfolio_value: float, gross_exposure: float,
-                      position_value: float, daily_pnl: float) -> tuple[bool, str]:
-        """Validate trade against all risk constraints"""
+                      position_value: float, daily_pnl: float,
+                      symbol: Optional[str] = None) -> tuple[bool, str]:
+        """Validate trade against all risk constraints (sector limit too if symbol is given)"""
         
         if not self.check_position_size(portfolio_value, position_value):
             return False, "Position size exceeds limit"
@@ -61,7 +129,116 @@ class RiskManager:
         if not self.check_daily_loss(daily_pnl, portfolio_value):
             return False, "Daily loss limit breached"
         
+        if symbol is not None and not self.check_sector_exposure(symbol, position_value, portfolio_value):
+            return False, "Sector exposure exceeds limit"
+        
         return True, "Trade approved"
+    
+    def validate_trades_batch(self, portfolio_value: float, order_values: ArrayLike,
+                              current_positions: Optional[ArrayLike] = None,
+                              daily_pnl: float = 0.0,
+                              sectors: Optional[Union[Sequence[str], Mapping[str, str]]] = None,
+                              gross_exposure: Optional[float] = None) -> BatchValidation:
+        """
+        Validate a whole rebalance in one call
+        
+        Checks run together on the post-trade book, in validate_trade's order: position
+        size per order, gross leverage, daily loss, then sector exposure. Size, leverage
+        and sector breaches only fail orders that add exposure, so trades that shrink an
+        oversized position or an over-limit book still go through.
+        
+        Args:
+            portfolio_value: Portfolio equity
+            order_values: Signed order values per symbol (a Series keeps its symbols)
+            current_positions: Signed position values of the same symbols (a Series is
+                aligned to order_values' index); if None, the ExposureAggregator's values
+                for a Series of orders, zeros otherwise
+            daily_pnl: Today's P&L
+            sectors: Sector of each order: a sequence in order, or (for a Series of
+                orders only) a symbol -> sector mapping or Series; taken from the
+                ExposureAggregator for a Series if None, otherwise the sector check is
+                skipped. Sector totals start from sector_exposure, or from the orders'
+                current positions while sector_exposure is empty
+            gross_exposure: Current gross exposure of the whole book (the
+                ExposureAggregator's gross, else the sum of the absolute current
+                positions, if None)
+            
+        Returns:
+            BatchValidation with per-order masks and reasons
+        """
+        symbols = list(order_values.index) if isinstance(order_values, pd.Series) else None
+        orders = np.asarray(order_values, dtype=np.float64)
+        if current_positions is None and self.exposure is not None and symbols is not None:
+            current = np.array([self.exposure.value(symbol) for symbol in symbols], dtype=np.float64)
+        elif current_positions is None:
+            current = np.zeros_like(orders)
+        elif isinstance(current_positions, pd.Series) and symbols is not None:
+            current = current_positions.reindex(symbols, fill_value=0.0).to_numpy(dtype=np.float64)
+        else:
+            current = np.asarray(current_positions, dtype=np.float64)
+        
+        before = np.abs(current)
+        after = np.abs(current + orders)
+        adds_exposure = after > before
+        if gross_exposure is None:
+            gross_exposure = self.exposure.gross if self.exposure is not None else float(before.sum())
+        gross_after = gross_exposure + float((after - before).sum())
+        
+        if portfolio_value > 0:
+            position_ok = ~adds_exposure | (after / portfolio_value <= self.limits.max_position_size)
+            leverage = gross_after / portfolio_value
+            daily_loss_ok = self.check_daily_loss(daily_pnl, portfolio_value)
+        else:
+            position_ok = np.ones(len(orders), dtype=bool)
+            leverage = 0.0
+            daily_loss_ok = True
+        leverage_ok = ~adds_exposure | (leverage <= self.limits.max_leverage)
+        daily_loss_ok = np.full(len(orders), daily_loss_ok)
+        
+        if sectors is None and self.exposure is not None and symbols is not None:
+            sectors = [self.exposure.sector_of(symbol) for symbol in symbols]
+        sector_ok = np.ones(len(orders), dtype=bool)
+        sector_after: Dict[str, float] = {}
+        if sectors is not None:
+            if isinstance(sectors, (Mapping, pd.Series)):
+                if symbols is None:
+                    raise ValueError("A sector mapping needs order_values as a Series of symbols")
+                sectors = pd.Series(sectors, dtype=object).reindex(symbols)
+            if len(sectors) != len(orders):
+                raise ValueError(f"Got {len(sectors)} sectors for {len(orders)} orders")
+            codes, labels = pd.factorize(pd.Series(list(sectors), dtype=object), use_na_sentinel=True)
+            known = codes >= 0
+            # Existing sector exposure (the tracked book, else the orders' current
+            # positions) plus the batch's change
+            if self.exposure is not None or self.sector_exposure:
+                base = np.array([self.sector_exposure.get(label, 0.0) for label in labels])
+            else:
+                base = np.bincount(codes[known], weights=before[known], minlength=len(labels))
+            change = np.bincount(codes[known], weights=(after - before)[known], minlength=len(labels))
+            totals = base + change
+            sector_after = dict(zip(labels, totals.tolist()))
+            if portfolio_value > 0:
+                breached = totals / portfolio_value > self.limits.max_sector_exposure
+                sector_ok[known] = ~(breached[codes[known]] & adds_exposure[known])
+        
+        reasons = np.full(len(orders), "Trade approved", dtype=object)
+        # Assigned in reverse precedence so the first failing check's message wins
+        reasons[~sector_ok] = "Sector exposure exceeds limit"
+        reasons[~daily_loss_ok] = "Daily loss limit breached"
+        reasons[~leverage_ok] = "Leverage exceeds limit"
+        reasons[~position_ok] = "Position size exceeds limit"
+        
+        return BatchValidation(
+            approved=position_ok & leverage_ok & daily_loss_ok & sector_ok,
+            position_ok=position_ok,
+            leverage_ok=leverage_ok,
+            daily_loss_ok=daily_loss_ok,
+            sector_ok=sector_ok,
+            reasons=reasons,
+            leverage=leverage,
+            sector_exposure=sector_after,
+            symbols=symbols
+        )
 
 
 class PositionSizer:
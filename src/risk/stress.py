@@ -0,0 +1,314 @@
+"""
+Scenario and stress testing
+A scenario set holds cumulative-return paths (scenarios x steps x symbols or factors); the
+book's exposures are mapped onto those columns once, so P&L paths of every scenario come
+from one tensor product and drawdowns and limit breaches from vectorized reductions
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+if TYPE_CHECKING:
+    from ..analytics.duckdb_analytics import DuckDBAnalytics
+
+logger = logging.getLogger(__name__)
+
+# Named market stress windows replayed from market_data (inclusive start, end)
+HISTORICAL_WINDOWS: Dict[str, Tuple[str, str]] = {
+    'dotcom_bust_2000': ('2000-03-24', '2002-10-09'),
+    'sept_11_2001': ('2001-09-10', '2001-09-21'),
+    'gfc_2008': ('2008-09-12', '2009-03-09'),
+    'flash_crash_2010': ('2010-05-05', '2010-05-07'),
+    'us_downgrade_2011': ('2011-07-22', '2011-08-10'),
+    'taper_tantrum_2013': ('2013-05-21', '2013-06-24'),
+    'china_deval_2015': ('2015-08-17', '2015-08-25'),
+    'brexit_2016': ('2016-06-23', '2016-06-27'),
+    'volmageddon_2018': ('2018-01-26', '2018-02-08'),
+    'q4_selloff_2018': ('2018-10-03', '2018-12-24'),
+    'covid_crash_2020': ('2020-02-19', '2020-03-23'),
+    'rate_shock_2022': ('2022-01-03', '2022-10-12'),
+    'svb_2023': ('2023-03-08', '2023-03-15'),
+}
+
+
+@dataclass
+class ScenarioSet:
+    """
+    Cumulative returns of each column from the start of each scenario
+
+    paths[s, t, c] is the return of column c (a symbol or a factor) after step t of
+    scenario s; NaN means the scenario leaves that column unshocked.
+    """
+    names: List[str]
+    columns: List[str]
+    paths: np.ndarray  # (n_scenarios, n_steps, n_columns)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def shocks(self) -> pd.DataFrame:
+        """Total return of every column per scenario"""
+        return pd.DataFrame(self.paths[:, -1, :], index=self.names, columns=self.columns)
+
+    @classmethod
+    def from_shocks(cls, shocks: pd.DataFrame) -> "ScenarioSet":
+        """One-step scenarios, one per row of a (scenario x column) return frame"""
+        values = shocks.to_numpy(dtype=np.float64)
+        return cls([str(name) for name in shocks.index], [str(c) for c in shocks.columns],
+                   values[:, None, :])
+
+    @classmethod
+    def from_paths(cls, paths: Mapping[str, pd.DataFrame]) -> "ScenarioSet":
+        """
+        Multi-step scenarios from per-scenario (step x column) cumulative-return frames
+
+        Columns are aligned on their union; shorter scenarios hold their last step.
+        """
+        columns = sorted(set().union(*(frame.columns for frame in paths.values())))
+        steps = max((len(frame) for frame in paths.values()), default=0)
+        values = np.full((len(paths), steps, len(columns)), np.nan)
+        for i, frame in enumerate(paths.values()):
+            block = frame.reindex(columns=columns).to_numpy(dtype=np.float64)
+            values[i, :len(block)] = block
+            values[i, len(block):] = block[-1]
+        return cls([str(name) for name in paths], [str(c) for c in columns], values)
+
+    @classmethod
+    def sampled(cls, covariance: pd.DataFrame, n_scenarios: int = 1000, horizon: int = 1,
+                vol_multiplier: float = 1.0, dof: Optional[float] = None,
+                seed: Optional[int] = None) -> "ScenarioSet":
+        """
+        Hypothetical scenarios drawn from a (stressed) covariance of per-step returns
+
+        Args:
+            covariance: Per-step return covariance of the columns
+            n_scenarios: Scenarios drawn
+            horizon: Steps per scenario
+            vol_multiplier: Scales every volatility (correlations are kept)
+            dof: Student-t degrees of freedom for fat tails (normal if None)
+            seed: Seed for reproducible scenarios
+        """
+        rng = np.random.default_rng(seed)
+        cov = covariance.to_numpy(dtype=np.float64) * vol_multiplier ** 2
+        # Eigen-decomposition tolerates the rank-deficient matrices of short histories
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+        draws = rng.standard_normal((n_scenarios, horizon, len(cov))) @ factor.T
+        if dof is not None:
+            # Unit-variance Student-t: normal over sqrt(chi2 / dof), rescaled
+            scale = np.sqrt(rng.chisquare(dof, (n_scenarios, horizon, 1)) / dof)
+            draws *= np.sqrt((dof - 2) / dof) / scale if dof > 2 else 1.0 / scale
+        paths = np.expm1(np.cumsum(np.log1p(np.maximum(draws, -0.99)), axis=1))
+        width = len(str(n_scenarios - 1))
+        return cls([f"sampled_{i:0{width}d}" for i in range(n_scenarios)],
+                   [str(c) for c in covariance.columns], paths)
+
+
+def _gap_filled(analytics: "DuckDBAnalytics", symbols: Optional[List[str]],
+                start_date: Optional[str], end_date: Optional[str]) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """Closes with gaps forward-filled (leading gaps stay NaN)"""
+    dates, names, panel = analytics.load_price_panel(symbols, start_date, end_date, dtype=np.float64)
+    if len(names):
+        panel = pd.DataFrame(panel).ffill().to_numpy()
+    return dates, names, panel
+
+
+def historical_scenarios(analytics: "DuckDBAnalytics", symbols: Optional[List[str]] = None,
+                         windows: Optional[Mapping[str, Tuple[str, str]]] = None) -> ScenarioSet:
+    """
+    Replay named stress windows from market_data
+
+    Each window becomes one scenario of daily cumulative returns from its first date;
+    symbols without a bar on that date are left unshocked. Windows with fewer than two
+    dates of data are skipped.
+
+    Args:
+        analytics: Database whose market_data is replayed
+        symbols: Symbols to shock (all if None)
+        windows: Name to (start, end) dates (HISTORICAL_WINDOWS if None)
+    """
+    paths = {}
+    for name, (start, end) in (windows or HISTORICAL_WINDOWS).items():
+        dates, names, panel = _gap_filled(analytics, symbols, start, end)
+        if len(dates) < 2:
+            logger.debug(f"Skipping stress window {name}: no market data from {start} to {end}")
+            continue
+        paths[name] = pd.DataFrame(panel[1:] / panel[0] - 1, columns=names)
+    if not paths:
+        return ScenarioSet([], list(symbols or []), np.empty((0, 1, len(symbols or []))))
+    return ScenarioSet.from_paths(paths)
+
+
+def rolling_scenarios(analytics: "DuckDBAnalytics", symbols: Optional[List[str]] = None,
+                      horizon: int = 10, days: int = 3650, step: int = 1) -> ScenarioSet:
+    """
+    Every horizon-bar window of recent history as a scenario
+
+    Args:
+        analytics: Database whose market_data is replayed
+        symbols: Symbols to shock (all if None)
+        horizon: Bars per scenario
+        days: Calendar-day lookback
+        step: Bars between scenario starts
+    """
+    dates, names, panel = _gap_filled(analytics, symbols, analytics._days_ago(days), None)
+    if len(dates) <= horizon:
+        return ScenarioSet([], names, np.empty((0, horizon, len(names))))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(panel)
+    # (windows, columns, horizon + 1) view; nothing is copied until the subtraction
+    windows = sliding_window_view(log_prices, horizon + 1, axis=0)[::step]
+    paths = np.expm1(windows[:, :, 1:] - windows[:, :, :1]).transpose(0, 2, 1)
+    starts = dates[:len(dates) - horizon:step]
+    return ScenarioSet([f"rolling_{start}" for start in starts], names, np.ascontiguousarray(paths))
+
+
+def position_values(book: Any) -> Tuple[pd.Series, float]:
+    """
+    (signed value per symbol, portfolio value) of a book
+
+    Accepts a PortfolioManager (no cash, so the portfolio value is the positions'
+    value), an Omega Portfolio (total_value includes cash), or a mapping of symbol to
+    value or to a {"value": ...} dict as the agents pass around (portfolio value is
+    then the gross position value).
+    """
+    positions = getattr(book, 'positions', book)
+    values = {}
+    for symbol, position in positions.items():
+        if isinstance(position, Mapping):
+            values[symbol] = float(position.get('value', 0.0))
+        elif hasattr(position, 'market_value'):
+            values[symbol] = float(position.market_value)
+        elif hasattr(position, 'value'):
+            values[symbol] = float(position.value)
+        else:
+            values[symbol] = float(position)
+    exposures = pd.Series(values, dtype=np.float64)
+    if hasattr(book, 'total_value'):
+        total = float(book.total_value)
+    elif hasattr(book, 'get_portfolio_value'):
+        total = float(book.get_portfolio_value())
+    else:
+        total = float(exposures.abs().sum())
+    return exposures, total
+
+
+class StressTestEngine:
+    """P&L, drawdown and limit breaches of a book under many scenarios at once"""
+
+    RESULT_COLUMNS = ['pnl', 'return', 'max_drawdown', 'worst_step', 'coverage',
+                      'loss_breach', 'drawdown_breach', 'breach']
+
+    def __init__(self, max_loss_pct: float = 0.10, max_drawdown_pct: float = 0.15,
+                 factor_loadings: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            max_loss_pct: Scenario loss (fraction of portfolio value) that breaches
+            max_drawdown_pct: Peak-to-trough drawdown along a scenario path that breaches
+            factor_loadings: (symbol x factor) betas; scenario columns naming a factor move
+                every symbol by its loading, on top of any shock to the symbol's own column
+        """
+        self.max_loss_pct = max_loss_pct
+        self.max_drawdown_pct = max_drawdown_pct
+        self.factor_loadings = factor_loadings
+
+    def _column_exposures(self, columns: Sequence[str],
+                          exposures: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Value exposed to each scenario column, and which held symbols each column moves
+
+        Returns:
+            (exposure per column, (columns x symbols) boolean reach)
+        """
+        column_index = pd.Index(columns)
+        direct = exposures.reindex(column_index, fill_value=0.0).to_numpy(copy=True)
+        reach = column_index.to_numpy()[:, None] == exposures.index.to_numpy()[None, :]
+        if self.factor_loadings is not None:
+            factors = [c for c in columns if c in self.factor_loadings.columns]
+            if factors:
+                loadings = self.factor_loadings.reindex(index=exposures.index,
+                                                        columns=factors).fillna(0.0)
+                positions = column_index.get_indexer(factors)
+                direct[positions] += loadings.to_numpy().T @ exposures.to_numpy()
+                reach[positions] |= (loadings.to_numpy() != 0).T
+        return direct, reach
+
+    def run(self, scenarios: Union[ScenarioSet, pd.DataFrame, Sequence[ScenarioSet]],
+            book: Any, portfolio_value: Optional[float] = None) -> pd.DataFrame:
+        """
+        Stress a book under every scenario
+
+        Args:
+            scenarios: A ScenarioSet, a (scenario x column) frame of one-step shocks, or a
+                list of scenario sets (e.g. historical, rolling and sampled)
+            book: Positions, anything position_values accepts
+            portfolio_value: Base for returns and drawdowns (from the book if None)
+
+        Returns:
+            One row per scenario: pnl, return (pnl / portfolio value), max_drawdown
+            (negative fraction from the path's running peak, the starting value
+            included), worst_step (step of the lowest P&L), coverage (share of gross
+            exposure the scenario shocks) and the loss/drawdown breach flags
+        """
+        if isinstance(scenarios, pd.DataFrame):
+            scenarios = ScenarioSet.from_shocks(scenarios)
+        if hasattr(scenarios, 'paths'):  # a single set
+            scenarios = [scenarios]
+        exposures, book_value = position_values(book)
+        if portfolio_value is None:
+            portfolio_value = book_value
+        frames = [self._run_set(s, exposures, portfolio_value) for s in scenarios if len(s)]
+        if not frames:
+            return pd.DataFrame(columns=self.RESULT_COLUMNS)
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    def _run_set(self, scenarios: ScenarioSet, exposures: pd.Series,
+                 portfolio_value: float) -> pd.DataFrame:
+        column_exposure, reach = self._column_exposures(scenarios.columns, exposures)
+        shocked = np.isfinite(scenarios.paths[:, -1, :])
+        # The one product: (scenarios, steps, columns) @ (columns,) -> P&L paths
+        pnl_paths = np.nan_to_num(scenarios.paths, nan=0.0) @ column_exposure
+
+        wealth = portfolio_value + pnl_paths
+        peaks = np.maximum(np.maximum.accumulate(wealth, axis=1), portfolio_value)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.where(peaks > 0, wealth / peaks - 1.0, 0.0).min(axis=1)
+            pnl = pnl_paths[:, -1]
+            returns = pnl / portfolio_value if portfolio_value else np.full(len(pnl), np.nan)
+            gross = np.abs(exposures.to_numpy()).sum()
+            coverage = ((shocked.astype(np.float64) @ reach) > 0) @ np.abs(exposures.to_numpy())
+            coverage = coverage / gross if gross else np.ones(len(pnl))
+
+        loss_breach = returns < -self.max_loss_pct
+        drawdown_breach = np.minimum(drawdown, 0.0) < -self.max_drawdown_pct
+        return pd.DataFrame({
+            'pnl': pnl,
+            'return': returns,
+            'max_drawdown': np.minimum(drawdown, 0.0),
+            'worst_step': pnl_paths.argmin(axis=1),
+            'coverage': coverage,
+            'loss_breach': loss_breach,
+            'drawdown_breach': drawdown_breach,
+            'breach': loss_breach | drawdown_breach,
+        }, index=pd.Index(scenarios.names, name='scenario'))
+
+    @staticmethod
+    def summary(results: pd.DataFrame) -> Dict[str, Any]:
+        """Worst scenario and breach counts of run() output"""
+        if results.empty:
+            return {'scenarios': 0, 'breaches': 0, 'worst_scenario': None,
+                    'worst_return': float('nan'), 'worst_drawdown': float('nan')}
+        worst = results['return'].idxmin()
+        return {
+            'scenarios': len(results),
+            'breaches': int(results['breach'].sum()),
+            'worst_scenario': worst,
+            'worst_return': float(results.at[worst, 'return']),
+            'worst_drawdown': float(results['max_drawdown'].min()),
+        }
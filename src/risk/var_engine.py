@@ -0,0 +1,441 @@
+"""
+Incremental Value-at-Risk / CVaR engine
+Returns stream into a ring-buffer window kept in a blocked sorted list (O(log n) add,
+remove and rank lookup) with running moments for the parametric and Cornish-Fisher
+modes; unbounded horizons switch to a KLL quantile sketch instead of keeping every return
+"""
+
+import bisect
+import itertools
+import math
+import random
+from collections import deque
+from statistics import NormalDist
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('historical', 'parametric', 'cornish_fisher')
+
+_NORMAL = NormalDist()
+
+
+class KLLSketch:
+    """
+    KLL streaming quantile sketch (Karnin, Lang, Liberty 2016)
+
+    Keeps O(k log(n / k)) items; rank error is roughly 1.7 / k. Updates are amortized O(1).
+    """
+
+    def __init__(self, k: int = 200, c: float = 2.0 / 3.0, seed: Optional[int] = None):
+        self.k = k
+        self.c = c
+        self.count = 0
+        self._compactors: List[List[float]] = [[]]
+        self._random = random.Random(seed)
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._compactors) - level - 1
+        return max(2, int(math.ceil(self.k * self.c ** depth)))
+
+    def update(self, value: float):
+        self._compactors[0].append(value)
+        self.count += 1
+        if sum(len(c) for c in self._compactors) >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        for level, items in enumerate(self._compactors):
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self._compactors):
+                    self._compactors.append([])
+                items.sort()
+                # Odd lengths keep their largest item at this level
+                keep = [items.pop()] if len(items) % 2 else []
+                offset = self._random.randint(0, 1)
+                self._compactors[level + 1].extend(items[offset::2])
+                self._compactors[level] = keep
+                break
+        self._max_size = sum(self._capacity(h) for h in range(len(self._compactors)))
+
+    def _weighted(self):
+        values = np.concatenate([np.asarray(items, dtype=np.float64) for items in self._compactors])
+        weights = np.concatenate([np.full(len(items), 2.0 ** level)
+                                  for level, items in enumerate(self._compactors)])
+        order = np.argsort(values, kind='stable')
+        return values[order], weights[order]
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile of everything seen (NaN when empty)"""
+        if self.count == 0:
+            return float('nan')
+        values, weights = self._weighted()
+        cumulative = np.cumsum(weights)
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(values[min(position, len(values) - 1)])
+
+    def tail_mean(self, q: float) -> float:
+        """Approximate mean of the lowest q share of everything seen"""
+        if self.count == 0:
+            return float('nan')
+        values, weights = self._weighted()
+        target = max(q * weights.sum(), weights[0])
+        cumulative = np.cumsum(weights)
+        taken = np.minimum(weights, np.maximum(target - (cumulative - weights), 0.0))
+        return float((values * taken).sum() / taken.sum())
+
+
+class SortedWindow:
+    """
+    Sorted multiset of floats stored as blocks of at most 2 * load items
+
+    Bisecting the block maxima finds an item's block and a Fenwick tree of block sizes
+    finds the k-th item, so add, remove and rank lookups are O(log n) with an O(load)
+    memmove inside one block instead of one across the whole window.
+    """
+
+    def __init__(self, values: Iterable[float] = (), load: int = 256):
+        self.load = load
+        ordered = sorted(values)
+        self._blocks: List[List[float]] = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+        self._maxes: List[float] = [block[-1] for block in self._blocks]
+        self._len = len(ordered)
+        self._reindex()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _reindex(self):
+        """Rebuild the Fenwick tree of block sizes (after blocks split or vanish)"""
+        n = len(self._blocks)
+        tree = [0] * (n + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+
+    def _resize(self, block: int, delta: int):
+        i, tree = block + 1, self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def add(self, value: float):
+        if not self._blocks:
+            self._blocks, self._maxes, self._len = [[value]], [value], 1
+            self._reindex()
+            return
+        b = min(bisect.bisect_left(self._maxes, value), len(self._blocks) - 1)
+        block = self._blocks[b]
+        bisect.insort(block, value)
+        self._maxes[b] = block[-1]
+        self._len += 1
+        if len(block) > 2 * self.load:
+            self._blocks[b:b + 1] = [block[:self.load], block[self.load:]]
+            self._maxes[b:b + 1] = [block[self.load - 1], block[-1]]
+            self._reindex()
+        else:
+            self._resize(b, 1)
+
+    def remove(self, value: float):
+        """Remove one occurrence of value (which must be present)"""
+        b = bisect.bisect_left(self._maxes, value)
+        block = self._blocks[b]
+        del block[bisect.bisect_left(block, value)]
+        self._len -= 1
+        if block:
+            self._maxes[b] = block[-1]
+            self._resize(b, -1)
+        else:
+            del self._blocks[b], self._maxes[b]
+            self._reindex()
+
+    def __getitem__(self, k: int) -> float:
+        """k-th smallest item (0-based)"""
+        if not 0 <= k < self._len:
+            raise IndexError(k)
+        block, step, tree = 0, self._top, self._tree
+        while step:
+            if block + step < len(tree) and tree[block + step] <= k:
+                block += step
+                k -= tree[block]
+            step >>= 1
+        return self._blocks[block][k]
+
+    def head(self, n: int) -> List[float]:
+        """The n smallest items"""
+        items: List[float] = []
+        for block in self._blocks:
+            if len(items) + len(block) >= n:
+                return items + block[:n - len(items)]
+            items.extend(block)
+        return items
+
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+
+
+class VaREngine:
+    """
+    Streaming VaR and CVaR of a return series
+
+    var() and cvar() are in return space like np.percentile of the returns, i.e. a
+    5% historical VaR of -0.03 means a 3% loss. Memory is bounded: a window keeps its
+    returns, an unbounded engine keeps at most max_exact of them before a KLLSketch
+    takes over historical quantiles.
+    """
+
+    def __init__(self, window: Optional[int] = 250, confidence: float = 0.95,
+                 method: str = 'historical', sketch: bool = False, sketch_k: int = 200,
+                 seed: Optional[int] = None, max_exact: int = 10_000):
+        """
+        Args:
+            window: Most recent returns kept (None for the whole history)
+            confidence: Default confidence level
+            method: 'historical', 'parametric' (normal) or 'cornish_fisher' (skew and
+                kurtosis adjusted normal)
+            sketch: With window=None, use a KLLSketch from the first return; it also keeps
+                historical quantiles for a parametric or Cornish-Fisher engine, which
+                otherwise only keeps moments
+            sketch_k: KLLSketch accuracy parameter
+            seed: Seed of the sketch's compaction coin flips
+            max_exact: With window=None, returns kept exactly before the sketch takes over
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        if sketch and window is not None:
+            raise ValueError("A sketch cannot evict returns; use window=None with sketch=True")
+        self.window = window
+        self.confidence = confidence
+        self.method = method
+        self.sketch_k = sketch_k
+        self.seed = seed
+        self.max_exact = max_exact
+        self._use_sketch = sketch
+        self.sketch = KLLSketch(sketch_k, seed=seed) if sketch else None
+        # Exact sorted returns: the window, or an unbounded history until max_exact
+        self._sorted: Optional[SortedWindow] = (
+            SortedWindow() if not sketch and (window is not None or method == 'historical') else None)
+        self._buffer: deque = deque()
+        # Moments run on returns minus the first one for conditioning
+        self._shift: Optional[float] = None
+        self._sums = [0.0, 0.0, 0.0, 0.0]
+        self._since_resync = 0
+        self.count = 0
+        # Position of the last sync(): the caller's counter, index label or object and length
+        self._synced_total: Optional[int] = None
+        self._synced_label = None
+        self._synced_ref = None
+        self._synced_length = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def reset(self):
+        """Forget every return"""
+        self.__init__(self.window, self.confidence, self.method, self._use_sketch,
+                      self.sketch_k, self.seed, self.max_exact)
+
+    def _add_moments(self, x: float, sign: float):
+        x2 = x * x
+        self._sums[0] += sign * x
+        self._sums[1] += sign * x2
+        self._sums[2] += sign * x2 * x
+        self._sums[3] += sign * x2 * x2
+
+    def update(self, value: float):
+        """Add one return (NaN is ignored)"""
+        if value is None or not math.isfinite(value):
+            return
+        value = float(value)
+        if self._shift is None:
+            self._shift = value
+        if self.sketch is not None:
+            self.sketch.update(value)
+        elif self._sorted is not None:
+            self._sorted.add(value)
+            if self.window is None and len(self._sorted) > self.max_exact:
+                self._start_sketch()
+        if self.window is not None:
+            self._buffer.append(value)
+        self._add_moments(value - self._shift, 1.0)
+        self.count += 1
+
+        if self.window is not None and len(self._buffer) > self.window:
+            old = self._buffer.popleft()
+            self._sorted.remove(old)
+            self._add_moments(old - self._shift, -1.0)
+            self.count -= 1
+            # Refresh the running sums once per window to stop rounding drift (amortized O(1))
+            self._since_resync += 1
+            if self._since_resync >= self.window:
+                self._resync()
+
+    def _start_sketch(self):
+        """Hand an unbounded history that outgrew max_exact over to a KLLSketch"""
+        self.sketch = KLLSketch(self.sketch_k, seed=self.seed)
+        for value in self._sorted:
+            self.sketch.update(value)
+        self._sorted = None
+
+    def _resync(self):
+        shifted = [x - self._shift for x in self._buffer]
+        self._sums = [math.fsum(shifted), math.fsum(x ** 2 for x in shifted),
+                      math.fsum(x ** 3 for x in shifted), math.fsum(x ** 4 for x in shifted)]
+        self._since_resync = 0
+
+    def update_many(self, values: Iterable[float]):
+        for value in values:
+            self.update(value)
+
+    def load(self, values: Sequence[float]):
+        """Replace the state with values in one vectorized pass (the last window of them)"""
+        self.reset()
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if self.window is not None:
+            values = values[-self.window:]
+        if len(values) == 0:
+            return
+        if self._sorted is not None and self.window is None and len(values) > self.max_exact:
+            self._sorted, self.sketch = None, KLLSketch(self.sketch_k, seed=self.seed)
+        if self.sketch is not None:
+            for value in values.tolist():
+                self.sketch.update(value)
+        elif self._sorted is not None:
+            self._sorted = SortedWindow(np.sort(values).tolist(), self._sorted.load)
+        if self.window is not None:
+            self._buffer.extend(values.tolist())
+        self._shift = float(values[0])
+        shifted = values - self._shift
+        self._sums = [math.fsum((shifted ** p).tolist()) for p in (1, 2, 3, 4)]
+        self.count = len(values)
+
+    def sync(self, history: Sequence[float], total: Optional[int] = None):
+        """
+        Catch up with a caller-held return history
+
+        Returns appended since the last sync are recognised by, in order:
+        - total: how many returns were ever appended to history (a counter kept by the
+          caller, so sliding windows such as a bounded deque sync incrementally);
+        - the index of a Series with increasing labels other than a RangeIndex (e.g.
+          dates): rows after the last synced label are new;
+        - the same list or array object as last time, grown in place (append-only).
+        Anything else (a new object, a truncated or re-labelled history) is reloaded in
+        one vectorized pass.
+        """
+        index = history.index if isinstance(history, pd.Series) else None
+        labelled = (index is not None and total is None and not isinstance(index, pd.RangeIndex)
+                    and index.is_monotonic_increasing)
+        values = history.to_numpy(dtype=np.float64) if index is not None else history
+        length = len(values)
+
+        new = None
+        if total is not None:
+            if self._synced_total is not None and 0 <= total - self._synced_total <= length:
+                new = total - self._synced_total
+        elif labelled:
+            if self._synced_label is not None and length:
+                position = index.searchsorted(self._synced_label, side='right')
+                if position > 0 and index[position - 1] == self._synced_label:
+                    new = length - position
+        elif history is self._synced_ref and length >= self._synced_length:
+            new = length - self._synced_length
+
+        if new is None:
+            self.load(values)
+        elif new:
+            start = length - new if self.window is None else max(length - new, length - self.window)
+            sliceable = isinstance(values, (np.ndarray, list, tuple))
+            self.update_many(values[start:] if sliceable else list(itertools.islice(values, start, None)))
+        self._synced_total = total
+        self._synced_label = index[-1] if labelled and length else None
+        self._synced_ref = history if index is None and total is None else None
+        self._synced_length = length
+
+    def moments(self):
+        """(mean, standard deviation (ddof=1), skewness, excess kurtosis) of the window"""
+        n = self.count
+        if n < 2:
+            return float('nan'), float('nan'), 0.0, 0.0
+        s1, s2, s3, s4 = self._sums
+        m1 = s1 / n
+        variance = max(s2 / n - m1 * m1, 0.0)
+        mean = m1 + self._shift
+        std = math.sqrt(variance * n / (n - 1))
+        if variance == 0:
+            return mean, 0.0, 0.0, 0.0
+        m3 = s3 / n - 3 * m1 * s2 / n + 2 * m1 ** 3
+        m4 = s4 / n - 4 * m1 * s3 / n + 6 * m1 ** 2 * s2 / n - 3 * m1 ** 4
+        return mean, std, m3 / variance ** 1.5, m4 / variance ** 2 - 3.0
+
+    def _z(self, alpha: float, skew: float, kurtosis: float, method: str) -> float:
+        z = _NORMAL.inv_cdf(alpha)
+        if method == 'cornish_fisher':
+            z = (z + (z * z - 1) * skew / 6 + (z ** 3 - 3 * z) * kurtosis / 24
+                 - (2 * z ** 3 - 5 * z) * skew * skew / 36)
+        return z
+
+    def _check_historical(self):
+        if self.sketch is None and self._sorted is None:
+            raise ValueError(f"An unbounded {self.method} engine keeps only moments; "
+                             "pass sketch=True for historical quantiles")
+
+    def _historical_quantile(self, alpha: float) -> float:
+        self._check_historical()
+        if self.sketch is not None:
+            return self.sketch.quantile(alpha)
+        # np.percentile's default linear interpolation, read from the sorted window
+        ordered = self._sorted
+        position = alpha * (len(ordered) - 1)
+        lower = int(math.floor(position))
+        low = ordered[lower]
+        high = ordered[min(lower + 1, len(ordered) - 1)]
+        return low + (high - low) * (position - lower)
+
+    def var(self, confidence: Optional[float] = None, method: Optional[str] = None) -> float:
+        """Return quantile at 1 - confidence (NaN without data)"""
+        alpha = 1 - (confidence if confidence is not None else self.confidence)
+        method = method or self.method
+        if self.count == 0:
+            return float('nan')
+        if method == 'historical':
+            return self._historical_quantile(alpha)
+        mean, std, skew, kurtosis = self.moments()
+        return mean + std * self._z(alpha, skew, kurtosis, method)
+
+    def cvar(self, confidence: Optional[float] = None, method: Optional[str] = None,
+             tail_points: int = 32) -> float:
+        """Expected return at or below the VaR quantile (expected shortfall)"""
+        alpha = 1 - (confidence if confidence is not None else self.confidence)
+        method = method or self.method
+        if self.count == 0:
+            return float('nan')
+        if method == 'historical':
+            self._check_historical()
+            if self.sketch is not None:
+                return self.sketch.tail_mean(alpha)
+            # Rounded first so 1 - 0.95 (= 0.05000000000000004) does not add a row
+            tail = max(1, int(math.ceil(round(alpha * len(self._sorted), 9))))
+            return math.fsum(self._sorted.head(tail)) / tail
+        mean, std, skew, kurtosis = self.moments()
+        if method == 'parametric':
+            z = _NORMAL.inv_cdf(alpha)
+            return mean - std * _NORMAL.pdf(z) / alpha
+        # Average of Cornish-Fisher quantiles over the tail (midpoint rule)
+        levels = (np.arange(tail_points) + 0.5) / tail_points * alpha
+        return mean + std * float(np.mean([self._z(a, skew, kurtosis, method) for a in levels]))
+
+
+def historical_var(returns: Sequence[float], confidence: float = 0.95) -> float:
+    """One-off historical VaR (np.percentile semantics, O(n) selection instead of a sort)"""
+    values = np.asarray(returns, dtype=np.float64)
+    if values.size == 0:
+        return float('nan')
+    return float(np.percentile(values, (1 - confidence) * 100))
@@ -1,6 +1,8 @@
 """Signal generation and validation"""
 
 from .signal_generator import SignalGenerator
+from .incremental import IncrementalSignalEngine
+from .signal_store import SignalStore, database_sink
 from .validator import SignalValidator
 
-__all__ = ["SignalGenerator", "SignalValidator"]
+__all__ = ["SignalGenerator", "IncrementalSignalEngine", "SignalStore", "SignalValidator", "database_sink"]
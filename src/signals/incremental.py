@@ -0,0 +1,211 @@
+"""
+Incremental signal engine for streaming prices
+Keeps a fixed-size ring buffer and running window sums per symbol, so each new price
+updates the momentum and Bollinger mean-reversion signals in O(1), and only signals that
+changed are emitted
+"""
+
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from .signal_generator import Signal, SignalGenerator, SignalType
+
+MOMENTUM = 'momentum'
+MEAN_REVERSION = 'mean_reversion'
+
+
+class _SymbolState:
+    """Ring buffer and running sums for one symbol"""
+
+    __slots__ = ('buffer', 'head', 'count', 'reference', 'sum_fast', 'sum_slow',
+                 'sum_band', 'sumsq_band', 'since_resync', 'last_price', 'codes')
+
+    def __init__(self, capacity: int):
+        self.buffer = [0.0] * capacity
+        self.head = 0  # next write position
+        self.count = 0
+        self.reference: Optional[float] = None
+        self.sum_fast = 0.0
+        self.sum_slow = 0.0
+        self.sum_band = 0.0
+        self.sumsq_band = 0.0
+        self.since_resync = 0
+        self.last_price = math.nan
+        self.codes: Dict[str, SignalType] = {MOMENTUM: SignalType.NEUTRAL,
+                                             MEAN_REVERSION: SignalType.NEUTRAL}
+
+    def ago(self, n: int) -> float:
+        """Shifted value written n updates ago (n=1 is the latest)"""
+        return self.buffer[(self.head - n) % len(self.buffer)]
+
+
+class IncrementalSignalEngine:
+    """
+    Streaming momentum (fast/slow SMA) and Bollinger mean-reversion signals
+
+    Signals follow SignalGenerator.momentum_signal and mean_reversion_signal evaluated on
+    the full history seen so far; NEUTRAL until a symbol has enough prices.
+    """
+
+    def __init__(self, fast_period: int = 20, slow_period: int = 50, band_period: int = 20,
+                 band_std: float = 2.0, generator: Optional[SignalGenerator] = None):
+        """
+        Args:
+            fast_period: Fast moving-average window of the momentum signal
+            slow_period: Slow moving-average window of the momentum signal
+            band_period: Bollinger Band window of the mean-reversion signal
+            band_std: Bollinger Band width in standard deviations
+            generator: Emitted signals are also recorded through generator.generate_signal
+        """
+        if not 0 < fast_period <= slow_period:
+            raise ValueError("Need 0 < fast_period <= slow_period")
+        if band_period < 2:
+            raise ValueError("band_period must be at least 2")
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.band_period = band_period
+        self.band_std = band_std
+        self.generator = generator
+        self.capacity = max(slow_period, band_period)
+        self._states: Dict[str, _SymbolState] = {}
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._states)
+
+    def _state(self, symbol: str) -> _SymbolState:
+        state = self._states.get(symbol)
+        if state is None:
+            state = self._states[symbol] = _SymbolState(self.capacity)
+        return state
+
+    def _push(self, state: _SymbolState, price: float):
+        """Add a price to the buffer and slide every running window by one"""
+        if state.reference is None:
+            # Sums run on price - first price so squares stay small and well conditioned
+            state.reference = price
+        x = price - state.reference
+        count = state.count
+
+        if count >= self.fast_period:
+            state.sum_fast -= state.ago(self.fast_period)
+        if count >= self.slow_period:
+            state.sum_slow -= state.ago(self.slow_period)
+        if count >= self.band_period:
+            leaving = state.ago(self.band_period)
+            state.sum_band -= leaving
+            state.sumsq_band -= leaving * leaving
+
+        state.buffer[state.head] = x
+        state.head = (state.head + 1) % self.capacity
+        state.count = count + 1
+        state.last_price = price
+        state.sum_fast += x
+        state.sum_slow += x
+        state.sum_band += x
+        state.sumsq_band += x * x
+
+        # Rebuild the sums from the buffer once per lap to stop rounding drift (amortized O(1))
+        state.since_resync += 1
+        if state.since_resync >= self.capacity:
+            self._resync(state)
+
+    def _resync(self, state: _SymbolState):
+        def window(n: int) -> List[float]:
+            return [state.ago(i) for i in range(1, min(n, state.count) + 1)]
+
+        state.sum_fast = math.fsum(window(self.fast_period))
+        state.sum_slow = math.fsum(window(self.slow_period))
+        band = window(self.band_period)
+        state.sum_band = math.fsum(band)
+        state.sumsq_band = math.fsum(x * x for x in band)
+        state.since_resync = 0
+
+    def _momentum(self, state: _SymbolState) -> SignalType:
+        if state.count < self.slow_period:
+            return SignalType.NEUTRAL
+        fast_ma = state.sum_fast / self.fast_period
+        slow_ma = state.sum_slow / self.slow_period
+        price = state.last_price - state.reference
+        if fast_ma > slow_ma and price > fast_ma:
+            return SignalType.BUY
+        if fast_ma < slow_ma and price < fast_ma:
+            return SignalType.SELL
+        return SignalType.NEUTRAL
+
+    def _mean_reversion(self, state: _SymbolState) -> SignalType:
+        n = self.band_period
+        if state.count < n:
+            return SignalType.NEUTRAL
+        mean = state.sum_band / n
+        variance = max((state.sumsq_band - state.sum_band * mean) / (n - 1), 0.0)
+        width = self.band_std * math.sqrt(variance)
+        price = state.last_price - state.reference
+        if price < mean - width:
+            return SignalType.BUY
+        if price > mean + width:
+            return SignalType.SELL
+        return SignalType.NEUTRAL
+
+    def update(self, symbol: str, price: float, timestamp: Optional[str] = None) -> List[Signal]:
+        """
+        Feed one new price
+
+        Args:
+            symbol: Symbol the price belongs to
+            price: Latest close (NaN/None is ignored)
+            timestamp: Stamp for emitted signals (now if None)
+
+        Returns:
+            Signals whose type changed with this price (empty most of the time)
+        """
+        if price is None or not math.isfinite(price):
+            return []
+        state = self._state(symbol)
+        self._push(state, float(price))
+
+        emitted = []
+        for kind, code in ((MOMENTUM, self._momentum(state)),
+                           (MEAN_REVERSION, self._mean_reversion(state))):
+            if code is state.codes[kind]:
+                continue
+            state.codes[kind] = code
+            stamp = timestamp or datetime.now().isoformat()
+            strength = 0.0 if code is SignalType.NEUTRAL else 1.0
+            if self.generator is not None:
+                emitted.append(self.generator.generate_signal(symbol, code, strength, stamp, kind))
+            else:
+                emitted.append(Signal(symbol, code, strength, stamp, kind))
+        return emitted
+
+    def update_many(self, prices: Mapping[str, float], timestamp: Optional[str] = None) -> List[Signal]:
+        """Feed one bar for many symbols; returns all changed signals"""
+        emitted = []
+        for symbol, price in prices.items():
+            emitted.extend(self.update(symbol, price, timestamp))
+        return emitted
+
+    def warm_up(self, symbol: str, prices: Iterable[float]):
+        """Load history without emitting signals; current signal states are set silently"""
+        state = self._state(symbol)
+        for price in prices:
+            if price is not None and math.isfinite(price):
+                self._push(state, float(price))
+        if state.count:
+            state.codes[MOMENTUM] = self._momentum(state)
+            state.codes[MEAN_REVERSION] = self._mean_reversion(state)
+
+    def current(self, symbol: str) -> Dict[str, SignalType]:
+        """Current signal of each kind for a symbol"""
+        state = self._states.get(symbol)
+        if state is None:
+            return {MOMENTUM: SignalType.NEUTRAL, MEAN_REVERSION: SignalType.NEUTRAL}
+        return dict(state.codes)
+
+    def reset(self, symbol: Optional[str] = None):
+        """Forget one symbol's state, or every symbol's"""
+        if symbol is None:
+            self._states.clear()
+        else:
+            self._states.pop(symbol, None)
@@ -1,10 +1,16 @@
 """Signal generation engine"""
 
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Callable
+from typing import TYPE_CHECKING, Dict, List, Optional, Callable, Sequence, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+from .. import indicators
+
+if TYPE_CHECKING:
+    from .signal_store import SignalStore
+
 
 class SignalType(Enum):
     """Signal types"""
@@ -23,11 +29,63 @@ class Signal:
     reason: str = ""
 
 
+PricePanel = Union[pd.DataFrame, np.ndarray]
+
+
+def _as_panel(prices: PricePanel, symbols: Optional[Sequence[str]] = None,
+              tail: Optional[int] = None) -> Tuple[np.ndarray, Optional[pd.Index], pd.Index]:
+    """
+    float64 dates x symbols values plus the date index (if any) and symbol labels
+    
+    Only the last `tail` rows are converted when given.
+    """
+    if isinstance(prices, pd.DataFrame):
+        if tail is not None:
+            prices = prices.iloc[-tail:]
+        return prices.to_numpy(dtype=np.float64), prices.index, prices.columns
+    if tail is not None:
+        prices = prices[-tail:]
+    values = np.asarray(prices, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError(f"Expected a 2-D dates x symbols panel, got shape {values.shape}")
+    labels = pd.Index(symbols if symbols is not None else range(values.shape[1]))
+    return values, None, labels
+
+
+def _rolling_sums(values: np.ndarray, window: int, power: int = 1) -> np.ndarray:
+    """
+    Trailing-window sums of values**power along dates via cumulative sums
+
+    Windows holding a NaN (or not yet full) are NaN, matching pandas rolling(window).
+    """
+    valid = np.isfinite(values)
+    terms = np.where(valid, values, 0.0) ** power
+    csum = np.zeros((values.shape[0] + 1, values.shape[1]))
+    np.cumsum(terms, axis=0, out=csum[1:])
+    ccount = np.zeros(csum.shape, dtype=np.int64)
+    np.cumsum(valid, axis=0, out=ccount[1:])
+
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = csum[window:] - csum[:-window]
+    full = np.zeros(values.shape, dtype=bool)
+    full[window - 1:] = (ccount[window:] - ccount[:-window]) == window
+    sums[~full] = np.nan
+    return sums
+
+
 class SignalGenerator:
     """Generate trading signals from price/fundamental data"""
     
-    def __init__(self):
-        self.signals: Dict[str, List[Signal]] = {}
+    def __init__(self, store: Optional["SignalStore"] = None):
+        """
+        Args:
+            store: Signal history; if None, a default-sized in-memory SignalStore that
+                drops evicted signals (pass a store with a sink, e.g. database_sink, to
+                keep them)
+        """
+        # signal_store imports Signal from here
+        from .signal_store import SignalStore
+        self.signals = store if store is not None else SignalStore(drop_evicted=True)
     
     def momentum_signal(self, prices: pd.Series, fast_period: int = 20, 
                        slow_period: int = 50) -> SignalType:
@@ -35,8 +93,8 @@ class SignalGenerator:
         if len(prices) < slow_period:
             return SignalType.NEUTRAL
         
-        fast_ma = prices.rolling(window=fast_period).mean().iloc[-1]
-        slow_ma = prices.rolling(window=slow_period).mean().iloc[-1]
+        fast_ma = indicators.sma(prices, fast_period).iloc[-1]
+        slow_ma = indicators.sma(prices, slow_period).iloc[-1]
         current_price = prices.iloc[-1]
         
         if fast_ma > slow_ma and current_price > fast_ma:
@@ -51,8 +109,8 @@ class SignalGenerator:
         if len(prices) < period:
             return SignalType.NEUTRAL
         
-        sma = prices.rolling(window=period).mean().iloc[-1]
-        std = prices.rolling(window=period).std().iloc[-1]
+        sma = indicators.sma(prices, period).iloc[-1]
+        std = indicators.rolling_std(prices, period).iloc[-1]
         current_price = prices.iloc[-1]
         
         upper_band = sma + (std_dev * std)
@@ -64,6 +122,96 @@ class SignalGenerator:
             return SignalType.SELL
         return SignalType.NEUTRAL
     
+    def momentum_signal_batch(self, prices: PricePanel, fast_period: int = 20,
+                              slow_period: int = 50, history: bool = False,
+                              symbols: Optional[Sequence[str]] = None
+                              ) -> Union[pd.Series, pd.DataFrame]:
+        """
+        momentum_signal for every column of a dates x symbols price panel
+        
+        Args:
+            prices: DataFrame (dates x symbols) or 2-D array (with symbols for labels)
+            fast_period: Fast moving-average window
+            slow_period: Slow moving-average window
+            history: Return the signal at every date instead of only the latest
+            symbols: Column labels when prices is an array
+            
+        Returns:
+            SignalType values (1 BUY, -1 SELL, 0 NEUTRAL) as int8: a Series by symbol for
+            the latest date, or a dates x symbols DataFrame when history is True. A symbol
+            is NEUTRAL wherever its trailing slow_period window has a missing price.
+        """
+        values, dates, labels = _as_panel(prices, symbols, None if history else slow_period)
+        if not history:
+            # Only the trailing slow_period rows are read
+            window = values
+            if len(window) < slow_period:
+                return pd.Series(np.zeros(len(labels), dtype=np.int8), index=labels, name='momentum')
+            fast_ma = window[-fast_period:].sum(axis=0) / fast_period
+            slow_ma = window.sum(axis=0) / slow_period
+            codes = self._momentum_codes(window[-1], fast_ma, slow_ma)
+            return pd.Series(codes, index=labels, name='momentum')
+        
+        fast_ma = _rolling_sums(values, fast_period) / fast_period
+        slow_ma = _rolling_sums(values, slow_period) / slow_period
+        codes = self._momentum_codes(values, fast_ma, slow_ma)
+        return pd.DataFrame(codes, index=dates, columns=labels)
+    
+    @staticmethod
+    def _momentum_codes(price: np.ndarray, fast_ma: np.ndarray, slow_ma: np.ndarray) -> np.ndarray:
+        # NaN comparisons are False, so incomplete windows fall through to NEUTRAL
+        buy = (fast_ma > slow_ma) & (price > fast_ma)
+        sell = (fast_ma < slow_ma) & (price < fast_ma)
+        return buy.astype(np.int8) - sell.astype(np.int8)
+    
+    def mean_reversion_signal_batch(self, prices: PricePanel, period: int = 20,
+                                    std_dev: float = 2.0, history: bool = False,
+                                    symbols: Optional[Sequence[str]] = None
+                                    ) -> Union[pd.Series, pd.DataFrame]:
+        """
+        mean_reversion_signal for every column of a dates x symbols price panel
+        
+        Args:
+            prices: DataFrame (dates x symbols) or 2-D array (with symbols for labels)
+            period: Bollinger Band window
+            std_dev: Band width in standard deviations
+            history: Return the signal at every date instead of only the latest
+            symbols: Column labels when prices is an array
+            
+        Returns:
+            SignalType values as int8, shaped as in momentum_signal_batch
+        """
+        values, dates, labels = _as_panel(prices, symbols, None if history else period)
+        if not history:
+            window = values
+            if len(window) < period:
+                return pd.Series(np.zeros(len(labels), dtype=np.int8), index=labels,
+                                 name='mean_reversion')
+            sma = window.sum(axis=0) / period
+            std = window.std(axis=0, ddof=1)
+            codes = self._band_codes(window[-1], sma, std, std_dev)
+            return pd.Series(codes, index=labels, name='mean_reversion')
+        
+        # Shifting each column by its first price keeps the sum-of-squares variance exact
+        # enough over long histories; variance is shift-invariant
+        valid_rows = np.isfinite(values)
+        first = np.where(valid_rows.any(axis=0),
+                         values[valid_rows.argmax(axis=0), np.arange(values.shape[1])], 0.0)
+        shifted = values - first
+        sums = _rolling_sums(shifted, period)
+        squares = _rolling_sums(shifted, period, power=2)
+        variance = np.maximum((squares - sums ** 2 / period) / (period - 1), 0.0)
+        sma = sums / period + first
+        codes = self._band_codes(values, sma, np.sqrt(variance), std_dev)
+        return pd.DataFrame(codes, index=dates, columns=labels)
+    
+    @staticmethod
+    def _band_codes(price: np.ndarray, sma: np.ndarray, std: np.ndarray,
+                    std_dev: float) -> np.ndarray:
+        buy = price < sma - std_dev * std
+        sell = price > sma + std_dev * std
+        return buy.astype(np.int8) - sell.astype(np.int8)
+    
     def generate_signal(self, symbol: str, signal_type: SignalType, 
                        strength: float, timestamp: str, reason: str = "") -> Signal:
         """Generate and store signal"""
@@ -75,14 +223,14 @@ class SignalGenerator:
             reason=reason
         )
         
-        if symbol not in self.signals:
-            self.signals[symbol] = []
-        self.signals[symbol].append(signal)
+        self.signals.append(symbol, signal_type, signal.strength, timestamp, reason)
         
         return signal
     
     def get_latest_signal(self, symbol: str) -> Optional[Signal]:
         """Get latest signal for a symbol"""
-        if symbol not in self.signals or not self.signals[symbol]:
-            return None
-        return self.signals[symbol][-1]
+        return self.signals.latest(symbol)
+    
+    def history(self, symbol: str, limit: Optional[int] = None) -> List[Signal]:
+        """Retained signals for a symbol, oldest first"""
+        return self.signals.history(symbol, limit)
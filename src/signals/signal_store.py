@@ -0,0 +1,248 @@
+"""
+Bounded columnar signal history
+Signals are kept in a fixed-capacity ring of NumPy columns (symbol id, ns timestamp, type,
+strength) plus the caller's timestamp and reason, with symbols interned; the oldest rows
+are evicted in chunks and handed to a sink (e.g. DuckDBAnalytics.insert_signals) in bulk
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .signal_generator import Signal, SignalType
+
+logger = logging.getLogger(__name__)
+
+Timestamp = Union[str, int, datetime, pd.Timestamp, np.datetime64]
+
+_TYPES = {member.value: member for member in SignalType}
+
+NAT_NS = pd.NaT.value
+
+
+def to_ns(timestamp: Timestamp) -> int:
+    """
+    Nanoseconds since the epoch of a timestamp string, datetime or integer ns
+
+    Strings with a UTC offset or zone are converted to UTC; strings pandas cannot parse
+    (and missing values) map to NaT's value rather than raising, as any string used to be
+    a valid signal timestamp.
+    """
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    try:
+        value = pd.Timestamp(timestamp)
+    except (ValueError, TypeError, OverflowError):
+        return NAT_NS
+    if value is pd.NaT:
+        return NAT_NS
+    return value.value
+
+
+def database_sink(db_path: str) -> Callable[[pd.DataFrame], int]:
+    """
+    Sink appending evicted signals to the signals table of a DuckDB database
+
+    The database is opened only for each flush, so the writer lock is not held between
+    evictions (a flush fails while another process writes to it). To write through an
+    already open database, pass its insert_signals as the sink instead.
+
+    Args:
+        db_path: Database file
+    """
+    def sink(frame: pd.DataFrame) -> int:
+        from ..analytics.duckdb_analytics import DuckDBAnalytics
+        with DuckDBAnalytics(db_path) as analytics:
+            return analytics.insert_signals(frame)
+    return sink
+
+
+class SignalStore:
+    """
+    Ring buffer of signals with bulk flushes of evicted rows
+
+    Rows are addressed by a global sequence number; row seq lives at seq % capacity and is
+    retained while seq >= first_seq.
+    """
+
+    def __init__(self, capacity: int = 100_000, flush_size: Optional[int] = None,
+                 sink: Optional[Callable[[pd.DataFrame], object]] = None,
+                 drop_evicted: bool = False):
+        """
+        Args:
+            capacity: Signals retained in memory
+            flush_size: Rows evicted (and sunk) at once when the ring is full
+                (capacity // 10 if None)
+            sink: Receives evicted rows as a DataFrame (see frame()), e.g. database_sink()
+            drop_evicted: Discard evicted rows; required when there is no sink
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+        if sink is None and not drop_evicted:
+            raise ValueError("SignalStore needs a sink for evicted signals, "
+                             "or drop_evicted=True to discard them")
+        self.capacity = capacity
+        self.flush_size = max(1, min(flush_size or capacity // 10, capacity))
+        self.sink = sink
+
+        self._symbol_ids = np.empty(capacity, dtype=np.int32)
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._types = np.empty(capacity, dtype=np.int8)
+        self._strengths = np.empty(capacity, dtype=np.float32)
+        # Reasons embed prices and rarely repeat, so they live in the ring rather than an
+        # ever-growing intern table; the caller's timestamp is kept verbatim next to its ns
+        self._reasons = np.empty(capacity, dtype=object)
+        self._stamps = np.empty(capacity, dtype=object)
+
+        # Interned per symbol: bounded by the universe
+        self._symbols: List[str] = []
+        self._symbol_index: Dict[str, int] = {}
+        # Sequence number of each symbol's most recent signal
+        self._latest: Dict[int, int] = {}
+
+        self.first_seq = 0  # oldest retained row
+        self.next_seq = 0  # next row written
+        self.flushed_seq = 0  # rows before this one have been sunk
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.latest(symbol) is not None
+
+    def __getitem__(self, symbol: str) -> List[Signal]:
+        return self.history(symbol)
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols with at least one retained signal"""
+        return [self._symbols[sid] for sid, seq in self._latest.items() if seq >= self.first_seq]
+
+    @staticmethod
+    def _intern(value: str, index: Dict[str, int], values: List[str]) -> int:
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(values)
+            values.append(value)
+        return position
+
+    def append(self, symbol: str, signal_type: SignalType, strength: float,
+               timestamp: Timestamp, reason: str = "") -> int:
+        """
+        Record a signal
+
+        Returns:
+            Its sequence number
+        """
+        if len(self) == self.capacity:
+            self._evict(self.flush_size)
+        seq = self.next_seq
+        i = seq % self.capacity
+        sid = self._intern(symbol, self._symbol_index, self._symbols)
+        self._symbol_ids[i] = sid
+        self._timestamps[i] = to_ns(timestamp)
+        self._stamps[i] = timestamp
+        self._types[i] = signal_type.value
+        self._strengths[i] = strength
+        self._reasons[i] = reason
+        self._latest[sid] = seq
+        self.next_seq = seq + 1
+        return seq
+
+    def _positions(self, start: int, stop: int) -> np.ndarray:
+        """Ring positions of sequence numbers [start, stop)"""
+        return np.arange(start, stop) % self.capacity
+
+    def _signal(self, i: int) -> Signal:
+        stamp = self._stamps[i]
+        if not isinstance(stamp, str):
+            stamp = pd.Timestamp(int(self._timestamps[i])).isoformat()
+        return Signal(
+            symbol=self._symbols[self._symbol_ids[i]],
+            signal_type=_TYPES[int(self._types[i])],
+            strength=float(self._strengths[i]),
+            timestamp=stamp,
+            reason=self._reasons[i]
+        )
+
+    def latest(self, symbol: str) -> Optional[Signal]:
+        """Most recent retained signal of a symbol"""
+        sid = self._symbol_index.get(symbol)
+        seq = self._latest.get(sid) if sid is not None else None
+        if seq is None or seq < self.first_seq:
+            return None
+        return self._signal(seq % self.capacity)
+
+    def history(self, symbol: str, limit: Optional[int] = None) -> List[Signal]:
+        """Retained signals of a symbol, oldest first (the last limit only, if given)"""
+        sid = self._symbol_index.get(symbol)
+        if sid is None:
+            return []
+        positions = self._positions(self.first_seq, self.next_seq)
+        positions = positions[self._symbol_ids[positions] == sid]
+        if limit is not None:
+            positions = positions[-limit:] if limit > 0 else positions[:0]
+        return [self._signal(i) for i in positions]
+
+    def _frame(self, positions: np.ndarray) -> pd.DataFrame:
+        symbols = np.asarray(self._symbols, dtype=object)
+        types = np.array([_TYPES[v].name for v in (-1, 0, 1)], dtype=object)
+        timestamps = pd.to_datetime(self._timestamps[positions], unit='ns')
+        return pd.DataFrame({
+            'date': timestamps.normalize(),
+            'timestamp': timestamps,
+            'symbol': symbols[self._symbol_ids[positions]],
+            'signal_type': types[self._types[positions] + 1],
+            'strength': self._strengths[positions],
+            'reason': self._reasons[positions],
+        })
+
+    def frame(self, symbol: Optional[str] = None) -> pd.DataFrame:
+        """Retained signals as a DataFrame (one symbol's, or all)"""
+        positions = self._positions(self.first_seq, self.next_seq)
+        if symbol is not None:
+            sid = self._symbol_index.get(symbol, -1)
+            positions = positions[self._symbol_ids[positions] == sid]
+        return self._frame(positions)
+
+    def _sink_until(self, seq: int):
+        """Hand rows [flushed_seq, seq) to the sink"""
+        if seq <= self.flushed_seq:
+            return
+        if self.sink is not None:
+            self.sink(self._frame(self._positions(self.flushed_seq, seq)))
+        self.flushed_seq = seq
+
+    def _evict(self, n: int):
+        """Drop the n oldest rows, sinking any not yet flushed"""
+        stop = self.first_seq + min(n, len(self))
+        self._sink_until(stop)
+        # Release the object columns' references
+        evicted = self._positions(self.first_seq, stop)
+        self._reasons[evicted] = None
+        self._stamps[evicted] = None
+        self.evicted += stop - self.first_seq
+        self.first_seq = stop
+        if self.sink is None:
+            logger.debug(f"Dropped {self.evicted} signals beyond the retention of {self.capacity}")
+
+    def flush(self):
+        """Sink every retained row not flushed yet; rows stay queryable in memory"""
+        self._sink_until(self.next_seq)
+
+    def clear(self):
+        """Flush, then forget all retained signals"""
+        self.flush()
+        self.first_seq = self.next_seq
+        self._latest.clear()
+        self._reasons[:] = None
+        self._stamps[:] = None
+
+    def memory_usage(self) -> int:
+        """Bytes held by the ring columns (object columns count their pointers)"""
+        return sum(column.nbytes for column in (self._symbol_ids, self._timestamps, self._types,
+                                                self._strengths, self._reasons, self._stamps))
@@ -1,8 +1,73 @@
 """Signal validation and robustness testing"""
 
-from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from .signal_generator import Signal, SignalType
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bootstrap inputs shared with worker processes (set once per worker, see _bootstrap_data)
+BootstrapData = Tuple[np.ndarray, np.ndarray, np.ndarray]
+_bootstrap_shared: Optional[BootstrapData] = None
+
+
+def stationary_bootstrap_indices(rng: np.random.Generator, n_resamples: int, length: int,
+                                 mean_block: float) -> np.ndarray:
+    """
+    Politis-Romano stationary bootstrap indices, shape (n_resamples, length)
+    
+    Blocks start at uniform positions and have geometric lengths with mean mean_block;
+    they wrap around the end of the series.
+    """
+    positions = np.arange(length)
+    restart = rng.random((n_resamples, length)) < 1.0 / mean_block
+    restart[:, 0] = True
+    # Position of the most recent block start, then offset into that block
+    block_start = np.maximum.accumulate(np.where(restart, positions, 0), axis=1)
+    origins = rng.integers(0, length, (n_resamples, length))
+    return (np.take_along_axis(origins, block_start, axis=1) + positions - block_start) % length
+
+
+def _bootstrap_data(returns: np.ndarray) -> BootstrapData:
+    """(column-centered returns, column means, float32 log returns) of a return matrix"""
+    means = returns.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_returns = np.log1p(returns).astype(np.float32)
+    return returns - means, means, log_returns
+
+
+def _bootstrap_statistics(data: BootstrapData, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Annualized Sharpe and max drawdown of resampled paths, each (n_resamples, n_columns)"""
+    centered, means, log_returns = data
+    length = indices.shape[1]
+    # Centered columns keep the sum of squares from cancelling
+    sample = centered[indices]  # (n_resamples, length, n_columns)
+    total = sample.sum(axis=1)
+    squares = np.einsum('ijk,ijk->ik', sample, sample)
+    std = np.sqrt(np.maximum(squares - total ** 2 / length, 0.0) / (length - 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, (total / length + means) / std * (252 ** 0.5), 0.0)
+    
+    # Drawdowns only need float32, which halves the memory traffic of the widest arrays
+    log_wealth = np.cumsum(log_returns[indices], axis=1)
+    np.subtract(log_wealth, np.maximum.accumulate(log_wealth, axis=1), out=log_wealth)
+    max_dd = np.expm1(log_wealth.min(axis=1).astype(np.float64))
+    return sharpe, max_dd
+
+
+def _init_bootstrap_worker(data: Optional[BootstrapData]):
+    global _bootstrap_shared
+    _bootstrap_shared = data
+
+
+def _bootstrap_chunk(n_resamples: int, mean_block: float,
+                     seed: np.random.SeedSequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker task: statistics of n_resamples resamples of the shared return matrix"""
+    rng = np.random.default_rng(seed)
+    length = len(_bootstrap_shared[0])
+    indices = stationary_bootstrap_indices(rng, n_resamples, length, mean_block)
+    return _bootstrap_statistics(_bootstrap_shared, indices)
 
 
 class SignalValidator:
@@ -11,40 +76,167 @@ class SignalValidator:
     def __init__(self):
         self.validation_results: Dict = {}
     
-    def walk_forward_validate(self, returns: pd.Series, 
+    def walk_forward_validate(self, returns: Union[pd.Series, pd.DataFrame, np.ndarray],
                              window_size: int = 252,
                              step_size: int = 63) -> Dict:
-        """Walk-forward validation"""
-        results = {
-            'periods': [],
-            'sharpe_ratios': [],
-            'win_rates': [],
-            'max_drawdowns': []
-        }
+        """
+        Walk-forward validation
         
-        for i in range(0, len(returns) - window_size, step_size):
-            window = returns.iloc[i:i + window_size]
-            
-            # Calculate metrics
-            sharpe = (window.mean() / window.std()) * (252 ** 0.5) if window.std() != 0 else 0
-            win_rate = (window > 0).sum() / len(window) if len(window) > 0 else 0
+        Windows start at range(0, len(returns) - window_size, step_size). Every window's
+        Sharpe ratio and win rate come from cumulative sums and its max drawdown from a
+        strided view of log wealth, so all windows (and all columns) are computed at once.
+        
+        Args:
+            returns: Periodic returns of one strategy (Series) or of several strategies as
+                columns (DataFrame or 2-D array); NaNs count as flat periods
+            window_size: Periods per window
+            step_size: Periods between window starts
             
-            cumulative = (1 + window).cumprod()
-            running_max = cumulative.expanding().max()
-            drawdown = (cumulative - running_max) / running_max
-            max_dd = drawdown.min()
+        Returns:
+            Dict of 'periods' (window start offsets) and per-window 'sharpe_ratios',
+            'win_rates' and 'max_drawdowns': lists for a Series, DataFrames indexed by
+            period with one column per strategy otherwise
+        """
+        values = np.asarray(returns, dtype=np.float64)
+        single = values.ndim == 1
+        if single:
+            values = values[:, None]
+        values = np.nan_to_num(values, nan=0.0)
+        starts = np.arange(0, len(values) - window_size, step_size)
+        
+        if len(starts):
+            sharpe, win_rate, max_dd = self._window_metrics(values, starts, window_size)
+        else:
+            sharpe = win_rate = max_dd = np.empty((0, values.shape[1]))
+        
+        if single:
+            return {
+                'periods': starts.tolist(),
+                'sharpe_ratios': sharpe[:, 0].tolist(),
+                'win_rates': win_rate[:, 0].tolist(),
+                'max_drawdowns': max_dd[:, 0].tolist()
+            }
+        columns = returns.columns if isinstance(returns, pd.DataFrame) else None
+        frame = lambda metric: pd.DataFrame(metric, index=pd.Index(starts, name='period'),
+                                            columns=columns)
+        return {
+            'periods': starts.tolist(),
+            'sharpe_ratios': frame(sharpe),
+            'win_rates': frame(win_rate),
+            'max_drawdowns': frame(max_dd)
+        }
+    
+    @staticmethod
+    def _window_metrics(values: np.ndarray, starts: np.ndarray, window: int,
+                        max_elements: int = 8_000_000) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(sharpe, win rate, max drawdown) arrays of shape (len(starts), n_columns)"""
+        ends = starts + window
+        
+        # Centering keeps the sum of squares from cancelling catastrophically
+        centered = values - values.mean(axis=0)
+        zero = np.zeros((1, values.shape[1]))
+        sums = np.vstack([zero, np.cumsum(centered, axis=0)])
+        squares = np.vstack([zero, np.cumsum(centered ** 2, axis=0)])
+        window_sum = sums[ends] - sums[starts]
+        window_sq = squares[ends] - squares[starts]
+        mean = window_sum / window + values.mean(axis=0)
+        variance = np.maximum((window_sq - window_sum ** 2 / window) / (window - 1), 0.0)
+        # Constant windows leave rounding residue (from the running sums) instead of zero
+        scale = window_sq / window + squares[-1] / len(values)
+        variance[variance <= 1e-10 * scale] = 0.0
+        std = np.sqrt(variance)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std != 0, mean / std * (252 ** 0.5), 0.0)
+        
+        wins = np.vstack([zero, np.cumsum(values > 0, axis=0)])
+        win_rate = (wins[ends] - wins[starts]) / window
+        
+        # Drawdown from the window's running peak: wealth ratios are log-wealth differences
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_wealth = np.cumsum(np.log1p(values), axis=0)
+        windows = sliding_window_view(log_wealth, window, axis=0)  # (T - window + 1, cols, window)
+        max_dd = np.empty((len(starts), values.shape[1]))
+        chunk = max(1, max_elements // (values.shape[1] * window))
+        for i in range(0, len(starts), chunk):
+            block = windows[starts[i:i + chunk]]
+            peaks = np.maximum.accumulate(block, axis=-1)
+            max_dd[i:i + chunk] = np.expm1(block - peaks).min(axis=-1)
+        return sharpe, win_rate, max_dd
+    
+    def bootstrap_confidence_intervals(self, returns: Union[pd.Series, pd.DataFrame, np.ndarray],
+                                       n_resamples: int = 1000, mean_block: float = 20.0,
+                                       confidence: float = 0.95, seed: Optional[int] = None,
+                                       n_workers: Optional[int] = None,
+                                       max_elements: int = 4_000_000) -> Union[Dict, pd.DataFrame]:
+        """
+        Stationary-bootstrap confidence intervals of Sharpe ratio and max drawdown
+        
+        Every resample draws one set of block indices shared by all strategies, so their
+        cross-correlation is preserved. Resamples are drawn in chunks of about
+        max_elements values and reduced in batch; chunk seeds are spawned from seed, so
+        results are the same with or without worker processes.
+        
+        Args:
+            returns: Periodic returns of one strategy (Series) or of several strategies as
+                columns (DataFrame or 2-D array); NaNs count as flat periods
+            n_resamples: Bootstrap resamples
+            mean_block: Mean block length in periods (geometric block lengths)
+            confidence: Two-sided interval coverage
+            seed: Seed for reproducible intervals
+            n_workers: Spread chunks over this many processes (in-process if None or 1)
+            max_elements: Resampled values held per chunk
             
-            results['periods'].append(i)
-            results['sharpe_ratios'].append(sharpe)
-            results['win_rates'].append(win_rate)
-            results['max_drawdowns'].append(max_dd)
+        Returns:
+            Dict of point estimates and interval bounds for a Series; for several
+            strategies a DataFrame with one such row per strategy
+        """
+        values = np.asarray(returns, dtype=np.float64)
+        single = values.ndim == 1
+        if single:
+            values = values[:, None]
+        values = np.nan_to_num(values, nan=0.0)
+        length, n_columns = values.shape
+        if length < 2:
+            raise ValueError("Need at least two returns to bootstrap")
+        
+        per_chunk = max(1, min(n_resamples, max_elements // (length * n_columns)))
+        sizes = [min(per_chunk, n_resamples - i) for i in range(0, n_resamples, per_chunk)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        data = _bootstrap_data(values)
         
-        return results
+        if n_workers is not None and n_workers > 1:
+            with ProcessPoolExecutor(n_workers, initializer=_init_bootstrap_worker,
+                                     initargs=(data,)) as pool:
+                chunks = list(pool.map(_bootstrap_chunk, sizes, [mean_block] * len(sizes), seeds))
+        else:
+            _init_bootstrap_worker(data)
+            try:
+                chunks = [_bootstrap_chunk(n, mean_block, s) for n, s in zip(sizes, seeds)]
+            finally:
+                _init_bootstrap_worker(None)
+        sharpe = np.concatenate([chunk[0] for chunk in chunks])
+        max_dd = np.concatenate([chunk[1] for chunk in chunks])
+        
+        point_sharpe, point_dd = _bootstrap_statistics(data, np.arange(length)[None, :])
+        tail = (1 - confidence) / 2
+        sharpe_bounds = np.quantile(sharpe, [tail, 1 - tail], axis=0)
+        dd_bounds = np.quantile(max_dd, [tail, 1 - tail], axis=0)
+        result = pd.DataFrame({
+            'sharpe': point_sharpe[0],
+            'sharpe_lower': sharpe_bounds[0],
+            'sharpe_upper': sharpe_bounds[1],
+            'sharpe_std': sharpe.std(axis=0, ddof=1),
+            'max_drawdown': point_dd[0],
+            'max_drawdown_lower': dd_bounds[0],
+            'max_drawdown_upper': dd_bounds[1],
+        }, index=returns.columns if isinstance(returns, pd.DataFrame) else None)
+        
+        if single:
+            return {name: float(value) for name, value in result.iloc[0].items()}
+        return result
     
     def permutation_test(self, returns: pd.Series, num_permutations: int = 1000) -> Dict:
         """Permutation test for statistical significance"""
-        import numpy as np
-        
         original_mean = returns.mean()
         permuted_means = []
         
@@ -5,59 +5,59 @@ import sys
 from pathlib import Path
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
 
 # Test imports
 try:
-    from core.position import Position, PositionSide
+    from src.core.position import Position, PositionSide
     print("✓ core.position imported successfully")
     
-    from core.portfolio import Portfolio
+    from src.core.portfolio import Portfolio
     print("✓ core.portfolio imported successfully")
     
-    from core.trade import Trade, TradeType
+    from src.core.trade import Trade, TradeType
     print("✓ core.trade imported successfully")
     
-    from data.ohlc_pipeline import OHLCPipeline
+    from src.data.ohlc_pipeline import OHLCPipeline
     print("✓ data.ohlc_pipeline imported successfully")
     
-    from data.fundamentals_pipeline import FundamentalsPipeline
+    from src.data.fundamentals_pipeline import FundamentalsPipeline
     print("✓ data.fundamentals_pipeline imported successfully")
     
-    from signals.signal_generator import SignalGenerator, Signal, SignalType
+    from src.signals.signal_generator import SignalGenerator, Signal, SignalType
     print("✓ signals.signal_generator imported successfully")
     
-    from signals.validator import SignalValidator
+    from src.signals.validator import SignalValidator
     print("✓ signals.validator imported successfully")
     
-    from execution.executor import TradeExecutor, ExecutionResult
+    from src.execution.executor import TradeExecutor, ExecutionResult
     print("✓ execution.executor imported successfully")
     
-    from execution.order_manager import OrderManager
+    from src.execution.order_manager import OrderManager
     print("✓ execution.order_manager imported successfully")
     
-    from risk.risk_manager import RiskManager, RiskLimits
+    from src.risk.risk_manager import RiskManager, RiskLimits
     print("✓ risk.risk_manager imported successfully")
     
-    from risk.position_sizer import PositionSizer
+    from src.risk.position_sizer import PositionSizer
     print("✓ risk.position_sizer imported successfully")
     
-    from backtesting.backtest_engine import BacktestEngine
+    from src.backtesting.backtest_engine import BacktestEngine
     print("✓ backtesting.backtest_engine imported successfully")
     
-    from backtesting.walk_forward import WalkForwardValidator
+    from src.backtesting.walk_forward import WalkForwardValidator
     print("✓ backtesting.walk_forward imported successfully")
     
-    from backtesting.permutation_test import PermutationTester
+    from src.backtesting.permutation_test import PermutationTester
     print("✓ backtesting.permutation_test imported successfully")
     
-    from watchlist.watchlist import Watchlist, AssetClass, WatchlistCategory
+    from src.watchlist.watchlist import Watchlist, AssetClass, WatchlistCategory
     print("✓ watchlist.watchlist imported successfully")
     
-    from watchlist.templates import populate_default_watchlists
+    from src.watchlist.templates import populate_default_watchlists
     print("✓ watchlist.templates imported successfully")
     
-    from watchlist.utils import print_watchlist_summary
+    from src.watchlist.utils import print_watchlist_summary
     print("✓ watchlist.utils imported successfully")
     
     print("\n" + "="*50)
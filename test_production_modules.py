@@ -7,11 +7,11 @@ import sys
 from pathlib import Path
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
 
 def test_multi_source_pipeline():
     """Test multi-source data pipeline"""
-    from data.multi_source_pipeline import MultiSourcePipeline, FMPConnector, YahooConnector
+    from src.data.multi_source_pipeline import MultiSourcePipeline, FMPConnector, YahooConnector
     
     pipeline = MultiSourcePipeline()
     assert hasattr(pipeline, 'fetch_market_data')
@@ -21,7 +21,7 @@ def test_multi_source_pipeline():
 
 def test_duckdb_analytics():
     """Test DuckDB analytics engine"""
-    from analytics.duckdb_analytics import DuckDBAnalytics
+    from src.analytics.duckdb_analytics import DuckDBAnalytics
     
     db = DuckDBAnalytics()
     assert hasattr(db, 'get_momentum_screen')
@@ -33,7 +33,7 @@ def test_duckdb_analytics():
 
 def test_feature_store():
     """Test feature store"""
-    from feature_store.features import FeatureStore, FeatureEngineering, TechnicalFeatures, FundamentalFeatures
+    from src.feature_store.features import FeatureStore, FeatureEngineering, TechnicalFeatures, FundamentalFeatures
     
     store = FeatureStore()
     fe = FeatureEngineering()
@@ -47,7 +47,7 @@ def test_feature_store():
 
 def test_technical_features():
     """Test technical analysis features"""
-    from feature_store.features import TechnicalFeatures
+    from src.feature_store.features import TechnicalFeatures
     import pandas as pd
     import numpy as np
     
@@ -68,7 +68,7 @@ def test_technical_features():
 
 def test_optuna_tuner():
     """Test Optuna optimization"""
-    from optimization.optuna_tuner import SignalOptimizer, ParameterTuner
+    from src.optimization.optuna_tuner import SignalOptimizer, ParameterTuner
     
     optimizer = SignalOptimizer()
     tuner = ParameterTuner()
@@ -83,11 +83,11 @@ def test_optuna_tuner():
 def test_prefect_flows():
     """Test Prefect orchestration (optional)"""
     try:
-        from orchestration.prefect_flows import nightly_data_pipeline, hourly_market_check
+        from src.orchestration.prefect_flows import nightly_data_pipeline, hourly_market_check
         print("✅ prefect_flows (with Prefect)")
     except ImportError:
         # Prefect not installed, test fallback
-        from orchestration.prefect_flows import nightly_data_pipeline
+        from src.orchestration.prefect_flows import nightly_data_pipeline
         print("✅ prefect_flows (fallback mode)")
 
 
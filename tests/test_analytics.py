@@ -0,0 +1,560 @@
+"""Tests for DuckDB analytics layer"""
+
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.analytics.duckdb_analytics import DuckDBAnalytics
+
+
+def make_bars(symbols, periods=30, start='2024-01-01', seed=0):
+    """Random-walk daily bars for each symbol"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for symbol in symbols:
+        close = 100 + np.cumsum(rng.normal(0, 1, periods))
+        frames.append(pd.DataFrame({
+            'date': pd.date_range(start, periods=periods),
+            'symbol': symbol,
+            'open': close,
+            'high': close + 1,
+            'low': close - 1,
+            'close': close,
+            'volume': rng.integers(1_000, 10_000, periods),
+            'adj_close': close
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+@pytest.fixture
+def db():
+    analytics = DuckDBAnalytics(':memory:')
+    yield analytics
+    analytics.close()
+
+
+@pytest.mark.parametrize("keyed", [True, False])
+def test_upsert_replaces_existing_rows(keyed):
+    db = DuckDBAnalytics(':memory:', keyed_market_data=keyed)
+    bars = make_bars(['AAPL', 'MSFT'])
+    db.upsert_market_data(bars)
+
+    updated = bars.iloc[:5].assign(close=1.0)
+    assert db.upsert_market_data(updated) == 5
+
+    count, ones = db.conn.execute(
+        "SELECT COUNT(*), COUNT(*) FILTER (WHERE close = 1.0) FROM market_data"
+    ).fetchone()
+    assert (count, ones) == (60, 5)
+
+
+def test_insert_keeps_existing_rows(db):
+    bars = make_bars(['AAPL'])
+    assert db.insert_market_data(bars) == 30
+    assert db.insert_market_data(bars.assign(close=1.0)) == 0
+    assert db.conn.execute("SELECT MIN(close) FROM market_data").fetchone()[0] > 1.0
+
+
+def test_upsert_dedups_batch_last_wins(db):
+    bars = make_bars(['AAPL'], periods=3)
+    duplicate = bars.iloc[[0]].assign(close=42.0)
+    db.upsert_market_data(pd.concat([bars, duplicate]))
+
+    rows = db.conn.execute("SELECT close FROM market_data ORDER BY date").fetchall()
+    assert len(rows) == 3
+    assert rows[0][0] == 42.0
+
+
+def test_failed_upsert_releases_the_batch(db):
+    bars = make_bars(['AAPL'], periods=3)
+    with pytest.raises(duckdb.Error):
+        db.upsert_market_data(bars.assign(volume=2 ** 40))  # overflows INTEGER
+    with pytest.raises(duckdb.CatalogException):
+        db.conn.execute("SELECT COUNT(*) FROM market_data_batch")
+    assert db.upsert_market_data(bars) == 3
+    assert db.conn.execute("SELECT COUNT(*) FROM market_data").fetchone()[0] == 3
+
+
+def test_lake_appends_only_new_partitions(tmp_path):
+    db = DuckDBAnalytics(':memory:', lake_path=tmp_path / "lake", n_buckets=4)
+    db.insert_market_data(make_bars(['AAPL', 'MSFT'], periods=10, start='2023-12-27'))
+    before = {p: p.stat().st_mtime_ns for p in db.lake.files('market_data')}
+
+    # Overlapping re-delivery plus one new day: only the new day is written
+    assert db.insert_market_data(make_bars(['AAPL'], periods=11, start='2023-12-27')) == 1
+    after = db.lake.files('market_data')
+    assert all(p in after and p.stat().st_mtime_ns == m for p, m in before.items())
+    assert len(after) == len(before) + 1
+
+    loaded = db.load_market_data(['AAPL'], start_date='2024-01-01')
+    assert len(loaded) == 6
+    assert set(loaded['symbol']) == {'AAPL'}
+    db.close()
+
+
+def test_lake_replace_rewrites_touched_partitions(tmp_path):
+    db = DuckDBAnalytics(':memory:', lake_path=tmp_path / "lake")
+    db.insert_market_data(make_bars(['AAPL', 'MSFT'], periods=5))
+    db.upsert_market_data(make_bars(['AAPL'], periods=2).assign(close=1.0))
+
+    rows = db.conn.execute(
+        "SELECT symbol, COUNT(*), MIN(close) FROM market_data GROUP BY symbol ORDER BY symbol"
+    ).fetchall()
+    assert rows[0][:2] == ('AAPL', 5) and rows[0][2] == 1.0
+    assert rows[1][:2] == ('MSFT', 5) and rows[1][2] > 1.0
+
+    fundamentals = pd.DataFrame({
+        'symbol': ['AAPL', 'MSFT'], 'market_cap': [3e12, 2e12], 'pe_ratio': [30.0, 35.0],
+        'dividend_yield': [0.5, 0.8], 'fifty_two_week_high': [200.0, 400.0],
+        'fifty_two_week_low': [150.0, 300.0], 'beta': [1.2, 0.9], 'book_value': [4.0, 30.0],
+        'updated_date': pd.to_datetime(['2024-01-01', '2024-01-01'])
+    })
+    db.insert_fundamentals(fundamentals)
+    db.insert_fundamentals(fundamentals.iloc[[0]].assign(
+        pe_ratio=10.0, updated_date=pd.Timestamp('2025-01-01')))
+    assert db.conn.execute(
+        "SELECT symbol, pe_ratio FROM fundamentals ORDER BY symbol"
+    ).fetchall() == [('AAPL', 10.0), ('MSFT', 35.0)]
+    db.close()
+
+
+def test_correlation_matrix_matches_pandas(db):
+    start = str((pd.Timestamp.today() - pd.Timedelta(days=120)).date())
+    db.insert_market_data(make_bars(['AAPL', 'MSFT', 'NVDA'], periods=100, start=start))
+    closes = db.load_market_data().pivot(index='date', columns='symbol', values='close')
+    returns = closes.astype(float).pct_change().dropna()
+
+    corr = db.get_correlation_matrix(['AAPL', 'MSFT', 'NVDA'])
+    assert corr.values.dtype == np.float32
+    np.testing.assert_allclose(corr.values, returns.corr().values, atol=1e-5)
+
+    ewma = db.get_correlation_matrix(['AAPL', 'MSFT'], halflife=10)
+    expected = returns[['AAPL', 'MSFT']].ewm(halflife=10).corr().iloc[-2:].values
+    np.testing.assert_allclose(ewma.values, expected, atol=1e-5)
+
+
+def expected_rolling_stats(bars: pd.DataFrame) -> pd.DataFrame:
+    """Reference rolling_stats computed with pandas"""
+    rows = []
+    for symbol, group in bars.sort_values('date').groupby('symbol'):
+        close = group['close'].astype(np.float32).astype(float).reset_index(drop=True)
+        returns = close.pct_change()
+        row = {'symbol': symbol, 'close': close.iloc[-1]}
+        for n in (20, 60, 252):
+            row[f'return_{n}'] = close.iloc[-1] / close.iloc[-n - 1] - 1 if len(close) > n else np.nan
+            row[f'volatility_{n}'] = returns.iloc[-n:].std() if len(close) > n else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize("lake", [False, True])
+def test_derived_tables_follow_incremental_inserts(lake, tmp_path):
+    db = DuckDBAnalytics(':memory:', lake_path=tmp_path / "lake" if lake else None)
+    bars = make_bars(['AAPL', 'MSFT'], periods=300)
+    bars = bars.assign(date=pd.to_datetime(bars['date']))
+    # Out of order: recent history first, then a backfill and a correction
+    db.insert_market_data(bars[bars['date'] >= '2024-06-01'])
+    db.insert_market_data(bars[bars['date'] < '2024-06-01'])
+    corrected = bars.copy()
+    corrected.loc[corrected['date'] == '2024-10-01', 'close'] *= 1.05
+    db.upsert_market_data(corrected[corrected['date'] == '2024-10-01'])
+
+    expected = expected_rolling_stats(corrected)
+    stats = db.get_rolling_stats()[expected.columns]
+    pd.testing.assert_frame_equal(stats, expected, check_dtype=False, rtol=1e-5)
+
+    latest = db.conn.execute("SELECT COUNT(*) FROM daily_returns").fetchone()[0]
+    assert latest == 600
+
+    screen = db.get_momentum_screen(min_return=-100, window=20)
+    assert set(screen['symbol']) == {'AAPL', 'MSFT'}
+    db.close()
+
+
+def test_deferred_refresh_matches_immediate(tmp_path):
+    bars = make_bars(['AAPL', 'MSFT'], periods=300)
+    batches = [bars.iloc[i::3] for i in range(3)]  # interleaved dates per batch
+
+    immediate = DuckDBAnalytics(':memory:')
+    for batch in batches:
+        immediate.insert_market_data(batch)
+
+    path = tmp_path / "bulk.duckdb"
+    deferred = DuckDBAnalytics(path)
+    for batch in batches:
+        deferred.insert_market_data(batch, refresh_derived=False)
+    assert deferred.get_rolling_stats().empty
+    deferred.close()
+
+    # The queue survives the process; the next open drains it
+    reopened = DuckDBAnalytics(path)
+    assert reopened.conn.execute("SELECT COUNT(*) FROM pending_refresh").fetchone()[0] == 0
+    pd.testing.assert_frame_equal(reopened.get_rolling_stats(), immediate.get_rolling_stats())
+
+    reopened.upsert_market_data(make_bars(['AAPL'], periods=301).tail(1), refresh_derived=False)
+    assert reopened.refresh_derived_tables() == 1
+    assert reopened.refresh_derived_tables() == 0
+    assert reopened.get_rolling_stats(['AAPL'])['days_252'].iloc[0] == 253
+    immediate.close()
+    reopened.close()
+
+
+def test_default_performance_paths_read_rolling_stats(db):
+    bars = make_bars(['AAPL', 'MSFT'], periods=100)
+    db.insert_market_data(bars)
+
+    perf = db.get_stock_performance('AAPL')
+    close = bars[bars['symbol'] == 'AAPL'].sort_values('date')['close'].astype(np.float32)
+    assert perf['trading_days'] == 100  # shorter than the 252-day window: whole history
+    assert perf['start_price'] == pytest.approx(close.iloc[0])
+    assert perf['end_price'] == pytest.approx(close.iloc[-1])
+    assert perf['high'] == pytest.approx(close.max()) and perf['low'] == pytest.approx(close.min())
+    assert perf['return_pct'] == pytest.approx((close.iloc[-1] / close.iloc[0] - 1) * 100, rel=1e-5)
+    assert db.get_stock_performance("AAPL' OR '1'='1") == {}
+
+    batch = db.get_performance_batch(window=20)
+    assert batch['symbol'].tolist() == ['AAPL', 'MSFT']
+    assert batch['trading_days'].tolist() == [21, 21]
+    assert batch['start_price'].iloc[0] == pytest.approx(close.iloc[-21])
+
+    screen = db.get_momentum_screen(min_return=-100)
+    assert set(screen['symbol']) == {'AAPL', 'MSFT'}
+    assert (screen['trading_days'] == 61).all()
+
+    db.insert_market_data(make_bars(['AAPL'], periods=101).tail(1))
+    assert db.get_stock_performance('AAPL')['trading_days'] == 101
+    with pytest.raises(ValueError):
+        db.get_momentum_screen(window=30)
+
+
+def test_value_screen_uses_latest_prices(db):
+    db.insert_market_data(make_bars(['AAPL', 'MSFT'], periods=10))
+    db.insert_fundamentals(pd.DataFrame({
+        'symbol': ['AAPL', 'MSFT'], 'market_cap': [3e12, 2e12], 'pe_ratio': [12.0, 35.0],
+        'dividend_yield': [0.5, 0.8], 'fifty_two_week_high': [200.0, 400.0],
+        'fifty_two_week_low': [150.0, 300.0], 'beta': [1.2, 0.9], 'book_value': [4.0, 30.0],
+        'updated_date': pd.to_datetime(['2024-01-01', '2024-01-01'])
+    }))
+
+    screen = db.get_value_screen(max_pe=15)
+    last_close = db.conn.execute(
+        "SELECT close FROM market_data WHERE symbol = 'AAPL' ORDER BY date DESC LIMIT 1"
+    ).fetchone()[0]
+    assert screen['symbol'].tolist() == ['AAPL']
+    assert screen['current_price'].iloc[0] == pytest.approx(last_close)
+
+
+def test_query_cache_hits_until_write(db):
+    db.insert_market_data(make_bars(['AAPL', 'MSFT'], periods=30))
+    first = db.get_rolling_stats()
+    first.loc[0, 'close'] = -1.0  # edits stay with the caller
+    second = db.get_rolling_stats()
+    assert second['close'].iloc[0] > 0
+    assert db.cache_stats()['hits'] == 1
+
+    # Same query and params hit the same entry
+    db.load_market_data(['AAPL'])
+    db.load_market_data(['AAPL'])
+    assert db.cache_stats()['hits'] == 2
+
+    db.insert_market_data(make_bars(['AAPL'], periods=31).tail(1))
+    assert len(db.load_market_data(['AAPL'])) == 31
+    assert db.get_rolling_stats()['date'].max() > second['date'].max()
+    stats = db.cache_stats()
+    assert stats['stale'] == 2 and stats['hits'] == 2
+
+    if int(pd.__version__.split('.')[0]) >= 3:
+        # Copy-on-write: hits share the cached buffers instead of copying them
+        third, fourth = db.get_rolling_stats(), db.get_rolling_stats()
+        assert np.shares_memory(third['volatility_20'].to_numpy(), fourth['volatility_20'].to_numpy())
+
+
+def test_query_cache_tracks_comma_joins_and_subqueries(db):
+    from src.analytics.query_cache import referenced_tables
+
+    assert referenced_tables("SELECT * FROM market_data m, symbol_sectors s WHERE m.symbol = s.symbol") == \
+        ('market_data', 'symbol_sectors')
+    assert referenced_tables("SELECT (SELECT MAX(close) FROM Latest_Prices), * FROM main.signals") == \
+        ('latest_prices', 'signals')
+
+    db.insert_market_data(make_bars(['AAPL', 'MSFT'], periods=5))
+    db.upsert_symbol_sectors(pd.DataFrame({'symbol': ['AAPL'], 'sector': ['Tech']}))
+    sql = """
+        SELECT s.sector, COUNT(*) AS n FROM market_data m, symbol_sectors s
+        WHERE m.symbol = s.symbol GROUP BY s.sector ORDER BY s.sector
+    """
+    assert db.query(sql)['n'].tolist() == [5]
+    db.upsert_symbol_sectors(pd.DataFrame({'symbol': ['MSFT'], 'sector': ['Software']}))
+    assert db.query(sql)['n'].tolist() == [5, 5]
+    assert db.cache_stats()['stale'] == 1
+
+    # Statements DuckDB cannot break into tables run uncached
+    db.query("PRAGMA table_info('market_data')")
+    db.query("PRAGMA table_info('market_data')")
+    assert db.cache_stats()['uncached'] == 2
+
+
+def test_query_cache_ttl_and_disable():
+    expiring = DuckDBAnalytics(':memory:', cache_ttl=0)
+    expiring.insert_market_data(make_bars(['AAPL']))
+    expiring.get_rolling_stats()
+    expiring.get_rolling_stats()
+    assert expiring.cache_stats()['expired'] == 1
+    expiring.close()
+
+    uncached = DuckDBAnalytics(':memory:', cache_size=0)
+    assert uncached.query_cache is None and uncached.cache_stats() == {}
+    uncached.close()
+
+
+def test_parallel_readers_use_pooled_cursors(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    db = DuckDBAnalytics(':memory:', lake_path=tmp_path / "lake", cache_size=0, read_pool_size=3)
+    db.insert_market_data(make_bars(['AAPL', 'MSFT', 'NVDA'], periods=20))
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        counts = list(pool.map(lambda s: len(db.load_market_data([s])), ['AAPL', 'MSFT', 'NVDA'] * 4))
+    assert counts == [20] * 12
+    assert db.read_pool.stats()['created'] <= 3
+
+    # Pooled cursors see lake files written after they were opened
+    db.insert_market_data(make_bars(['AAPL'], periods=21).tail(1))
+    assert len(db.load_market_data(['AAPL'])) == 21
+    assert db.get_stock_performance("AAPL' OR '1'='1", days=100_000) == {}
+    db.close()
+
+
+def test_snapshot_readers_follow_published_versions(tmp_path):
+    writer = DuckDBAnalytics(tmp_path / "staging.duckdb")
+    writer.insert_market_data(make_bars(['AAPL'], periods=10))
+    writer.publish_snapshot(tmp_path / "snapshots", keep=2)
+
+    reader = DuckDBAnalytics.from_snapshot(tmp_path / "snapshots")
+    assert len(reader.load_market_data()) == 10
+    with pytest.raises(PermissionError):
+        reader.insert_market_data(make_bars(['MSFT']))
+
+    # The writer keeps ingesting while the reader is open; nothing moves until a publish
+    writer.insert_market_data(make_bars(['MSFT'], periods=10))
+    assert not reader.refresh_snapshot()
+    writer.publish_snapshot(tmp_path / "snapshots", keep=2)
+    writer.publish_snapshot(tmp_path / "snapshots", keep=2)
+    assert reader.refresh_snapshot()
+    assert len(reader.load_market_data()) == 20
+    assert len(list((tmp_path / "snapshots" / "snapshots").glob("*.duckdb"))) == 2
+    reader.close()
+    writer.close()
+
+
+def test_snapshot_reads_while_another_process_holds_the_writer(tmp_path):
+    import subprocess
+    import sys
+
+    live, root = tmp_path / "live.duckdb", tmp_path / "snapshots"
+    with DuckDBAnalytics.writer(live, snapshot_root=root) as writer:
+        writer.insert_market_data(make_bars(['AAPL'], periods=10))
+
+    # An ingest process keeps the live database open (DuckDB's file lock excludes others)
+    root_dir = Path(__file__).parent.parent
+    holder = subprocess.Popen([sys.executable, "-c", (
+        f"import sys; sys.path.insert(0, {str(root_dir)!r})\n"
+        "from src.analytics.duckdb_analytics import DuckDBAnalytics\n"
+        f"db = DuckDBAnalytics({str(live)!r})\n"
+        "print('ready', flush=True)\n"
+        "sys.stdin.read()\n"
+    )], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == 'ready'
+        with pytest.raises(duckdb.IOException):
+            DuckDBAnalytics(live)
+
+        reader = DuckDBAnalytics.from_snapshot(root)
+        assert len(reader.load_market_data()) == 10
+        assert reader.get_stock_performance('AAPL')['trading_days'] == 10
+        reader.close()
+    finally:
+        holder.communicate("")
+    assert holder.returncode == 0
+
+
+def test_arrow_and_numpy_results(db):
+    bars = make_bars(['AAPL', 'MSFT'], periods=5)
+    db.insert_market_data(bars.drop(index=2))  # AAPL misses its third day
+
+    table = db.query_arrow("SELECT symbol, close FROM market_data WHERE symbol = ?", ['MSFT'])
+    assert table.num_rows == 5 and table.schema.field('close').type == 'float'
+
+    cols = db.query_numpy("SELECT close FROM market_data ORDER BY symbol, date")
+    assert cols['close'].dtype == np.float32 and not cols['close'].flags.writeable
+
+    dates, symbols, panel = db.load_price_panel(field='close')
+    expected = bars.pivot(index='date', columns='symbol', values='close').astype(np.float32)
+    expected.iloc[2, 0] = np.nan
+    assert symbols == ['AAPL', 'MSFT']
+    np.testing.assert_array_equal(dates, expected.index.values.astype('datetime64[D]'))
+    np.testing.assert_array_equal(panel, expected.values)
+
+    with pytest.raises(ValueError):
+        db.load_price_panel(field='symbol')
+
+
+def test_multifactor_screen_matches_pandas(db):
+    from src.analytics import screening
+
+    symbols = [f"S{i:02d}" for i in range(40)]
+    db.insert_market_data(make_bars(symbols, periods=80))
+    rng = np.random.default_rng(3)
+    db.insert_fundamentals(pd.DataFrame({
+        'symbol': symbols, 'market_cap': 1e9, 'pe_ratio': rng.uniform(-5, 40, 40),
+        'dividend_yield': 0.0, 'fifty_two_week_high': 0.0, 'fifty_two_week_low': 0.0,
+        'beta': 1.0, 'book_value': 1.0, 'updated_date': pd.Timestamp('2024-01-01')
+    }))
+    factors = [screening.momentum(60), screening.low_volatility(20, weight=0.5),
+               screening.earnings_yield(), screening.liquidity()]
+
+    result = db.get_multifactor_screen(factors, top_n=5)
+
+    # Reference: same pipeline in pandas
+    universe = db.get_rolling_stats().merge(db.query("SELECT * FROM fundamentals"), on='symbol')
+    bars = db.load_market_data()
+    bars = bars[bars['date'] > bars['date'].max() - pd.Timedelta(days=30)]
+    universe['liquidity'] = universe['symbol'].map(
+        np.log((bars['close'].astype(float) * bars['volume']).groupby(bars['symbol']).mean()))
+    universe['momentum_60'] = universe['return_60']
+    universe['earnings_yield'] = 1.0 / universe['pe_ratio'].astype(float)
+    universe = universe[universe['earnings_yield'] >= 0]
+    composite = 0.0
+    for f in factors:
+        x = universe[f.name].astype(float)
+        x = x.clip(x.quantile(0.01), x.quantile(0.99))
+        z = (x - x.mean()) / x.std()
+        composite = composite + f.weight * (z if f.higher_is_better else -z)
+    expected = (composite / 3.5).sort_values(ascending=False).head(5)
+
+    assert result['symbol'].tolist() == universe.loc[expected.index, 'symbol'].tolist()
+    np.testing.assert_allclose(result['composite'], expected.values, rtol=1e-6)
+    assert (result['earnings_yield'] >= 0).all()
+    assert result['composite_rank'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_query_stats_capture_timings_and_slow_plans():
+    from src.analytics import screening
+
+    db = DuckDBAnalytics(':memory:', profile=True, slow_query_ms=0, cache_size=0)
+    db.insert_market_data(make_bars(['AAPL', 'MSFT'], periods=30))
+    db.load_market_data(['AAPL'])
+    db.get_multifactor_screen([screening.momentum(20)])
+
+    stats = db.get_query_stats()
+    methods = {m['method']: m for m in stats['methods']}
+    assert methods['insert_market_data']['calls'] == 1
+    load = methods['load_market_data']
+    assert load['calls'] == 1 and load['queries'] == 1 and load['rows_returned'] == 30
+    assert load['rows_scanned'] >= 30 and sum(load['histogram'].values()) == 1
+    # The screen's internal query is attributed to the public method that ran it
+    assert methods['get_multifactor_screen']['queries'] == 1 and 'query' not in methods
+    assert stats['slow_queries'][0]['method'] == 'get_multifactor_screen'
+    assert 'Total Time' in stats['slow_queries'][0]['plan']
+
+    assert DuckDBAnalytics(':memory:').get_query_stats() == {}
+    db.close()
+
+
+def test_performance_batch_matches_single_symbol_queries(db):
+    start = str((pd.Timestamp.today() - pd.Timedelta(days=60)).date())
+    # Shuffled rows: first/last prices must follow dates, not insertion order
+    bars = make_bars(['AAPL', 'MSFT', 'NVDA'], periods=40, start=start).sample(frac=1, random_state=0)
+    db.insert_market_data(bars)
+
+    batch = db.get_performance_batch(['AAPL', 'NVDA', 'TSLA'], days=90)
+    assert batch['symbol'].tolist() == ['AAPL', 'NVDA']
+    for row in batch.to_dict('records'):
+        single = db.get_stock_performance(row['symbol'], days=90)
+        assert single['end_price'] == pytest.approx(row['end_price'])
+        assert single['return_pct'] == pytest.approx(row['return_pct'])
+        assert single['trading_days'] == row['trading_days'] == 40
+
+    aapl = bars[bars['symbol'] == 'AAPL'].sort_values('date')['close'].astype(np.float32)
+    assert batch['start_price'].iloc[0] == pytest.approx(aapl.iloc[0])
+    assert len(db.get_performance_batch(days=90)) == 3
+
+    screen = db.get_momentum_screen(min_return=-100, days=90)
+    assert set(screen['symbol']) == {'AAPL', 'MSFT', 'NVDA'}
+
+
+def test_pairs_scan_finds_cointegrated_pair(db):
+    from src.analytics.pairs import engle_granger_batch
+
+    rng = np.random.default_rng(8)
+    periods = 400
+    base = np.cumsum(rng.normal(0, 0.01, periods))
+    noise = np.zeros(periods)
+    for t in range(1, periods):
+        noise[t] = 0.6 * noise[t - 1] + rng.normal(0, 0.004)
+    log_prices = {
+        'AAA': 4.0 + 0.8 * base + noise,  # cointegrated with BBB, hedge ratio 0.8
+        'BBB': 4.5 + base,
+        'CCC': 4.0 + 0.5 * base + np.cumsum(rng.normal(0, 0.01, periods)),  # correlated, not cointegrated
+        'DDD': 4.0 + np.cumsum(rng.normal(0, 0.01, periods)),  # unrelated
+    }
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=periods)
+    bars = pd.concat([
+        pd.DataFrame({'date': dates, 'symbol': symbol, 'close': np.exp(values)})
+        for symbol, values in log_prices.items()
+    ], ignore_index=True)
+    db.upsert_market_data(bars)
+
+    pairs = db.get_pairs_scan(days=800, min_correlation=0.3)
+    tested = set(zip(pairs['symbol_a'], pairs['symbol_b']))
+    assert ('AAA', 'BBB') in tested and not any('DDD' in pair for pair in tested)
+    best = pairs.iloc[0]
+    assert (best['symbol_a'], best['symbol_b'], best['cointegrated']) == ('AAA', 'BBB', True)
+    assert best['hedge_ratio'] == pytest.approx(0.8, abs=0.05)
+    assert 0 < best['half_life'] < 10
+    assert not pairs.loc[pairs['symbol_a'] != 'AAA', 'cointegrated'].any()
+
+    # max_pairs bounds: none, exactly as many as survive, more than survive
+    assert db.get_pairs_scan(days=800, min_correlation=0.3, max_pairs=0).empty
+    assert len(db.get_pairs_scan(days=800, min_correlation=0.3, max_pairs=len(pairs))) == len(pairs)
+    assert len(db.get_pairs_scan(days=800, min_correlation=0.3, max_pairs=100)) == len(pairs)
+    assert db.get_pairs_scan(days=800, min_correlation=0.3, max_pairs=1)['symbol_a'].tolist() == ['AAA']
+    with pytest.raises(ValueError):
+        db.get_pairs_scan(max_pairs=-1)
+
+    # Batched ADF statistic matches a per-pair least-squares fit
+    prices = np.column_stack([log_prices['AAA'], log_prices['BBB']]).astype(np.float32).astype(np.float64)
+    centered = prices - prices.mean(axis=0)
+    stats = engle_granger_batch(centered, np.array([0]), np.array([1]), lags=2)
+    spread = centered[:, 0] - stats['hedge_ratio'][0] * centered[:, 1]
+    delta = np.diff(spread)
+    design = np.column_stack([spread[2:-1], delta[1:-1], delta[:-2]])
+    beta, residual, _, _ = np.linalg.lstsq(design, delta[2:], rcond=None)
+    se = np.sqrt(residual[0] / (len(design) - 3) * np.linalg.inv(design.T @ design)[0, 0])
+    assert stats['adf_stat'][0] == pytest.approx(beta[0] / se)
+
+
+def test_blockwise_correlation_uses_pairwise_complete_observations():
+    from src.analytics.correlation import blockwise_correlation, standardize
+
+    rng = np.random.default_rng(21)
+    common = rng.normal(0, 1, (400, 1))
+    returns = common + rng.normal(0, 0.5, (400, 6))
+    returns[rng.random((400, 6)) < 0.3] = np.nan
+    returns[:350, 2] = np.nan  # late listing
+    returns[:, 4] = np.nan
+    returns[:399, 4] = np.nan
+    returns[:, 5] = 0.01  # constant
+
+    corr = blockwise_correlation(returns, block_size=2)
+    expected = pd.DataFrame(returns).corr().to_numpy()
+    np.testing.assert_allclose(corr, expected, atol=1e-6)
+    assert np.isnan(corr[4]).all() and np.isnan(corr[5]).all()
+    # Imputing missing days at the mean (the complete-data path) shrinks them toward zero
+    assert np.nanmin(corr[:4, :4]) > 0.6
+    z = standardize(returns[:, :4], dtype=np.float64)
+    assert (z.T @ z)[0, 2] < 0.4
@@ -0,0 +1,63 @@
+"""Tests for the backtesting permutation tests"""
+
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.backtesting.permutation_test import PermutationTester, permute_bars
+
+
+def _bars(log_returns, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(log_returns))
+    open_ = np.concatenate([[100.0], close[:-1]]) * np.exp(rng.normal(0, 0.002, len(close)))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.005, len(close))))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.005, len(close))))
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': rng.integers(1000, 5000, len(close))},
+                        index=pd.date_range('2020-01-01', periods=len(close), freq='B'))
+
+
+def follow_last_bar(bars):
+    """Long after an up bar, short after a down bar"""
+    returns = bars['close'].pct_change()
+    return np.sign(returns.shift(1)) * returns
+
+
+def test_permute_bars_keeps_bar_structure():
+    bars = _bars(np.random.default_rng(1).normal(0, 0.01, 300))
+    path = permute_bars(bars, np.random.default_rng(2))
+
+    assert (path['high'] >= path[['open', 'close']].max(axis=1) - 1e-9).all()
+    assert (path['low'] <= path[['open', 'close']].min(axis=1) + 1e-9).all()
+    assert path.iloc[0].equals(bars.iloc[0])
+    assert path['close'].iloc[-1] == pytest.approx(bars['close'].iloc[-1])
+    assert sorted(path['volume']) == sorted(bars['volume'])
+    assert not np.allclose(path['close'], bars['close'])
+
+
+def test_price_path_permutation_finds_serial_edge():
+    rng = np.random.default_rng(3)
+    noise = rng.normal(0, 0.01, 600)
+    trending = np.empty_like(noise)
+    trending[0] = noise[0]
+    for t in range(1, len(noise)):
+        trending[t] = 0.4 * trending[t - 1] + noise[t]
+
+    edge = PermutationTester.test_price_paths(_bars(trending), follow_last_bar, 99, seed=4)
+    assert edge['significant'] and edge['p_value'] == pytest.approx(0.01)
+    assert edge['original_sharpe'] > edge['permutation_mean'] + 3 * edge['permutation_std']
+
+    no_edge = PermutationTester.test_price_paths(_bars(noise), follow_last_bar, 99, seed=4)
+    assert no_edge['p_value'] > 0.05
+
+    # Spawned per-chunk seeds make worker processes reproduce the in-process run
+    parallel = PermutationTester.test_price_paths(_bars(noise), follow_last_bar, 99, seed=4,
+                                                  n_workers=2, chunk_size=10)
+    serial = PermutationTester.test_price_paths(_bars(noise), follow_last_bar, 99, seed=4,
+                                                chunk_size=10)
+    np.testing.assert_array_equal(parallel['permuted_sharpes'], serial['permuted_sharpes'])
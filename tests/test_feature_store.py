@@ -0,0 +1,86 @@
+"""Tests for feature store and compact dtype mode"""
+
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.feature_store.features import FeatureEngineering
+from src.feature_store.compact import (compact_frame, check_precision, decode_dates, encode_dates,
+                                   float32_error, memory_usage, NAT_DAY)
+
+
+@pytest.fixture
+def ohlcv():
+    """Random-walk OHLCV frame"""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 1, 300))
+    return pd.DataFrame({
+        'date': pd.date_range('2023-01-02', periods=300),
+        'symbol': ['AAPL'] * 150 + ['MSFT'] * 150,
+        'open': close + rng.normal(0, 0.5, 300),
+        'high': close + 1.0,
+        'low': close - 1.0,
+        'close': close,
+        'volume': rng.integers(1_000_000, 5_000_000, 300)
+    })
+
+
+def test_compact_features_match_float64_path(ohlcv, tmp_path):
+    """Compact features stay within float32 tolerance of the float64 path"""
+    full = FeatureEngineering(cache_dir=tmp_path).create_price_features(ohlcv)
+    compact = FeatureEngineering(compact=True, cache_dir=tmp_path).create_price_features(ohlcv)
+
+    assert all(dtype == np.float32 for dtype in compact.dtypes)
+    errors = check_precision(full, compact)
+    assert max(errors.values()) < 1e-6
+    assert memory_usage(compact) < memory_usage(full)
+
+
+def test_compact_frame_encodes_symbols_and_dates(ohlcv):
+    """Symbols become categorical and dates int32 day offsets"""
+    compact = compact_frame(ohlcv)
+
+    assert isinstance(compact['symbol'].dtype, pd.CategoricalDtype)
+    assert compact['date'].dtype == np.int32
+    assert compact['volume'].dtype == np.int32
+    assert (decode_dates(compact['date']) == pd.DatetimeIndex(ohlcv['date'])).all()
+
+
+def test_compact_keeps_float64_when_precision_lost():
+    """Columns that float32 cannot represent stay float64"""
+    df = pd.DataFrame({'big': [1e39, 2e39], 'small': [1.5, 2.5]})
+    compact = compact_frame(df)
+
+    assert compact['big'].dtype == np.float64
+    assert compact['small'].dtype == np.float32
+
+
+def test_compact_rejects_underflow_and_honours_tighter_rtol():
+    """Values that underflow float32 are caught; rtol=0 keeps anything inexact"""
+    df = pd.DataFrame({'tiny': [1e-40, 3e-42], 'zero': [0.0, 0.0], 'price': [101.37, 99.12]})
+    assert float32_error(df['price'].to_numpy()) <= 2.0 ** -24
+    assert float32_error(df['tiny'].to_numpy()) > 1e-6  # subnormal in float32
+
+    compact = compact_frame(df)
+    assert compact['tiny'].dtype == np.float64
+    assert compact['zero'].dtype == np.float32
+    assert compact['price'].dtype == np.float32
+
+    exact = compact_frame(df.assign(half=[0.5, 0.25]), rtol=0.0)
+    assert exact['price'].dtype == np.float64
+    assert exact['half'].dtype == np.float32
+
+
+def test_encode_dates_maps_nat_to_sentinel():
+    """Missing dates survive a round trip as NaT"""
+    dates = pd.Series([pd.Timestamp('2024-03-01'), pd.NaT, pd.Timestamp('1969-12-31')])
+    offsets = encode_dates(dates)
+
+    assert offsets.tolist() == [19783, NAT_DAY, -1]
+    decoded = decode_dates(offsets)
+    assert decoded[0] == pd.Timestamp('2024-03-01') and decoded[2] == pd.Timestamp('1969-12-31')
+    assert pd.isna(decoded[1])
@@ -0,0 +1,89 @@
+"""Tests for the shared indicator kernels"""
+
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src import indicators
+from src.feature_store.features import TechnicalFeatures
+from src.signals.signal_generator import SignalGenerator
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(11)
+    return pd.Series(100 + np.cumsum(rng.normal(0, 1, 250)),
+                     index=pd.date_range('2024-01-01', periods=250))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    indicators.clear_cache()
+    yield
+    indicators.clear_cache()
+
+
+def test_rsi_matches_reference(prices):
+    """Kernel RSI equals the rolling-mean gain/loss formula"""
+    delta = prices.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    expected = 100 - 100 / (1 + gain / (loss + 1e-10))
+
+    pd.testing.assert_series_equal(indicators.rsi(prices, 14), expected, check_names=False)
+
+
+def test_modules_share_one_computation(prices):
+    """Feature store and signal generator hit the same cached SMA"""
+    TechnicalFeatures.moving_average(prices, 20, name="CLOSE")
+    SignalGenerator().momentum_signal(prices, fast_period=20, slow_period=50)
+
+    stats = indicators.cache_stats()
+    assert stats['hits'] >= 1
+    assert stats['misses'] == 2  # sma(20) and sma(50)
+
+
+def test_renaming_result_does_not_touch_cache(prices):
+    first = TechnicalFeatures.relative_strength_index(prices, 14)
+    second = indicators.rsi(prices, 14)
+
+    assert first.name == "RSI14"
+    assert second.name is None
+
+
+def test_fingerprint_tracks_content(prices):
+    changed = prices.copy()
+    changed.iloc[-1] += 1.0
+
+    assert indicators.fingerprint(prices) == indicators.fingerprint(prices.rename("x"))
+    assert indicators.fingerprint(prices) != indicators.fingerprint(changed)
+
+
+def test_cache_keys_on_buffer_identity(prices):
+    """Views of one buffer share entries; copies and edited end values do not"""
+    frame = prices.to_frame('close')
+    indicators.sma(frame['close'], 10)
+    indicators.sma(frame['close'], 10)
+    assert indicators.cache_stats()['hits'] == 1
+
+    indicators.sma(prices.copy(), 10)
+    assert indicators.cache_stats()['misses'] == 2
+
+    edited = prices.copy()
+    before = indicators.sma(edited, 5).iloc[-1]
+    edited.iloc[-1] += 5.0
+    assert indicators.sma(edited, 5).iloc[-1] == pytest.approx(before + 1.0)
+
+
+def test_in_place_edits_of_results_do_not_reach_cache(prices):
+    first = indicators.sma(prices, 20)
+    first.iloc[-1] = -1.0
+    first.fillna(0.0, inplace=True)
+
+    second = indicators.sma(prices, 20)
+    assert second.iloc[-1] == pytest.approx(prices.iloc[-20:].mean())
+    assert second.isna().sum() == 19
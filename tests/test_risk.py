@@ -0,0 +1,597 @@
+"""Tests for risk controls"""
+
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.risk.risk_manager import RiskLimits, RiskManager
+
+
+@pytest.mark.parametrize("daily_pnl, scale", [(-500.0, 1.0), (-5000.0, 1.0), (0.0, 3.0)])
+def test_batch_validation_matches_scalar_checks(daily_pnl, scale):
+    rng = np.random.default_rng(0)
+    orders = rng.normal(0, 6000, 200) * scale
+    manager = RiskManager()
+
+    batch = manager.validate_trades_batch(100_000, orders, daily_pnl=daily_pnl)
+    gross = np.abs(orders).sum()
+    for i, order in enumerate(orders):
+        approved, reason = manager.validate_trade(100_000, gross, abs(order), daily_pnl)
+        assert (batch.approved[i], batch.reasons[i]) == (approved, reason)
+    assert batch.leverage == pytest.approx(gross / 100_000)
+
+
+def test_batch_validation_sectors_and_reducing_orders():
+    manager = RiskManager(RiskLimits(max_position_size=0.2, max_leverage=1.0, max_sector_exposure=0.3))
+    manager.sector_exposure = {'Tech': 25_000.0, 'Energy': 10_000.0}
+    orders = pd.Series({'AAPL': 5_000.0, 'MSFT': -2_000.0, 'XOM': 8_000.0, 'NEW': 30_000.0})
+    current = pd.Series({'AAPL': 15_000.0, 'MSFT': 10_000.0, 'XOM': 10_000.0})
+    sectors = {'AAPL': 'Tech', 'MSFT': 'Tech', 'XOM': 'Energy'}
+
+    result = manager.validate_trades_batch(100_000, orders, current, sectors=sectors,
+                                           gross_exposure=60_000.0)
+
+    # Tech: 25k + 5k - 2k = 28k stays under 30k; Energy 18k; gross 60k + 41k > 1x
+    assert result.sector_exposure == {'Tech': 28_000.0, 'Energy': 18_000.0}
+    assert result.leverage == pytest.approx(1.01)
+    frame = result.to_frame()
+    assert frame['reason'].to_dict() == {
+        'AAPL': "Leverage exceeds limit",
+        'MSFT': "Trade approved",  # reduces exposure
+        'XOM': "Leverage exceeds limit",
+        'NEW': "Position size exceeds limit",
+    }
+
+    manager.sector_exposure['Tech'] = 29_000.0
+    result = manager.validate_trades_batch(1_000_000, orders, current, sectors=sectors)
+    assert result.reasons.tolist() == ["Trade approved"] * 4
+    result = manager.validate_trades_batch(100_000, orders.drop('NEW'), current, sectors=sectors,
+                                           gross_exposure=20_000.0)
+    assert result.reasons.tolist() == ["Sector exposure exceeds limit", "Trade approved", "Trade approved"]
+
+
+def test_batch_validation_lets_oversized_positions_shrink():
+    manager = RiskManager(RiskLimits(max_position_size=0.1))
+    current = np.array([25_000.0, 25_000.0, -25_000.0, 5_000.0])
+    orders = np.array([-10_000.0, 5_000.0, 10_000.0, -20_000.0])
+
+    result = manager.validate_trades_batch(100_000, orders, current)
+    # Trimmed long, grown long, covered short, flipped into a larger short
+    assert result.position_ok.tolist() == [True, False, True, False]
+    assert result.reasons.tolist() == ["Trade approved", "Position size exceeds limit",
+                                       "Trade approved", "Position size exceeds limit"]
+
+
+def test_batch_validation_sector_inputs_for_array_orders():
+    manager = RiskManager(RiskLimits(max_position_size=1.0, max_sector_exposure=0.3))
+    manager.sector_exposure = {'Tech': 25_000.0}
+    orders = np.array([10_000.0, 10_000.0])
+
+    result = manager.validate_trades_batch(100_000, orders, sectors=['Tech', 'Energy'])
+    assert result.sector_exposure == {'Tech': 35_000.0, 'Energy': 10_000.0}
+    assert result.sector_ok.tolist() == [False, True]
+    # A mapping's keys cannot be matched to unlabelled orders
+    sectors = {'XOM': 'Energy', 'AAPL': 'Tech'}
+    for mapped in (sectors, pd.Series(sectors)):
+        with pytest.raises(ValueError):
+            manager.validate_trades_batch(100_000, orders, sectors=mapped)
+    with pytest.raises(ValueError):
+        manager.validate_trades_batch(100_000, orders, sectors=['Tech'])
+
+
+def test_batch_validation_seeds_sectors_from_current_positions():
+    manager = RiskManager(RiskLimits(max_position_size=1.0, max_sector_exposure=0.3))
+    orders = pd.Series({'AAPL': 5_000.0, 'MSFT': 5_000.0, 'XOM': -2_000.0})
+    current = pd.Series({'AAPL': 14_000.0, 'MSFT': 14_000.0, 'XOM': 10_000.0})
+    sectors = {'AAPL': 'Tech', 'MSFT': 'Tech', 'XOM': 'Energy'}
+
+    # No tracked book: Tech already holds 28k, so the buys take it to 38%
+    result = manager.validate_trades_batch(100_000, orders, current, sectors=sectors)
+    assert result.sector_exposure == {'Tech': 38_000.0, 'Energy': 8_000.0}
+    assert result.reasons.tolist() == ["Sector exposure exceeds limit"] * 2 + ["Trade approved"]
+    arrays = manager.validate_trades_batch(100_000, orders.to_numpy(), current.to_numpy(),
+                                           sectors=['Tech', 'Tech', 'Energy'])
+    assert arrays.sector_exposure == result.sector_exposure
+
+
+def test_ewma_correlation_tracker_matches_pandas():
+    from src.risk.correlation_tracker import EWMACorrelationTracker
+
+    rng = np.random.default_rng(4)
+    common = rng.normal(0, 0.01, (300, 1))
+    returns = pd.DataFrame(common + rng.normal(0, 0.01, (300, 4)), columns=list("ABCD"))
+    returns["D"] = rng.normal(0, 0.01, 300)
+    tracker = EWMACorrelationTracker(halflife=30, min_observations=10)
+    for _, row in returns.iterrows():
+        tracker.update(row.to_dict())
+
+    alpha = 1 - 0.5 ** (1 / 30)
+    expected = returns.ewm(alpha=alpha, adjust=False).corr().loc[returns.index[-1]]
+    np.testing.assert_allclose(tracker.correlation().to_numpy(), expected.to_numpy(), atol=1e-10)
+
+    value, pair = tracker.max_correlation(["A", "B", "C", "D"])
+    upper = expected.where(np.triu(np.ones((4, 4), dtype=bool), 1))
+    assert value == pytest.approx(upper.max().max()) and set(pair) <= {"A", "B", "C"}
+    assert np.isnan(tracker.max_correlation(["A", "ZZZ"])[0])
+
+
+def test_sentinel_flags_correlation_spike():
+    from src.agents.sentinel import SentinelAgent
+
+    sentinel = SentinelAgent({"correlation_halflife": 10, "correlation_min_observations": 10,
+                              "correlation_spike_delta": 0.3})
+    positions = {s: {"value": 10_000} for s in "ABC"}
+    rng = np.random.default_rng(6)
+    base = {"proposed_trades": [], "portfolio_value": 100_000, "portfolio_positions": positions,
+            "returns_history": list(rng.normal(0, 0.001, 100))}
+
+    for _ in range(200):  # independent holdings
+        decision = sentinel.process({**base, "asset_returns": dict(zip("ABC", rng.normal(0, 0.01, 3)))})
+    assert decision.decision_type == "APPROVE"
+    calm = decision.recommendation["risk_metrics"]
+    assert abs(calm["average_correlation"]) < 0.3 and calm["max_correlation"] < 0.95
+
+    for _ in range(15):  # everything moves together
+        shock = rng.normal(0, 0.03)
+        decision = sentinel.process({**base, "asset_returns": dict(zip("ABC", shock + rng.normal(0, 0.005, 3)))})
+    assert decision.decision_type == "VETO" and "Correlation spike" in decision.reasoning
+    assert decision.recommendation["risk_metrics"]["correlation_spike"] > 0.3
+
+
+def test_correlation_baseline_follows_holdings_only():
+    from src.agents.sentinel import SentinelAgent
+
+    sentinel = SentinelAgent({"correlation_halflife": 10, "correlation_min_observations": 10,
+                              "correlation_baseline_halflife": 20})
+    rng = np.random.default_rng(9)
+    base = {"proposed_trades": [], "portfolio_value": 100_000,
+            "returns_history": list(rng.normal(0, 0.001, 100))}
+
+    def step(held):
+        shock = rng.normal(0, 0.02)
+        returns = {"A": shock, "B": shock + rng.normal(0, 0.001)}  # lockstep pair
+        returns.update(zip("CD", rng.normal(0, 0.01, 2)))
+        positions = {s: {"value": 10_000} for s in held}
+        return sentinel.process({**base, "portfolio_positions": positions, "asset_returns": returns})
+
+    for _ in range(100):
+        step("ABCD")
+    tracker = sentinel.correlation_tracker
+    before = tracker.correlation(["C", "D"]).to_numpy()
+    tracker.retain(["C", "D", "ZZZ"])
+    np.testing.assert_array_equal(tracker.correlation().to_numpy(), before)
+    for _ in range(200):  # A and B sold; their returns keep arriving
+        decision = step("CD")
+    assert tracker.symbols == ["C", "D"]
+    metrics = decision.recommendation["risk_metrics"]
+    assert abs(metrics["correlation_spike"]) < 0.15
+    assert abs(tracker.baseline - metrics["average_correlation"]) < 0.15
+
+
+def test_var_engine_window_matches_numpy():
+    from src.risk.var_engine import VaREngine
+
+    rng = np.random.default_rng(7)
+    returns = rng.standard_t(4, 600) * 0.01
+    engine = VaREngine(window=250)
+    for i, value in enumerate(returns):
+        engine.update(value)
+        if i % 50 == 49:
+            window = returns[max(0, i - 249):i + 1]
+            assert engine.var() == pytest.approx(np.percentile(window, 5))
+            assert engine.var(0.99) == pytest.approx(np.percentile(window, 1))
+            tail = np.sort(window)[:int(np.ceil(round(0.05 * len(window), 9)))]
+            assert engine.cvar() == pytest.approx(tail.mean())
+
+    mean, std, skew, kurt = engine.moments()
+    window = pd.Series(returns[-250:])
+    assert (mean, std) == pytest.approx((window.mean(), window.std()))
+    assert skew == pytest.approx(window.skew(), rel=0.05, abs=0.02)
+    assert kurt == pytest.approx(window.kurt(), rel=0.05, abs=0.05)
+
+
+def test_var_engine_sync_folds_in_appended_returns():
+    from src.risk.var_engine import VaREngine
+
+    rng = np.random.default_rng(8)
+    history = list(rng.normal(0, 0.01, 300))
+    engine = VaREngine(window=100)
+    engine.sync(history)
+    assert len(engine) == 100
+    history.extend(rng.normal(0, 0.01, 5))
+    engine.sync(history)
+    assert engine._since_resync == 5  # only the appended returns were processed
+    assert engine.var() == pytest.approx(np.percentile(history[-100:], 5))
+
+    replaced = list(rng.normal(0, 0.02, 50))
+    engine.sync(replaced)
+    assert len(engine) == 50 and engine.var() == pytest.approx(np.percentile(replaced, 5))
+
+
+def test_sorted_window_matches_sorted_list():
+    from src.risk.var_engine import SortedWindow
+
+    rng = np.random.default_rng(12)
+    window, reference = SortedWindow(load=4), []
+    for value in np.round(rng.normal(0, 1, 2000), 1).tolist():  # plenty of duplicates
+        if reference and rng.random() < 0.45:
+            victim = reference[rng.integers(len(reference))]
+            window.remove(victim)
+            reference.remove(victim)
+        else:
+            window.add(value)
+            reference.append(value)
+        reference.sort()
+        k = int(rng.integers(len(reference))) if reference else 0
+        assert len(window) == len(reference)
+        if reference:
+            assert window[k] == reference[k] and window.head(k) == reference[:k]
+    assert list(window) == reference
+
+
+def test_var_engine_sync_uses_counters_labels_and_identity():
+    from collections import deque
+    from src.risk.var_engine import VaREngine
+
+    rng = np.random.default_rng(13)
+    returns = rng.normal(0, 0.01, 400)
+
+    # A bounded deque slides: same length every call, so only the counter tells what is new
+    engine = VaREngine(window=100)
+    recent = deque(returns[:100], maxlen=100)
+    engine.sync(recent, total=100)
+    for total in range(101, 131):
+        recent.append(returns[total - 1])
+        engine.sync(recent, total=total)
+    assert engine._since_resync == 30
+    assert engine.var() == pytest.approx(np.percentile(returns[30:130], 5))
+
+    # A replaced history that happens to end on the synced value is reloaded, not extended
+    engine = VaREngine(window=None)
+    history = list(returns[:200])
+    engine.sync(history)
+    replaced = list(rng.normal(0, 0.05, 250)) + [history[-1]]
+    engine.sync(replaced)
+    assert len(engine) == 251 and engine.var() == pytest.approx(np.percentile(replaced, 5))
+
+    # Dated Series: rows after the last synced label are new, even in a fresh object
+    dates = pd.bdate_range("2024-01-01", periods=400)
+    series = pd.Series(returns, index=dates)
+    engine = VaREngine(window=250)
+    engine.sync(series.iloc[:300])
+    engine.sync(series.iloc[50:310].copy())
+    assert engine._since_resync == 10
+    assert engine.var() == pytest.approx(np.percentile(returns[60:310], 5))
+
+
+def test_unbounded_var_engine_memory_is_bounded():
+    from src.risk.var_engine import VaREngine
+
+    rng = np.random.default_rng(14)
+    returns = rng.standard_t(4, 30_000) * 0.01
+    engine = VaREngine(window=None, max_exact=5_000, seed=2)
+    engine.update_many(returns[:5_000])
+    assert engine.sketch is None and engine.var() == pytest.approx(np.percentile(returns[:5_000], 5))
+    engine.update_many(returns[5_000:])
+    assert engine._sorted is None and sum(len(c) for c in engine.sketch._compactors) < 2000
+    rank = np.searchsorted(np.sort(returns), engine.var()) / len(returns)
+    assert abs(rank - 0.05) < 0.02
+
+    parametric = VaREngine(window=None, method='parametric')
+    parametric.load(returns)
+    assert parametric._sorted is None and parametric.sketch is None
+    mean, std = returns.mean(), returns.std(ddof=1)
+    assert parametric.moments()[:2] == pytest.approx((mean, std))
+    with pytest.raises(ValueError):
+        parametric.var(method='historical')
+
+
+def test_risk_monitor_keeps_var_engines_between_calls():
+    from scipy import stats
+    from src.portfolio.portfolio_manager import RiskMonitor
+
+    rng = np.random.default_rng(15)
+    returns = pd.Series(rng.normal(0.0005, 0.01, 500), index=pd.bdate_range("2023-01-02", periods=500))
+    monitor = RiskMonitor()
+    monitor.calculate_var(returns.iloc[:450], method='parametric')
+    value = monitor.calculate_var(returns, method='parametric')
+    assert value == pytest.approx(returns.mean() + returns.std() * stats.norm.ppf(0.05))
+    engine = monitor._var_engines['parametric', 0.95]
+    assert engine.sketch is None and engine._sorted is None
+    assert monitor.calculate_var(returns) == pytest.approx(np.percentile(returns, 5))
+
+
+def test_var_engine_parametric_modes():
+    from scipy import stats
+    from src.risk.var_engine import VaREngine
+
+    rng = np.random.default_rng(9)
+    returns = rng.normal(0.0005, 0.01, 2000)
+    engine = VaREngine(window=None, method='parametric')
+    engine.update_many(returns)
+    mean, std = returns.mean(), returns.std(ddof=1)
+    assert engine.var() == pytest.approx(mean + std * stats.norm.ppf(0.05))
+    assert engine.cvar() == pytest.approx(mean - std * stats.norm.pdf(stats.norm.ppf(0.05)) / 0.05)
+
+    # Negative skew pushes the Cornish-Fisher quantile further into the tail
+    skewed = -rng.lognormal(0, 0.5, 2000) * 0.01
+    engine = VaREngine(window=None, method='cornish_fisher')
+    engine.update_many(skewed)
+    assert engine.var() < engine.var(method='parametric')
+    assert engine.var() == pytest.approx(np.percentile(skewed, 5), rel=0.15)
+    assert engine.cvar() < engine.var()
+
+
+def test_kll_sketch_quantiles():
+    from src.risk.var_engine import VaREngine
+
+    rng = np.random.default_rng(10)
+    returns = rng.standard_t(3, 100_000) * 0.01
+    engine = VaREngine(window=None, sketch=True, seed=1)
+    engine.update_many(returns)
+    assert sum(len(c) for c in engine.sketch._compactors) < 2000
+    ordered = np.sort(returns)
+    for confidence in (0.9, 0.95, 0.99):
+        rank = np.searchsorted(ordered, engine.var(confidence)) / len(ordered)
+        assert abs(rank - (1 - confidence)) < 0.02
+    assert engine.cvar(0.95) == pytest.approx(ordered[:5000].mean(), rel=0.1)
+
+
+def test_sentinel_var_check_uses_engine():
+    from src.agents.sentinel import SentinelAgent
+
+    rng = np.random.default_rng(11)
+    history = list(rng.normal(0, 0.01, 300))
+    sentinel = SentinelAgent({"max_var_95": 5.0})
+    passed, var_pct = sentinel._check_var(history, 100_000)
+    assert passed and var_pct == pytest.approx(abs(np.percentile(history, 5)) * 100)
+    history.extend([-0.2] * 20)
+    passed, var_pct = sentinel._check_var(history, 100_000)
+    assert var_pct == pytest.approx(abs(np.percentile(history, 5)) * 100)
+
+
+def test_stress_engine_paths_factors_and_breaches():
+    from src.risk.stress import ScenarioSet, StressTestEngine
+
+    book = {"AAA": {"value": 60_000}, "BBB": {"value": 40_000}, "HEDGE": {"value": -20_000}}
+    crash = pd.DataFrame({"AAA": [0.05, -0.20, -0.15], "BBB": [0.0, -0.10, -0.05]})
+    rally = pd.DataFrame({"AAA": [0.10], "HEDGE": [0.10]})
+    scenarios = ScenarioSet.from_paths({"crash": crash, "rally": rally})
+    engine = StressTestEngine(max_loss_pct=0.10, max_drawdown_pct=0.12,
+                              factor_loadings=pd.DataFrame({"MKT": [1.2, 0.8, 1.0]},
+                                                           index=["AAA", "BBB", "HEDGE"]))
+    result = engine.run(scenarios, book, portfolio_value=100_000)
+
+    # Crash: P&L path 3k, -16k, -11k from a 103k peak; HEDGE is unshocked
+    assert result.at["crash", "pnl"] == pytest.approx(-11_000)
+    assert result.at["crash", "max_drawdown"] == pytest.approx(84_000 / 103_000 - 1)
+    assert result.at["crash", "worst_step"] == 1
+    assert result.at["crash", "coverage"] == pytest.approx(100 / 120)
+    assert result.loc["crash", ["loss_breach", "drawdown_breach"]].tolist() == [True, True]
+    # Rally: the shorter path holds its last step; BBB is NaN there, i.e. unshocked
+    assert result.at["rally", "pnl"] == pytest.approx(4_000)
+    assert result.at["rally", "max_drawdown"] == 0.0 and not result.at["rally", "breach"]
+
+    shocks = pd.DataFrame({"MKT": [-0.10, 0.02]}, index=["mkt_down", "mkt_up"])
+    result = engine.run([scenarios, ScenarioSet.from_shocks(shocks)], book, portfolio_value=100_000)
+    assert len(result) == 4
+    # Beta-weighted exposure: 1.2 * 60k + 0.8 * 40k - 1.0 * 20k = 84k
+    assert result.at["mkt_down", "pnl"] == pytest.approx(-8_400)
+    assert result.at["mkt_down", "coverage"] == pytest.approx(1.0)
+    summary = engine.summary(result)
+    assert summary["worst_scenario"] == "crash" and summary["breaches"] == 1
+
+
+def test_stress_engine_accepts_portfolio_manager_and_sampled_scenarios():
+    from src.portfolio.portfolio_manager import PortfolioManager
+    from src.risk.stress import ScenarioSet, StressTestEngine
+
+    manager = PortfolioManager()
+    manager.add_position("AAA", 100, 90.0, 100.0)
+    manager.add_position("BBB", 50, 200.0, 200.0)
+    covariance = pd.DataFrame([[4e-4, 2e-4], [2e-4, 4e-4]], index=["AAA", "BBB"], columns=["AAA", "BBB"])
+    scenarios = ScenarioSet.sampled(covariance, n_scenarios=20_000, horizon=5, seed=3)
+    assert scenarios.paths.shape == (20_000, 5, 2)
+    assert ScenarioSet.sampled(covariance, 10, seed=3).paths.tolist() == \
+        ScenarioSet.sampled(covariance, 10, seed=3).paths.tolist()
+
+    result = StressTestEngine().run(scenarios, manager)
+    expected = scenarios.paths[:, -1, :] @ np.array([10_000.0, 10_000.0])
+    np.testing.assert_allclose(result["pnl"], expected)
+    np.testing.assert_allclose(result["return"], expected / 20_000)
+    # Five steps of 2% vol at 0.5 correlation: ~3.9% volatility of the book
+    assert result["return"].std() == pytest.approx(0.02 * np.sqrt(5 * 0.75), rel=0.05)
+    assert (result["max_drawdown"] <= np.minimum(result["return"], 0) + 1e-12).all()
+
+
+def test_historical_and_rolling_scenarios_from_duckdb():
+    from src.analytics.duckdb_analytics import DuckDBAnalytics
+    from src.risk.stress import historical_scenarios, rolling_scenarios
+
+    dates = pd.bdate_range("2020-02-03", "2020-04-30")
+    prices = {"AAA": np.linspace(100, 60, len(dates)), "BBB": np.linspace(50, 55, len(dates))}
+    bars = pd.concat([pd.DataFrame({"date": dates, "symbol": s, "close": p}) for s, p in prices.items()],
+                     ignore_index=True)
+    bars = bars[~((bars["symbol"] == "BBB") & (bars["date"] == "2020-03-02"))]  # a gap
+    analytics = DuckDBAnalytics(":memory:")
+    try:
+        analytics.upsert_market_data(bars)
+        library = historical_scenarios(analytics)
+        assert library.names == ["covid_crash_2020"]
+        start, end = dates.get_loc(pd.Timestamp("2020-02-19")), dates.get_loc(pd.Timestamp("2020-03-23"))
+        assert library.paths.shape == (1, end - start, 2)
+        total = library.shocks.loc["covid_crash_2020"]
+        assert total["AAA"] == pytest.approx(prices["AAA"][end] / prices["AAA"][start] - 1)
+        assert total["BBB"] == pytest.approx(prices["BBB"][end] / prices["BBB"][start] - 1)
+        assert np.isfinite(library.paths).all()  # the gap is forward-filled
+
+        rolling = rolling_scenarios(analytics, ["AAA"], horizon=5, days=100_000, step=2)
+        assert len(rolling) == len(range(0, len(dates) - 5, 2)) and rolling.paths.shape[1:] == (5, 1)
+        assert rolling.paths[0, -1, 0] == pytest.approx(prices["AAA"][5] / prices["AAA"][0] - 1)
+        assert rolling.names[1] == f"rolling_{dates[2].date()}"
+    finally:
+        analytics.close()
+
+
+def test_sentinel_stress_check_vetoes_post_trade_book():
+    from src.agents.sentinel import SentinelAgent
+    from src.risk.stress import ScenarioSet
+
+    shocks = pd.DataFrame({"AAA": [-0.30, 0.05], "BBB": [-0.05, 0.0]}, index=["crash", "calm"])
+    sentinel = SentinelAgent({"stress_scenarios": ScenarioSet.from_shocks(shocks),
+                              "max_stress_loss_pct": 10.0, "max_position_size": 0.5})
+    rng = np.random.default_rng(12)
+    base = {"portfolio_value": 100_000, "returns_history": list(rng.normal(0, 0.001, 100)),
+            "portfolio_positions": {"AAA": {"value": 20_000}, "BBB": {"value": 30_000}}}
+
+    decision = sentinel.process({**base, "proposed_trades": [
+        {"symbol": "AAA", "side": "sell", "value": 10_000}]})
+    assert decision.decision_type == "APPROVE"
+    assert decision.recommendation["risk_metrics"]["stress_worst_return"] == pytest.approx(-0.045)
+
+    decision = sentinel.process({**base, "proposed_trades": [
+        {"symbol": "AAA", "side": "buy", "value": 20_000}]})
+    assert decision.decision_type == "VETO" and "Stress test violation" in decision.reasoning
+    assert sentinel.last_stress_results.at["crash", "pnl"] == pytest.approx(-13_500)
+
+
+def test_exposure_aggregator_tracks_fills_incrementally():
+    from src.risk.exposure import ExposureAggregator
+
+    loadings = pd.DataFrame({"MKT": [1.2, 0.9, 1.0], "SIZE": [-0.3, 0.5, 0.0]}, index=["AAPL", "XOM", "MSFT"])
+    exposure = ExposureAggregator({"AAPL": "Tech", "MSFT": "Tech", "XOM": "Energy"}, loadings,
+                                  resync_every=7)
+    rng = np.random.default_rng(13)
+    symbols = ["AAPL", "MSFT", "XOM", "GME"]
+    for _ in range(200):
+        exposure.on_fill(rng.choice(symbols), float(rng.integers(-50, 60)), float(rng.uniform(50, 150)))
+    exposure.mark({"AAPL": 120.0, "NOT_HELD": 1.0})
+
+    book = exposure.positions()
+    assert "NOT_HELD" not in book.index
+    np.testing.assert_allclose(book["value"], book["quantity"] * book["price"])
+    gross = book["value"].abs().groupby(book["sector"]).sum()
+    for sector, value in gross.items():
+        assert exposure.sector_exposure[sector] == pytest.approx(value)
+    assert exposure.sector_exposure.get("Unknown", 0) == pytest.approx(abs(exposure.value("GME")))
+    expected = loadings.reindex(book.index, fill_value=0.0).T @ book["value"]
+    np.testing.assert_allclose(exposure.factor_exposures(), expected, atol=1e-6)
+    assert exposure.gross == pytest.approx(book["value"].abs().sum())
+
+    exposure.set_sector("GME", "Retail")
+    assert exposure.sector_exposure["Unknown"] == pytest.approx(0.0, abs=1e-9)
+    assert exposure.sector_exposure["Retail"] == pytest.approx(abs(exposure.value("GME")))
+
+
+def test_risk_manager_sector_checks_read_live_exposure():
+    from src.risk.exposure import ExposureAggregator
+
+    exposure = ExposureAggregator({"AAPL": "Tech", "MSFT": "Tech", "XOM": "Energy"})
+    manager = RiskManager(RiskLimits(max_position_size=0.5, max_sector_exposure=0.3), exposure)
+    manager.record_fill("AAPL", 100, 200.0)
+    manager.record_fill("XOM", 100, 100.0)
+    assert manager.sector_exposure == {"Tech": 20_000.0, "Energy": 10_000.0}
+
+    # 100k book: Tech can grow by 10k
+    assert manager.check_sector_exposure("MSFT", 10_000, 100_000)
+    assert not manager.check_sector_exposure("MSFT", 10_001, 100_000)
+    assert manager.check_sector_exposure("XOM", 30_000, 100_000)
+    assert manager.validate_trade(100_000, 45_000, 15_000, 0.0, symbol="MSFT") == \
+        (False, "Sector exposure exceeds limit")
+    manager.record_fill("AAPL", -60, 200.0)  # Tech falls to 8k
+    assert manager.validate_trade(100_000, 33_000, 15_000, 0.0, symbol="MSFT") == (True, "Trade approved")
+
+    # Batch validation picks up sectors, current positions and gross from the aggregator
+    orders = pd.Series({"MSFT": 25_000.0, "XOM": -5_000.0, "AAPL": -8_000.0})
+    result = manager.validate_trades_batch(100_000, orders)
+    assert result.sector_exposure == pytest.approx({"Tech": 25_000.0, "Energy": 5_000.0})
+    assert result.leverage == pytest.approx(0.30)
+    assert result.approved.all()
+
+
+def test_portfolio_manager_feeds_position_changes_to_risk_manager():
+    from src.portfolio.portfolio_manager import PortfolioManager
+    from src.risk.exposure import ExposureAggregator
+
+    exposure = ExposureAggregator({"AAPL": "Tech", "MSFT": "Tech", "XOM": "Energy"})
+    risk = RiskManager(RiskLimits(max_sector_exposure=0.3), exposure)
+    book = PortfolioManager(risk_manager=risk)
+    book.add_position("AAPL", 100, 150.0, 200.0)
+    book.add_position("XOM", 100, 90.0, 100.0)
+    book.add_position("AAPL", 60, 150.0, 210.0)  # partial sale, marked at 210
+    assert exposure.quantities == {"AAPL": 60, "XOM": 100}
+    assert risk.sector_exposure == pytest.approx({"Tech": 12_600.0, "Energy": 10_000.0})
+    assert not risk.check_sector_exposure("MSFT", 20_000, 100_000)
+
+    book.remove_position("AAPL")
+    assert "AAPL" not in exposure.quantities and risk.sector_exposure["Tech"] == pytest.approx(0.0)
+    assert risk.check_sector_exposure("MSFT", 20_000, 100_000)
+    assert exposure.gross == pytest.approx(book.get_portfolio_value())
+
+    with pytest.raises(ValueError):
+        PortfolioManager(risk_manager=RiskManager())
+
+
+def test_sentinel_tracks_book_and_vetoes_sector_breach():
+    from src.agents.sentinel import SentinelAgent
+    from src.risk.exposure import ExposureAggregator
+
+    exposure = ExposureAggregator({"AAPL": "Tech", "MSFT": "Tech", "XOM": "Energy"})
+    risk = RiskManager(RiskLimits(max_sector_exposure=0.3), exposure)
+    sentinel = SentinelAgent({"risk_manager": risk, "max_position_size": 0.5})
+    base = {"portfolio_value": 100_000, "returns_history": [0.001, -0.001] * 50}
+    positions = {"AAPL": {"value": 20_000, "quantity": 100, "price": 200.0},
+                 "XOM": {"value": 10_000}}
+
+    decision = sentinel.process({**base, "portfolio_positions": positions, "proposed_trades": [
+        {"symbol": "MSFT", "side": "buy", "value": 15_000}]})
+    assert decision.decision_type == "VETO" and "Sector exposure violation: ['Tech']" in decision.reasoning
+    assert decision.recommendation["risk_metrics"]["sector_exposure"] == pytest.approx({"Tech": 0.35})
+    assert risk.sector_exposure == pytest.approx({"Tech": 20_000.0, "Energy": 10_000.0})
+
+    # AAPL sold down and repriced since the last call: the change arrives as fills
+    positions = {"AAPL": {"value": 11_000, "quantity": 50, "price": 220.0}}
+    decision = sentinel.process({**base, "portfolio_positions": positions, "proposed_trades": [
+        {"symbol": "MSFT", "side": "buy", "value": 15_000}]})
+    assert decision.decision_type == "APPROVE"
+    assert exposure.quantities == {"AAPL": 50}
+    assert risk.sector_exposure == pytest.approx({"Tech": 11_000.0, "Energy": 0.0})
+
+
+def test_sector_tables_and_performance():
+    from src.analytics.duckdb_analytics import DuckDBAnalytics
+    from src.risk.exposure import ExposureAggregator
+
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=30)
+    growth = {"AAPL": 0.20, "MSFT": 0.10, "XOM": -0.05, "GME": 0.50}
+    bars = pd.concat([pd.DataFrame({"date": dates, "symbol": s, "close": np.linspace(100, 100 * (1 + g), 30)})
+                      for s, g in growth.items()], ignore_index=True)
+    analytics = DuckDBAnalytics(":memory:")
+    try:
+        analytics.upsert_market_data(bars)
+        analytics.upsert_symbol_sectors(pd.DataFrame({"symbol": ["AAPL", "MSFT", "XOM"],
+                                                      "sector": ["Tech", "Energy", "Energy"]}))
+        analytics.upsert_symbol_sectors(pd.DataFrame({"symbol": ["MSFT"], "sector": ["Tech"]}))
+        analytics.upsert_factor_loadings(pd.DataFrame({"MKT": [1.1, 0.9]}, index=["AAPL", "XOM"]))
+        analytics.upsert_factor_loadings(pd.DataFrame({"symbol": ["XOM"], "factor": ["VALUE"], "loading": [0.4]}))
+
+        assert analytics.get_symbol_sectors() == {"AAPL": "Tech", "MSFT": "Tech", "XOM": "Energy"}
+        loadings = analytics.get_factor_loadings()
+        assert loadings.to_dict() == {"MKT": {"AAPL": 1.1, "XOM": 0.9}, "VALUE": {"AAPL": 0.0, "XOM": 0.4}}
+
+        sectors = analytics.get_sector_performance(days=60).set_index("sector")
+        assert sectors["symbols"].to_dict() == {"Unknown": 1, "Tech": 2, "Energy": 1}
+        assert sectors.at["Tech", "avg_return_pct"] == pytest.approx(15.0, rel=1e-5)
+        assert sectors.at["Tech", "best_symbol"] == "AAPL" and sectors.at["Tech", "worst_symbol"] == "MSFT"
+        assert sectors.index[0] == "Unknown"  # GME, best average first
+
+        exposure = ExposureAggregator.from_analytics(analytics)
+        exposure.on_fill("XOM", 10, 100.0)
+        assert exposure.sector_exposure == {"Energy": 1_000.0}
+        assert exposure.factor_exposures().to_dict() == pytest.approx({"MKT": 900.0, "VALUE": 400.0})
+    finally:
+        analytics.close()
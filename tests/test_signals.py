@@ -0,0 +1,234 @@
+"""Tests for signal generation"""
+
+import sys
+from pathlib import Path
+import pytest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.signals.incremental import IncrementalSignalEngine
+from src.signals.signal_generator import SignalGenerator, SignalType
+from src.signals.signal_store import SignalStore
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(5)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (120, 30)), axis=0))
+    frame = pd.DataFrame(prices, index=pd.date_range('2024-01-01', periods=120),
+                         columns=[f"S{i}" for i in range(30)])
+    frame.iloc[:90, 0] = np.nan  # listed late: too short for the slow window
+    return frame
+
+
+@pytest.mark.parametrize("kind", ["momentum", "mean_reversion"])
+def test_batch_matches_per_symbol(panel, kind):
+    generator = SignalGenerator()
+    if kind == "momentum":
+        batch = generator.momentum_signal_batch(panel, 10, 40, history=True)
+        single = lambda series: generator.momentum_signal(series, 10, 40)
+    else:
+        batch = generator.mean_reversion_signal_batch(panel, 15, 1.0, history=True)
+        single = lambda series: generator.mean_reversion_signal(series, 15, 1.0)
+
+    for t in (20, 45, 91, 119):
+        for symbol in panel.columns[:8]:
+            history = panel[symbol].iloc[:t + 1].dropna()
+            assert batch.iloc[t][symbol] == single(history).value, (t, symbol)
+
+    latest = (generator.momentum_signal_batch(panel, 10, 40) if kind == "momentum"
+              else generator.mean_reversion_signal_batch(panel, 15, 1.0))
+    pd.testing.assert_series_equal(latest, batch.iloc[-1], check_names=False)
+
+
+def test_batch_accepts_arrays(panel):
+    values = panel.fillna(100.0).to_numpy()
+    latest = SignalGenerator().momentum_signal_batch(values, symbols=list(panel.columns))
+    assert latest.index.tolist() == list(panel.columns)
+    assert latest.dtype == np.int8 and set(latest.unique()) <= {-1, 0, 1}
+
+
+def test_incremental_engine_tracks_batch_history(panel):
+    generator = SignalGenerator()
+    momentum = generator.momentum_signal_batch(panel, 10, 40, history=True)
+    bands = generator.mean_reversion_signal_batch(panel, 15, 1.0, history=True)
+    engine = IncrementalSignalEngine(10, 40, 15, 1.0)
+
+    changes = 0
+    for t, (date, row) in enumerate(panel.iterrows()):
+        emitted = engine.update_many(row.to_dict(), str(date.date()))
+        changes += len(emitted)
+        for signal in emitted:
+            expected = momentum if signal.reason == "momentum" else bands
+            assert signal.signal_type.value == expected.iloc[t][signal.symbol]
+        for symbol in panel.columns:
+            state = engine.current(symbol)
+            assert state["momentum"].value == momentum.iloc[t][symbol], (t, symbol)
+            assert state["mean_reversion"].value == bands.iloc[t][symbol], (t, symbol)
+
+    # Only transitions are emitted, far fewer than one signal per symbol and bar
+    assert 0 < changes < panel.size
+
+
+def test_incremental_engine_warm_up_and_drift():
+    """Long streams stay exact and warm-up is silent"""
+    rng = np.random.default_rng(11)
+    prices = pd.Series(5000 + np.cumsum(rng.normal(0, 5, 3000)))
+    generator = SignalGenerator()
+    engine = IncrementalSignalEngine(generator=generator)
+    engine.warm_up("X", prices.iloc[:2000])
+    assert generator.get_latest_signal("X") is None
+
+    for i in range(2000, len(prices)):
+        engine.update("X", prices.iloc[i])
+    history = prices.iloc[-200:]
+    assert engine.current("X")["momentum"] == generator.momentum_signal(history)
+    assert engine.current("X")["mean_reversion"] == generator.mean_reversion_signal(history)
+    assert engine.update("X", float("nan")) == []
+    assert engine.current("Y") == {"momentum": SignalType.NEUTRAL,
+                                   "mean_reversion": SignalType.NEUTRAL}
+
+
+def test_signal_store_ring_and_flush():
+    """Evicted rows reach the sink in bulk; history and latest survive wrap-around"""
+    flushed = []
+    generator = SignalGenerator(SignalStore(capacity=10, flush_size=4, sink=flushed.append))
+    for i in range(25):
+        kind = SignalType.BUY if i % 2 else SignalType.SELL
+        generator.generate_signal(f"S{i % 3}", kind, 0.1 * (i % 10), f"2024-01-{i + 1:02d}", "momentum")
+
+    store = generator.signals
+    assert len(store) <= 10 and store.evicted == sum(len(f) for f in flushed) == 25 - len(store)
+    assert all(len(f) == 4 for f in flushed)
+    persisted = pd.concat(flushed, ignore_index=True)
+    assert persisted["date"].tolist() == list(pd.date_range("2024-01-01", periods=len(persisted)))
+    assert set(persisted["signal_type"]) == {"BUY", "SELL"}
+
+    latest = generator.get_latest_signal("S0")
+    assert (latest.signal_type, latest.timestamp) == (SignalType.SELL, "2024-01-25")
+    history = generator.history("S1")
+    retained = [i for i in range(store.first_seq, 25) if i % 3 == 1]
+    assert [s.timestamp[:10] for s in history] == [f"2024-01-{i + 1:02d}" for i in retained]
+    assert history[-1].strength == pytest.approx(0.2) and history[-1].reason == "momentum"
+    assert "S2" in store and "S9" not in store and generator.get_latest_signal("S9") is None
+
+    store.flush()
+    assert len(store) == 25 - len(persisted) and sum(len(f) for f in flushed) == 25
+    store.append("S0", SignalType.NEUTRAL, 0.0, "2024-02-01")
+    assert sum(len(f) for f in flushed) == 25  # already-flushed rows are not written again on eviction
+
+
+def test_signal_store_flushes_to_duckdb():
+    from src.analytics.duckdb_analytics import DuckDBAnalytics
+
+    with DuckDBAnalytics(":memory:") as analytics:
+        store = SignalStore(capacity=100, flush_size=50, sink=analytics.insert_signals)
+        for i in range(150):
+            store.append(f"S{i % 7}", SignalType.BUY, 0.5, pd.Timestamp("2024-01-01") + pd.Timedelta(hours=i))
+        store.flush()
+        rows = analytics.query("SELECT date, symbol, signal_type, strength FROM signals ORDER BY ALL")
+        assert len(rows) == 150
+        assert rows["signal_type"].eq("BUY").all() and rows["strength"].eq(0.5).all()
+        assert str(rows["date"].max())[:10] == "2024-01-07"
+
+
+def _walk_forward_reference(returns, window_size, step_size):
+    """The original per-window pandas loop"""
+    sharpes, win_rates, drawdowns = [], [], []
+    for i in range(0, len(returns) - window_size, step_size):
+        window = returns.iloc[i:i + window_size]
+        sharpes.append((window.mean() / window.std()) * (252 ** 0.5) if window.std() != 0 else 0)
+        win_rates.append((window > 0).sum() / len(window))
+        cumulative = (1 + window).cumprod()
+        running_max = cumulative.expanding().max()
+        drawdowns.append(((cumulative - running_max) / running_max).min())
+    return sharpes, win_rates, drawdowns
+
+
+def test_walk_forward_matches_window_loop():
+    from src.signals.validator import SignalValidator
+
+    rng = np.random.default_rng(3)
+    returns = pd.DataFrame(rng.normal(0.0005, 0.02, (1000, 4)), columns=list("ABCD"))
+    returns.iloc[100:400, 3] = 0.0  # flat stretch: zero std windows
+    validator = SignalValidator()
+
+    result = validator.walk_forward_validate(returns, 252, 63)
+    for column in returns.columns:
+        sharpes, win_rates, drawdowns = _walk_forward_reference(returns[column], 252, 63)
+        single = validator.walk_forward_validate(returns[column], 252, 63)
+        assert single["periods"] == result["periods"] == list(range(0, 1000 - 252, 63))
+        np.testing.assert_allclose(single["sharpe_ratios"], sharpes, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(result["sharpe_ratios"][column], sharpes, rtol=1e-9, atol=1e-9)
+        np.testing.assert_allclose(result["win_rates"][column], win_rates)
+        np.testing.assert_allclose(result["max_drawdowns"][column], drawdowns, rtol=1e-9, atol=1e-12)
+
+    # The loop's std of a constant non-zero window is rounding noise; here it is zero
+    returns.iloc[100:400, 3] = 0.001
+    flat = validator.walk_forward_validate(returns, 252, 63)["sharpe_ratios"]["D"]
+    assert flat.iloc[2] == 0.0 and flat.drop(flat.index[2]).abs().lt(10).all()
+
+    short = validator.walk_forward_validate(returns["A"].iloc[:100], 252, 63)
+    assert short == {"periods": [], "sharpe_ratios": [], "win_rates": [], "max_drawdowns": []}
+
+
+def test_bootstrap_confidence_intervals():
+    from src.signals.validator import SignalValidator, stationary_bootstrap_indices
+
+    indices = stationary_bootstrap_indices(np.random.default_rng(0), 200, 500, 10.0)
+    steps = np.diff(indices, axis=1)
+    continued = (steps == 1) | (steps == -499)
+    assert indices.min() >= 0 and indices.max() < 500
+    assert 0.85 < continued.mean() < 0.93  # blocks continue with probability 1 - 1/10
+
+    rng = np.random.default_rng(1)
+    returns = pd.DataFrame(rng.normal([0.001, 0.0, -0.001], 0.01, (750, 3)), columns=["up", "flat", "down"])
+    validator = SignalValidator()
+    intervals = validator.bootstrap_confidence_intervals(returns, 400, seed=7, max_elements=50_000)
+
+    assert list(intervals.index) == ["up", "flat", "down"]
+    assert (intervals["sharpe_lower"] < intervals["sharpe"]).all()
+    assert (intervals["sharpe"] < intervals["sharpe_upper"]).all()
+    assert (intervals["max_drawdown_lower"] < intervals["max_drawdown_upper"]).all()
+    assert (intervals["max_drawdown_upper"] <= 0).all()
+    assert intervals.loc["up", "sharpe_lower"] > intervals.loc["down", "sharpe_upper"] - 2
+
+    # Chunk seeds are spawned, so worker processes reproduce the in-process result
+    parallel = validator.bootstrap_confidence_intervals(returns, 400, seed=7, max_elements=50_000,
+                                                        n_workers=2)
+    pd.testing.assert_frame_equal(intervals, parallel)
+
+    single = validator.bootstrap_confidence_intervals(returns["up"], 400, seed=7, max_elements=50_000)
+    assert single["sharpe"] == pytest.approx(intervals.loc["up", "sharpe"])
+    assert single["max_drawdown"] == pytest.approx(intervals.loc["up", "max_drawdown"])
+
+
+def test_signal_store_keeps_caller_timestamps_and_bounded_reasons(tmp_path):
+    with pytest.raises(ValueError):
+        SignalStore(capacity=10)  # evicted signals must go somewhere, or be dropped on purpose
+
+    store = SignalStore(capacity=10, flush_size=5, drop_evicted=True)
+    for i in range(1000):
+        store.append("S", SignalType.BUY, 1.0, "2024-01-01T09:30:00-05:00", f"price {100 + i:.2f}")
+    latest = store.latest("S")
+    assert latest.timestamp == "2024-01-01T09:30:00-05:00" and latest.reason == "price 1099.00"
+    assert store.frame()["timestamp"].iloc[0] == pd.Timestamp("2024-01-01 14:30:00")
+    assert sum(r is not None for r in store._reasons) == len(store) <= 10
+
+    store.append("S", SignalType.SELL, 1.0, "after the close")
+    assert store.latest("S").timestamp == "after the close"
+    assert store.frame()["timestamp"].isna().iloc[-1]
+
+    # Evicted signals reach a database only through an explicit sink
+    from src.signals import database_sink
+    from src.analytics.duckdb_analytics import DuckDBAnalytics
+
+    path = tmp_path / "signals.duckdb"
+    generator = SignalGenerator(SignalStore(capacity=4, flush_size=2, sink=database_sink(path)))
+    for day in range(1, 7):
+        generator.generate_signal("AAPL", SignalType.BUY, 0.5, f"2024-03-{day:02d}", "momentum")
+    with DuckDBAnalytics(path) as analytics:
+        assert analytics.query("SELECT COUNT(*) AS n FROM signals")["n"].iloc[0] == 2
+    assert SignalGenerator().signals.sink is None
@@ -16,7 +16,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent))
 
 
 def check_dependencies():
@@ -67,7 +67,7 @@ def test_multi_source_pipeline():
     logger.info("\n📊 Testing Multi-Source Data Pipeline...")
     
     try:
-        from data.multi_source_pipeline import MultiSourcePipeline
+        from src.data.multi_source_pipeline import MultiSourcePipeline
         from datetime import datetime, timedelta
         
         pipeline = MultiSourcePipeline()
@@ -97,7 +97,7 @@ def test_duckdb_analytics():
     logger.info("\n📈 Testing DuckDB Analytics...")
     
     try:
-        from analytics.duckdb_analytics import DuckDBAnalytics
+        from src.analytics.duckdb_analytics import DuckDBAnalytics
         import pandas as pd
         import numpy as np
         
@@ -130,7 +130,7 @@ def test_feature_store():
     logger.info("\n🔧 Testing Feature Store...")
     
     try:
-        from feature_store.features import FeatureEngineering
+        from src.feature_store.features import FeatureEngineering
         import pandas as pd
         import numpy as np
         
@@ -162,7 +162,7 @@ def test_optuna_tuning():
     logger.info("\n🚀 Testing Optuna Optimization...")
     
     try:
-        from optimization.optuna_tuner import ParameterTuner
+        from src.optimization.optuna_tuner import ParameterTuner
         import pandas as pd
         import numpy as np
         